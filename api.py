@@ -0,0 +1,171 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import Blueprint, Response, request, session
+
+from modules.lab_management import LabManagement
+from modules.equipment_management import EquipmentManagement, MAX_QUEUE_SIZE
+from modules.pagination import clamp_limit
+from modules.serialization import serialize, dumps
+from modules.summary import get_summary
+from modules.timestamps import now_epoch
+from http_caching import conditional_response, occupancy_window
+
+# JSON API for kiosks and the campus app. Every resource can be fetched on
+# its own (/api/v1/labs) or together with others in one request
+# (/api/v1/batch?include=labs,summary). Parameters apply to all resources
+# unless given per resource as name[resource], e.g. fields[labs]=lab_id,is_available.
+api = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@dataclass(frozen=True)
+class Resource:
+    name: str
+    permissions: Tuple[str, ...]  # any one of these grants access
+    load: Callable[[Dict[str, str]], Any]
+    groups: Optional[Tuple[str, ...]] = None  # data groups it reads; None: never cached
+    validity: Optional[Callable[[], Any]] = None  # see http_caching.cached_page
+
+
+def _id_list(args: Dict[str, str], cast: Callable = str) -> Optional[List]:
+    if not args.get('ids'):
+        return None
+    try:
+        return [cast(value) for value in args['ids'].split(',') if value]
+    except ValueError:
+        raise ApiError(400, f"Invalid ids: {args['ids']}")
+
+
+def _limit(args: Dict[str, str]) -> Optional[int]:
+    try:
+        return int(args['limit']) if args.get('limit') else None
+    except ValueError:
+        raise ApiError(400, f"Invalid limit: {args['limit']}")
+
+
+def _labs(args):
+    labs = LabManagement.get_all_labs()
+    ids = _id_list(args)
+    if ids is not None:
+        wanted = set(ids)
+        labs = [lab for lab in labs if lab.lab_id in wanted]
+    return labs
+
+
+def _lab_schedule(args):
+    if not args.get('lab_id'):
+        raise ApiError(400, "lab_schedule needs a lab_id")
+    return LabManagement.get_lab_schedule(args['lab_id'])
+
+
+def _equipment(args):
+    ids = _id_list(args, int)
+    if ids is not None:
+        return EquipmentManagement.get_equipment(ids)
+    return EquipmentManagement.get_all_equipment(_limit(args), args.get('cursor'))
+
+
+def _my_bookings(args):
+    return LabManagement.get_user_bookings(session['user_id'], _limit(args), args.get('cursor'))
+
+
+def _maintenance_queue(args):
+    limit = clamp_limit(_limit(args)) if args.get('limit') else MAX_QUEUE_SIZE
+    return EquipmentManagement.get_maintenance_queue(args.get('claimed', '1') != '0', limit)
+
+
+def _summary(args):
+    return get_summary()
+
+
+RESOURCES: Dict[str, Resource] = {resource.name: resource for resource in (
+    Resource('labs', ('view_lab',), _labs, ('labs',), occupancy_window),
+    Resource('lab_schedule', ('view_lab',), _lab_schedule, ('labs',), lambda: now_epoch() // 60),
+    Resource('equipment', ('check_equipment',), _equipment, ('equipment',)),
+    Resource('my_bookings', ('book_lab', 'access_lab'), _my_bookings, ('labs',)),
+    # Priorities grow with age and claims lapse, so the queue is always fresh
+    Resource('maintenance_queue', ('maintain_equipment',), _maintenance_queue),
+    Resource('summary', ('check_equipment',), _summary,
+             ('equipment', 'maintenance', 'labs', 'inventory')),
+)}
+
+
+def resource_args(name: str) -> Dict[str, str]:
+    """Query parameters for resource ``name``: plain ones, overridden by
+    ``param[name]`` ones"""
+    suffix = f'[{name}]'
+    args = {key: value for key, value in request.args.items() if '[' not in key}
+    args.update({key[:-len(suffix)]: value for key, value in request.args.items() if key.endswith(suffix)})
+    return args
+
+
+def render_resource(name: str) -> Any:
+    resource = RESOURCES.get(name)
+    if resource is None:
+        raise ApiError(404, f"Unknown resource: {name}")
+    permissions = session.get('permissions', [])
+    if not any(permission in permissions for permission in resource.permissions):
+        raise ApiError(403, f"Not allowed to read {name}")
+    args = resource_args(name)
+    fields = [field for field in args.get('fields', '').split(',') if field] or None
+    try:
+        return serialize(resource.load(args), fields)
+    except ValueError as e:
+        raise ApiError(400, str(e))
+
+
+def json_response(payload: Any, status: int = 200) -> Response:
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+
+@api.before_request
+def require_login():
+    if 'user_id' not in session:
+        return json_response({'error': 'Login required'}, 401)
+
+
+@api.errorhandler(ApiError)
+def api_error(error: ApiError):
+    return json_response({'error': error.message}, error.status)
+
+
+def cacheable(names: List[str], render: Callable[[], Response]) -> Response:
+    """``render()`` as a conditional response when every resource in
+    ``names`` can be cached right now"""
+    resources = [RESOURCES[name] for name in names if name in RESOURCES]
+    if len(resources) < len(names) or any(resource.groups is None for resource in resources):
+        return render()
+    extra = tuple(resource.validity() if resource.validity else () for resource in resources)
+    if None in extra:
+        return render()
+    groups = [group for resource in resources for group in resource.groups]
+    return conditional_response(groups, extra, render)
+
+
+@api.route('/batch')
+def batch():
+    names = list(dict.fromkeys(name for name in request.args.get('include', '').split(',') if name))
+    if not names:
+        raise ApiError(400, "Name the resources to fetch in include=")
+
+    def render():
+        payload = {}
+        for name in names:
+            try:
+                payload[name] = render_resource(name)
+            except ApiError as e:
+                payload[name] = {'error': e.message, 'status': e.status}
+        return json_response(payload)
+    return cacheable(names, render)
+
+
+@api.route('/<name>')
+def get_resource(name):
+    return cacheable([name], lambda: json_response(render_resource(name)))
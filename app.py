@@ -1,12 +1,49 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import (Flask, render_template, request, redirect, url_for, session, flash,
+                   Response, stream_with_context)
+import io
 import os
+import sqlite3
 from functools import wraps
-from datetime import datetime, date
-from modules.lab_management import LabManagement
-from modules.equipment_management import EquipmentManagement
+from datetime import datetime, date, time, timedelta
+from modules.lab_management import LabManagement, BookingOutcome
+from modules.recurrence import RecurrenceRule
+from modules.timetable_import import import_uploaded_file
+from modules.export import export, FORMATS
+from modules.error_handling import ValidationError
+from modules.equipment_management import (EquipmentManagement, RequestRef, PURCHASE_TRANSITIONS,
+                                          read_manifest)
+from modules.inventory_management import InventoryManagement
+from modules.migrations import migrate
+from modules.booking_index import booking_index
+from modules.maintenance_scheduler import maintenance_scheduler
+from modules.summary import get_summary
+from modules.dashboard import dashboard_loader
+from modules.live_updates import LiveEvent, live_updates
+from modules.notifications import notification_pipeline
+from api import api
+from http_caching import cached_page, occupancy_window
+from modules.timestamps import now_epoch, display_date, display_time
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
+app.register_blueprint(api)
+# Booking times are rendered from their epoch columns: {{ booking.start_ts|display_date }}
+app.add_template_filter(display_date)
+app.add_template_filter(display_time)
+
+# Bring the database schema up to date before serving requests
+migrate()
+booking_index.load()
+# Preventive maintenance runs on a thread here unless a standalone worker
+# (python -m modules.maintenance_scheduler) is deployed instead
+if os.environ.get('LAB_MAINTENANCE_SCHEDULER', 'in-process') == 'in-process':
+    maintenance_scheduler.start()
+
+# Hours during which the slot finder offers bookings
+LAB_OPENING_TIME = time(8, 0)
+LAB_CLOSING_TIME = time(22, 0)
+# Offered slots start on these boundaries (e.g. 14:15, not 14:07:31)
+SLOT_GRANULARITY = timedelta(minutes=15)
 
 # Update the USERS dictionary in app.py
 USERS = {
@@ -61,6 +98,18 @@ USERS = {
     }
 }
 
+# Notifications are written and digested on a background thread; every
+# user who adds equipment gets the digests
+notification_pipeline.start(
+    lambda: [user_id for user_id, user in USERS.items() if 'add_equipment' in user['permissions']])
+
+
+@app.after_request
+def forget_dashboards(response):
+    # Any write may change what a dashboard shows
+    if request.method == 'POST':
+        dashboard_loader.clear()
+    return response
 
 # Decorator for requiring login
 def login_required(f):
@@ -73,6 +122,79 @@ def login_required(f):
     return decorated_function
 
 
+def booking_message(result, lab_id, booking_date, start_time, end_time):
+    """Flash message for a BookingResult"""
+    if result.outcome is BookingOutcome.BOOKED:
+        return f'Lab {lab_id} booked successfully for {booking_date} from {start_time} to {end_time}'
+    if result.outcome is BookingOutcome.CONFLICT:
+        return 'Lab is not available for the selected time slot'
+    if result.outcome is BookingOutcome.LAB_UNAVAILABLE:
+        return f'Lab {lab_id} is not available for booking'
+    return 'Failed to book lab'
+
+
+def recurrence_rule_from_form(form, frequency):
+    """Build a RecurrenceRule from the repeat fields of the booking form"""
+    until = form.get('repeat_until')
+    count = form.get('repeat_count')
+    skip_dates = form.get('skip_dates', '')
+    return RecurrenceRule(
+        frequency=frequency,
+        until=datetime.strptime(until, '%Y-%m-%d').date() if until else None,
+        count=int(count) if count else None,
+        exceptions=frozenset(
+            datetime.strptime(value.strip(), '%Y-%m-%d').date()
+            for value in skip_dates.split(',') if value.strip()
+        )
+    )
+
+
+def series_message(result, lab_id):
+    """Flash message for a RecurringBookingResult"""
+    if result.outcome is BookingOutcome.LAB_UNAVAILABLE:
+        return f'Lab {lab_id} is not available for booking'
+    if result.outcome is BookingOutcome.ERROR:
+        return 'Failed to book lab'
+    conflicted = ', '.join(occ.start.strftime('%Y-%m-%d') for occ in result.conflicted)
+    message = f'Booked {len(result.booked)} of {len(result.occurrences)} sessions of lab {lab_id}'
+    return f'{message}; not available on {conflicted}' if conflicted else message
+
+
+def page_args():
+    """Keyset pagination parameters (?limit=&cursor=) of the current request"""
+    return {
+        'limit': request.args.get('limit', type=int),
+        'cursor': request.args.get('cursor')
+    }
+
+
+def flash_batch_results(results, done, noun):
+    """Flash one summary line for a batch operation plus the failed items"""
+    succeeded = [result for result in results if result.ok]
+    flash(f'{done} {len(succeeded)} of {len(results)} {noun}')
+    failed = [f'#{result.item_id} ({result.reason})' for result in results if not result.ok]
+    if failed:
+        flash(f'Skipped: {", ".join(failed)}')
+
+
+def export_response(name, back):
+    """Stream an export as CSV or NDJSON according to the query string
+    (?format=&from=&to=&status=), or flash the error and redirect to ``back``"""
+    fmt = request.args.get('format', 'csv')
+    try:
+        date_from = date.fromisoformat(request.args['from']) if request.args.get('from') else None
+        date_to = date.fromisoformat(request.args['to']) if request.args.get('to') else None
+        lines = export(name, fmt, date_from, date_to, request.args.get('status') or None)
+    except ValueError as e:
+        flash(f'Invalid export: {e}')
+        return redirect(url_for(back))
+
+    filename = f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    return Response(stream_with_context(lines),
+                    mimetype=FORMATS[fmt],
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+
 # Route handlers
 @app.route('/')
 def index():
@@ -99,6 +221,7 @@ def login():
 
 @app.route('/labs/view')
 @login_required
+@cached_page('labs', validity=occupancy_window)
 def view_labs():
     if 'view_lab' not in session.get('permissions', []):
         flash('You do not have permission to view labs')
@@ -122,6 +245,54 @@ def view_labs():
         return redirect(url_for('dashboard'))
 
 
+def next_slot_start(moment: datetime) -> datetime:
+    """``moment`` rounded up to the next SLOT_GRANULARITY boundary"""
+    midnight = datetime.combine(moment.date(), time())
+    steps = -(-(moment - midnight) // SLOT_GRANULARITY)  # ceiling division
+    return midnight + steps * SLOT_GRANULARITY
+
+
+@app.route('/labs/slots')
+@login_required
+def find_slots():
+    if 'view_lab' not in session.get('permissions', []):
+        flash('You do not have permission to view labs')
+        return redirect(url_for('dashboard'))
+
+    form = {
+        'duration': request.args.get('duration', '60'),
+        'date_from': request.args.get('date_from', date.today().isoformat()),
+        'date_to': request.args.get('date_to', date.today().isoformat()),
+        'min_size': request.args.get('min_size', '0'),
+        'location': request.args.get('location', ''),
+        'limit': request.args.get('limit', '10'),
+    }
+    slots = None
+
+    if 'duration' in request.args:
+        try:
+            duration = timedelta(minutes=int(form['duration']))
+            range_start = max(datetime.strptime(form['date_from'], '%Y-%m-%d'),
+                              next_slot_start(datetime.now()))
+            range_end = datetime.strptime(form['date_to'], '%Y-%m-%d') + timedelta(days=1)
+            min_size = int(form['min_size'] or 0)
+            limit = min(max(int(form['limit'] or 10), 1), 50)
+        except ValueError:
+            flash('Invalid search parameters')
+            return redirect(url_for('find_slots'))
+
+        slots = LabManagement.find_free_slots(
+            duration, range_start, range_end,
+            min_size=min_size,
+            location=form['location'] or None,
+            limit=limit,
+            day_start=LAB_OPENING_TIME,
+            day_end=LAB_CLOSING_TIME
+        )
+
+    return render_template('labs/slots.html', form=form, slots=slots, today=date.today().isoformat())
+
+
 @app.route('/logout')
 def logout():
     session.clear()
@@ -159,16 +330,22 @@ def book_lab():
                 flash('Invalid date or time format')
                 return redirect(url_for('view_labs'))
 
-            # Check lab availability
-            if not LabManagement.is_lab_available(lab_id, start_datetime, end_datetime):
-                flash('Lab is not available for the selected time slot')
+            repeat = request.form.get('repeat', 'none')
+            if repeat != 'none':
+                try:
+                    rule = recurrence_rule_from_form(request.form, repeat)
+                    series_result = LabManagement.book_recurring(
+                        session['user_id'], lab_id, start_datetime, end_datetime, rule)
+                except (ValueError, ValidationError) as e:
+                    flash(f'Invalid recurrence: {e}')
+                    return redirect(url_for('view_labs'))
+
+                flash(series_message(series_result, lab_id))
                 return redirect(url_for('view_labs'))
 
-            # Create booking
-            if LabManagement.book_lab(session['user_id'], lab_id, start_datetime, end_datetime):
-                flash(f'Lab {lab_id} booked successfully for {booking_date} from {start_time} to {end_time}')
-            else:
-                flash('Failed to book lab')
+            # Availability is checked inside the booking transaction
+            booking_result = LabManagement.book_lab(session['user_id'], lab_id, start_datetime, end_datetime)
+            flash(booking_message(booking_result, lab_id, booking_date, start_time, end_time))
 
             return redirect(url_for('view_labs'))
 
@@ -197,18 +374,9 @@ def confirm_booking():
         start_datetime = datetime.strptime(f"{booking_date} {start_time}", "%Y-%m-%d %H:%M")
         end_datetime = datetime.strptime(f"{booking_date} {end_time}", "%Y-%m-%d %H:%M")
 
-        # Check if lab is available
-        if not LabManagement.is_lab_available(lab_id, start_datetime, end_datetime):
-            flash('Lab is not available for the selected time slot')
-            return redirect(url_for('view_labs'))
-
-        # Create booking
+        # Create booking (availability is checked inside the booking transaction)
         booking_result = LabManagement.book_lab(session['user_id'], lab_id, start_datetime, end_datetime)
-
-        if booking_result:
-            flash(f'Lab {lab_id} booked successfully for {booking_date} from {start_time} to {end_time}')
-        else:
-            flash('Failed to book lab')
+        flash(booking_message(booking_result, lab_id, booking_date, start_time, end_time))
 
     except Exception as e:
         print(f"Error in confirm_booking: {str(e)}")
@@ -225,8 +393,40 @@ def view_assignments():
         return redirect(url_for('dashboard'))
 
     # Get all bookings with user and lab details
-    bookings = LabManagement.get_all_bookings()
-    return render_template('labs/assignments.html', bookings=bookings)
+    bookings = LabManagement.get_all_bookings(**page_args())
+    return render_template('labs/assignments.html', bookings=bookings, summary=get_summary())
+
+
+@app.route('/labs/assignments/export')
+@login_required
+def export_bookings():
+    if 'assign_lab' not in session.get('permissions', []):
+        flash('You do not have permission to export bookings')
+        return redirect(url_for('dashboard'))
+
+    return export_response('bookings', 'view_assignments')
+
+
+@app.route('/labs/import', methods=['GET', 'POST'])
+@login_required
+def import_timetable():
+    if 'assign_lab' not in session.get('permissions', []):
+        flash('You do not have permission to import timetables')
+        return redirect(url_for('dashboard'))
+
+    summary = None
+    if request.method == 'POST':
+        upload = request.files.get('timetable')
+        if not upload or not upload.filename:
+            flash('Please choose a CSV file to import')
+            return redirect(url_for('import_timetable'))
+        try:
+            summary = import_uploaded_file(upload, dry_run=bool(request.form.get('dry_run')))
+        except (ValueError, UnicodeDecodeError) as e:
+            flash(f'Could not import timetable: {e}')
+            return redirect(url_for('import_timetable'))
+
+    return render_template('labs/import.html', summary=summary)
 
 
 @app.route('/labs/assignment/process/<int:booking_id>/<string:action>', methods=['POST'])
@@ -249,6 +449,31 @@ def process_lab_assignment(booking_id, action):  # Changed function name
     return redirect(url_for('view_assignments'))
 
 
+@app.route('/labs/events')
+@login_required
+def lab_events():
+    """Server-sent events: lab availability for everyone, booking status
+    changes for the bookings' owner"""
+    if not any(perm in session.get('permissions', []) for perm in ['view_lab', 'book_lab', 'access_lab']):
+        return Response(status=403)
+
+    user_id = session['user_id']
+    after = request.headers.get('Last-Event-ID', type=int)
+
+    def stream():
+        yield 'retry: 5000\n\n'
+        position = after
+        if position is None:
+            # Start from a snapshot; events after it follow without gaps
+            position = live_updates.last_event_id
+            yield LiveEvent(position, 'snapshot', {'labs': live_updates.availability()}).encode()
+        for event in live_updates.events(user_id, position):
+            yield ': keep-alive\n\n' if event is None else event.encode()
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 @app.route('/labs/mybookings')
 @login_required
 def my_bookings():
@@ -256,13 +481,12 @@ def my_bookings():
         flash('You do not have permission to view bookings')
         return redirect(url_for('dashboard'))
 
-    bookings = LabManagement.get_user_bookings(session['user_id'])
+    bookings = LabManagement.get_user_bookings(session['user_id'], **page_args())
+
+    now = now_epoch()
 
     def is_current_booking(booking):
-        now = datetime.now()
-        start_time = datetime.strptime(booking['start_time'], '%Y-%m-%d %H:%M')
-        end_time = datetime.strptime(booking['end_time'], '%Y-%m-%d %H:%M')
-        return start_time <= now <= end_time
+        return booking['start_ts'] <= now <= booking['end_ts']
 
     return render_template('labs/mybookings.html',
                            bookings=bookings,
@@ -286,12 +510,7 @@ def access_lab(booking_id):
         flash('Booking must be approved to access lab')
         return redirect(url_for('my_bookings'))
 
-    # Fix datetime string parsing
-    current_time = datetime.now()
-    start_time = datetime.strptime(booking['start_time'][:16], '%Y-%m-%d %H:%M')  # Remove seconds
-    end_time = datetime.strptime(booking['end_time'][:16], '%Y-%m-%d %H:%M')  # Remove seconds
-
-    if not (start_time <= current_time <= end_time):
+    if not (booking['start_ts'] <= now_epoch() <= booking['end_ts']):
         flash('Lab can only be accessed during booked time slot')
         return redirect(url_for('my_bookings'))
 
@@ -301,23 +520,22 @@ def access_lab(booking_id):
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    current_active_booking = None
-    if 'access_lab' in session.get('permissions', []):
-        current_active_booking = LabManagement.get_current_active_booking(session['user_id'])
-    return render_template('dashboard.html', current_active_booking=current_active_booking)
+    data = dashboard_loader.load(session['user_id'], session.get('permissions', []))
+    return render_template('dashboard.html', data=data, summary=data.summary)
 
 
 # Equipment section
 
 @app.route('/equipment/check')
 @login_required
+@cached_page('equipment')
 def check_equipment():  # This is the correct function name
     if 'check_equipment' not in session.get('permissions', []):
         flash('Unauthorized access')
         return redirect(url_for('dashboard'))
 
-    equipment_list = EquipmentManagement.get_all_equipment()
-    return render_template('equipment/check.html', equipment=equipment_list)
+    equipment_list = EquipmentManagement.get_all_equipment(**page_args())
+    return render_template('equipment/check.html', equipment=equipment_list, summary=get_summary())
 
 
 
@@ -345,6 +563,24 @@ def report_issue(equip_id):
     return redirect(url_for('check_equipment'))
 
 
+@app.route('/equipment/report/batch', methods=['POST'])
+@login_required
+def report_issue_batch():
+    if 'report_issue' not in session.get('permissions', []):
+        flash('Unauthorized access')
+        return redirect(url_for('dashboard'))
+
+    equip_ids = request.form.getlist('equip_ids', type=int)
+    issue = request.form.get('issue')
+    if not equip_ids or not issue:
+        flash('Select equipment and describe the issue')
+        return redirect(url_for('check_equipment'))
+
+    results = EquipmentManagement.report_issue_batch(equip_ids, issue, session['user_id'])
+    flash_batch_results(results, 'Reported an issue on', 'item(s)')
+    return redirect(url_for('check_equipment'))
+
+
 @app.route('/maintenance/tasks')
 @login_required
 def view_tasks():
@@ -352,11 +588,55 @@ def view_tasks():
         flash('Unauthorized access')
         return redirect(url_for('dashboard'))
 
-    # Get all maintenance tasks (reported issues)
-    tasks = EquipmentManagement.get_maintenance_tasks()
+    # Open issues by priority; resolved work is under maintenance reports
+    tasks = EquipmentManagement.get_maintenance_queue()
     return render_template('maintenance/tasks.html', tasks=tasks)
 
 
+@app.route('/maintenance/tasks/claim', methods=['POST'])
+@login_required
+def claim_next_tasks():
+    if 'maintain_equipment' not in session.get('permissions', []):
+        flash('Unauthorized access')
+        return redirect(url_for('dashboard'))
+
+    count = request.form.get('count', 1, type=int)
+    claimed = EquipmentManagement.claim_next_tasks(session['user_id'], count)
+    if claimed:
+        flash(f'Claimed {len(claimed)} task(s)')
+    else:
+        flash('No tasks available to claim')
+    return redirect(url_for('view_tasks'))
+
+
+@app.route('/maintenance/tasks/<int:issue_id>/claim', methods=['POST'])
+@login_required
+def claim_task(issue_id):
+    if 'maintain_equipment' not in session.get('permissions', []):
+        flash('Unauthorized access')
+        return redirect(url_for('dashboard'))
+
+    if EquipmentManagement.claim_task(issue_id, session['user_id']):
+        flash('Task claimed')
+    else:
+        flash('Task is already claimed or resolved')
+    return redirect(url_for('view_tasks'))
+
+
+@app.route('/maintenance/tasks/<int:issue_id>/release', methods=['POST'])
+@login_required
+def release_task(issue_id):
+    if 'maintain_equipment' not in session.get('permissions', []):
+        flash('Unauthorized access')
+        return redirect(url_for('dashboard'))
+
+    if EquipmentManagement.release_task(issue_id, session['user_id']):
+        flash('Task returned to the queue')
+    else:
+        flash('Failed to release task')
+    return redirect(url_for('view_tasks'))
+
+
 @app.route('/equipment')
 @login_required
 def equipment_dashboard():
@@ -384,7 +664,7 @@ def maintain_equipment():
         return redirect(url_for('dashboard'))
 
     if request.method == 'POST':
-        task_id = request.form.get('task_id')
+        task_id = request.form.get('task_id', type=int)
         resolution = request.form.get('resolution')
 
         if EquipmentManagement.resolve_maintenance(task_id, resolution, session['user_id']):
@@ -417,6 +697,24 @@ def resolve_issue(issue_id):
     return redirect(url_for('maintain_equipment'))
 
 
+@app.route('/equipment/maintain/batch', methods=['POST'])
+@login_required
+def resolve_issue_batch():
+    if 'maintain_equipment' not in session.get('permissions', []):
+        flash('Unauthorized access')
+        return redirect(url_for('dashboard'))
+
+    issue_ids = request.form.getlist('issue_ids', type=int)
+    resolution = request.form.get('resolution')
+    if not issue_ids or not resolution:
+        flash('Select tasks and describe the resolution')
+        return redirect(url_for('view_tasks'))
+
+    results = EquipmentManagement.resolve_issue_batch(issue_ids, resolution, session['user_id'])
+    flash_batch_results(results, 'Resolved', 'task(s)')
+    return redirect(url_for('view_tasks'))
+
+
 @app.route('/inventory/request', methods=['GET', 'POST'])
 @login_required
 def request_from_inventory():
@@ -433,6 +731,12 @@ def request_from_inventory():
         response = EquipmentManagement.check_inventory(equip_type, quantity)
 
         if response['available']:
+            InventoryManagement.notify_it_staff(response['request_id'], {
+                'equipment_type': equip_type,
+                'quantity': quantity,
+                'reason': reason,
+                'requested_by': session['user_id']
+            })
             flash(f'Equipment available. IT Staff will be notified to add {quantity} {equip_type}(s).')
         else:
             flash('Equipment not available in inventory. Consider purchase request.')
@@ -463,6 +767,15 @@ def purchase_equipment():
     return render_template('inventory/purchase.html')
 
 
+# Purchase actions and the lifecycle status each one moves to
+PURCHASE_ACTIONS = {
+    'approve': 'approved',
+    'reject': 'rejected',
+    'order': 'ordered',
+    'delivered': 'delivered',
+}
+
+
 @app.route('/inventory/purchase/<int:request_id>/<string:action>', methods=['POST'])
 @login_required
 def process_purchase(request_id, action):
@@ -470,22 +783,77 @@ def process_purchase(request_id, action):
         flash('Unauthorized access')
         return redirect(url_for('dashboard'))
 
-    if action == 'delivered':
-        EquipmentManagement.mark_purchase_delivered(request_id)
-        flash('Equipment delivered from inventory')
+    if action not in PURCHASE_ACTIONS:
+        flash('Invalid action')
+        return redirect(url_for('inventory_status'))
 
+    result, = EquipmentManagement.transition_purchases([request_id], PURCHASE_ACTIONS[action])
+    if result.ok:
+        flash(f'Purchase request {PURCHASE_ACTIONS[action]}')
+    else:
+        flash(f'Purchase request not updated: {result.reason}')
     return redirect(url_for('inventory_status'))
 
 
+@app.route('/inventory/purchases/batch', methods=['POST'])
+@login_required
+def process_purchase_batch():
+    if 'purchase_equipment' not in session.get('permissions', []):
+        flash('Unauthorized access')
+        return redirect(url_for('dashboard'))
+
+    action = request.form.get('action')
+    purchase_ids = request.form.getlist('purchase_ids', type=int)
+    if action not in PURCHASE_ACTIONS or not purchase_ids:
+        flash('Select purchase requests and an action')
+        return redirect(url_for('inventory_status'))
+
+    results = EquipmentManagement.transition_purchases(purchase_ids, PURCHASE_ACTIONS[action])
+    flash_batch_results(results, PURCHASE_ACTIONS[action].capitalize(), 'purchase request(s)')
+    return redirect(url_for('inventory_status'))
+
+
+@app.route('/inventory/purchases/reconcile', methods=['GET', 'POST'])
+@login_required
+def reconcile_deliveries():
+    if 'purchase_equipment' not in session.get('permissions', []):
+        flash('Unauthorized access')
+        return redirect(url_for('dashboard'))
+
+    results = None
+    if request.method == 'POST':
+        upload = request.files.get('manifest')
+        if not upload or not upload.filename:
+            flash('Please choose a delivery manifest (CSV)')
+            return redirect(url_for('reconcile_deliveries'))
+        try:
+            manifest = read_manifest(io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline=''))
+        except ValidationError as e:
+            flash(e.message)
+            return redirect(url_for('reconcile_deliveries'))
+        except UnicodeDecodeError:
+            flash('The manifest must be a UTF-8 CSV file')
+            return redirect(url_for('reconcile_deliveries'))
+
+        results = EquipmentManagement.reconcile_deliveries(
+            manifest, provision=not request.form.get('deliver_only'))
+        matched = sum(1 for result in results if result.matched)
+        flash(f'Matched {matched} of {len(results)} manifest line(s)')
+
+    return render_template('inventory/reconcile.html', results=results)
+
+
 @app.route('/inventory/status')
 @login_required
+@cached_page('inventory')
 def inventory_status():
     if 'request_equipment' not in session.get('permissions', []):
         flash('Unauthorized access')
         return redirect(url_for('dashboard'))
 
-    requests = EquipmentManagement.get_inventory_requests(session['user_id'])
-    return render_template('inventory/status.html', requests=requests)
+    requests = EquipmentManagement.get_inventory_requests(session['user_id'], **page_args())
+    return render_template('inventory/status.html', requests=requests,
+                           purchase_actions=PURCHASE_ACTIONS, purchase_transitions=PURCHASE_TRANSITIONS)
 
 
 @app.route('/equipment/add')
@@ -500,14 +868,63 @@ def add_equipment():
     return render_template('equipment/add.html', pending_requests=pending_requests)
 
 
-@app.route('/equipment/add/<int:request_id>', methods=['POST'])
+@app.route('/it/notifications')
 @login_required
-def confirm_add_equipment(request_id):
+def it_notifications():
     if 'add_equipment' not in session.get('permissions', []):
         flash('Unauthorized access')
         return redirect(url_for('dashboard'))
 
-    if EquipmentManagement.add_equipment_from_request(request_id):
+    notifications = InventoryManagement.get_it_notifications(**page_args())
+    digests = InventoryManagement.get_it_digests(session['user_id'])
+    return render_template('it/notifications.html', notifications=notifications, digests=digests)
+
+
+@app.route('/it/notifications/process', methods=['POST'])
+@login_required
+def process_notifications():
+    if 'add_equipment' not in session.get('permissions', []):
+        flash('Unauthorized access')
+        return redirect(url_for('dashboard'))
+
+    notification_ids = request.form.getlist('notification_ids', type=int)
+    status = 'rejected' if request.form.get('action') == 'reject' else 'processed'
+    if not notification_ids:
+        flash('Select notifications first')
+        return redirect(url_for('it_notifications'))
+
+    changed = InventoryManagement.process_notifications(
+        notification_ids, session['user_id'], status, request.form.get('notes') or None)
+    flash(f'Marked {changed} notification(s) {status}')
+    return redirect(url_for('it_notifications'))
+
+
+@app.route('/it/notifications/digests/<int:digest_id>/process', methods=['POST'])
+@login_required
+def process_digest(digest_id):
+    if 'add_equipment' not in session.get('permissions', []):
+        flash('Unauthorized access')
+        return redirect(url_for('dashboard'))
+
+    changed = InventoryManagement.process_digest(digest_id, session['user_id'])
+    flash(f'Marked {changed} notification(s) processed')
+    return redirect(url_for('it_notifications'))
+
+
+@app.route('/equipment/add/<source>/<int:request_id>', methods=['POST'])
+@login_required
+def confirm_add_equipment(source, request_id):
+    if 'add_equipment' not in session.get('permissions', []):
+        flash('Unauthorized access')
+        return redirect(url_for('dashboard'))
+
+    try:
+        added = EquipmentManagement.add_equipment_from_request(RequestRef(source, request_id))
+    except ValidationError as e:
+        flash(e.message)
+        return redirect(url_for('add_equipment'))
+
+    if added:
         flash('Equipment added successfully')
     else:
         flash('Failed to add equipment')
@@ -515,6 +932,38 @@ def confirm_add_equipment(request_id):
     return redirect(url_for('add_equipment'))
 
 
+@app.route('/equipment/add/bulk', methods=['POST'])
+@login_required
+def bulk_add_equipment():
+    if 'add_equipment' not in session.get('permissions', []):
+        flash('Unauthorized access')
+        return redirect(url_for('dashboard'))
+
+    selected = request.form.getlist('requests')
+    if not selected:
+        flash('Select at least one request')
+        return redirect(url_for('add_equipment'))
+
+    try:
+        results = EquipmentManagement.provision_requests(selected)
+    except ValidationError as e:
+        flash(e.message)
+        return redirect(url_for('add_equipment'))
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+        flash('Failed to add equipment')
+        return redirect(url_for('add_equipment'))
+
+    provisioned = [result for result in results if result.provisioned]
+    items = sum(len(result.equipment_ids) for result in provisioned)
+    flash(f'Added {items} item(s) from {len(provisioned)} request(s)')
+    skipped = len(results) - len(provisioned)
+    if skipped:
+        flash(f'{skipped} request(s) were no longer pending and were skipped')
+
+    return redirect(url_for('add_equipment'))
+
+
 @app.route('/equipment/remove')
 @login_required
 def remove_equipment():
@@ -522,7 +971,7 @@ def remove_equipment():
         flash('Unauthorized access')
         return redirect(url_for('dashboard'))
 
-    equipment_list = EquipmentManagement.get_all_equipment()
+    equipment_list = EquipmentManagement.get_all_equipment(**page_args())
     return render_template('equipment/remove.html', equipment=equipment_list)
 
 
@@ -541,15 +990,44 @@ def confirm_remove_equipment(equip_id):
     return redirect(url_for('remove_equipment'))
 
 
+@app.route('/equipment/remove/batch', methods=['POST'])
+@login_required
+def remove_equipment_batch():
+    if 'remove_equipment' not in session.get('permissions', []):
+        flash('Unauthorized access')
+        return redirect(url_for('dashboard'))
+
+    equip_ids = request.form.getlist('equip_ids', type=int)
+    reason = request.form.get('reason')
+    if not equip_ids or not reason:
+        flash('Select equipment and give a reason for removal')
+        return redirect(url_for('remove_equipment'))
+
+    results = EquipmentManagement.remove_equipment_batch(equip_ids, reason, session['user_id'])
+    flash_batch_results(results, 'Removed', 'item(s)')
+    return redirect(url_for('remove_equipment'))
+
+
 @app.route('/maintenance/reports')
 @login_required
+@cached_page('maintenance')
 def maintenance_reports():
     if 'view_maintenance_reports' not in session.get('permissions', []):
         flash('Unauthorized access')
         return redirect(url_for('dashboard'))
 
-    maintenance_history = EquipmentManagement.get_maintenance_history()
+    maintenance_history = EquipmentManagement.get_maintenance_history(**page_args())
     return render_template('maintenance/reports.html', history=maintenance_history)
 
+
+@app.route('/maintenance/reports/export')
+@login_required
+def export_maintenance_history():
+    if 'view_maintenance_reports' not in session.get('permissions', []):
+        flash('Unauthorized access')
+        return redirect(url_for('dashboard'))
+
+    return export_response('maintenance', 'maintenance_reports')
+
 if __name__ == '__main__':
     app.run(debug=True)
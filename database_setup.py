@@ -1,106 +1,19 @@
-import sqlite3
 from datetime import datetime
 
-def setup_database():
-    """Initialize the database with required tables"""
-    with sqlite3.connect('lab_management.db') as conn:
-        cursor = conn.cursor()
-
-        # Create Users table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            userID INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            role TEXT NOT NULL,
-            contact_info TEXT,
-            password_hash TEXT NOT NULL,
-            major TEXT,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
-
-        # Create Labs table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS labs (
-            labID TEXT PRIMARY KEY,
-            size INTEGER,
-            location TEXT,
-            info TEXT,
-            isAvailable BOOLEAN DEFAULT TRUE,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
-
-        # Create Equipment table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS equipment (
-            equipID INTEGER PRIMARY KEY AUTOINCREMENT,
-            equipType TEXT NOT NULL,
-            status TEXT DEFAULT 'operational',
-            last_checked DATETIME,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
+from modules.database import get_connection
+from modules.migrations import migrate
 
-        # Create Lab Bookings table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS lab_bookings (
-            bookingID INTEGER PRIMARY KEY AUTOINCREMENT,
-            userID INTEGER,
-            labID TEXT,
-            start_time DATETIME,
-            end_time DATETIME,
-            status TEXT DEFAULT 'pending',
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (userID) REFERENCES users(userID),
-            FOREIGN KEY (labID) REFERENCES labs(labID)
-        )
-        """)
-
-        # Create Equipment Requests table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS equipment_requests (
-            requestID INTEGER PRIMARY KEY AUTOINCREMENT,
-            userID INTEGER,
-            equipID INTEGER,
-            request_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-            status TEXT DEFAULT 'pending',
-            return_date DATETIME,
-            FOREIGN KEY (userID) REFERENCES users(userID),
-            FOREIGN KEY (equipID) REFERENCES equipment(equipID)
-        )
-        """)
-
-        # Create Maintenance Schedule table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS maintenance_schedule (
-            scheduleID INTEGER PRIMARY KEY AUTOINCREMENT,
-            equipID INTEGER,
-            scheduled_date DATETIME,
-            status TEXT DEFAULT 'scheduled',
-            completed_date DATETIME,
-            notes TEXT,
-            FOREIGN KEY (equipID) REFERENCES equipment(equipID)
-        )
-        """)
-
-        # Create Equipment Issues table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS equipment_issues (
-            issueID INTEGER PRIMARY KEY AUTOINCREMENT,
-            equipID INTEGER,
-            description TEXT,
-            report_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-            resolved_date DATETIME,
-            resolution_notes TEXT,
-            FOREIGN KEY (equipID) REFERENCES equipment(equipID)
-        )
-        """)
+def setup_database():
+    """Initialize the database by applying all pending schema migrations"""
+    return migrate()
 
 def insert_sample_data():
-    """Insert sample data for testing"""
-    with sqlite3.connect('lab_management.db') as conn:
+    """Insert sample data for testing (skipped once users exist)"""
+    with get_connection() as conn:
         cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM users")
+        if cursor.fetchone()[0]:
+            return
 
         # Sample Users
         cursor.executemany("""
@@ -114,7 +27,7 @@ def insert_sample_data():
 
         # Sample Labs
         cursor.executemany("""
-        INSERT INTO labs (labID, size, location, info)
+        INSERT OR IGNORE INTO labs (labID, size, location, info)
         VALUES (?, ?, ?, ?)
         """, [
             ('LAB001', 30, 'Building A, Floor 1', 'General Purpose Lab'),
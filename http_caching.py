@@ -0,0 +1,76 @@
+import hashlib
+from datetime import date, datetime
+from functools import wraps
+from typing import Callable, Hashable, Iterable, Optional
+
+from flask import Response, get_flashed_messages, make_response, request, session
+
+from modules.data_versions import data_version
+from modules.occupancy import occupancy_cache
+from modules.page_cache import CachedPage, page_cache
+
+
+def occupancy_window() -> Optional[Hashable]:
+    """Lab availability shown now holds until the occupancy cache expires;
+    None (do not cache) once it has"""
+    valid_until = occupancy_cache.next_change()
+    if valid_until is None or datetime.now() >= valid_until:
+        return None
+    return valid_until.isoformat(), date.today().isoformat()
+
+
+def conditional_response(groups: Iterable[str], extra: Hashable,
+                         render: Callable[[], Response]) -> Response:
+    """``render()``'s response, served from the page cache or as a 304 while
+    the data of ``groups`` is unchanged.
+
+    The ETag covers the full URL, the user and role, the groups' data
+    version and ``extra`` (anything else the page depends on). Pages that
+    show or set flash messages are never cached, and neither is anything
+    while the data version cannot be read.
+    """
+    if '_flashes' in session:
+        return render()
+    version = data_version(*sorted(set(groups)))
+    if not version.token:
+        return render()
+    key = (request.full_path, session.get('user_id'), session.get('role'), version.token, extra)
+    etag = hashlib.sha1(repr(key).encode()).hexdigest()
+
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        cached = page_cache.get(etag)
+        if cached is not None:
+            response = Response(cached.body, mimetype=cached.mimetype)
+        else:
+            response = make_response(render())
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            if '_flashes' in session or get_flashed_messages():
+                return response
+            page_cache.put(etag, CachedPage(response.get_data(), response.mimetype))
+    response.set_etag(etag)
+    if version.changed_at:
+        response.last_modified = version.changed_at
+    # Browsers and kiosks keep the page but ask again each time
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def cached_page(*groups: str, validity: Optional[Callable[[], Optional[Hashable]]] = None):
+    """Serve a GET view through ``conditional_response`` for data ``groups``.
+
+    ``validity`` returns what else the page depends on, or None when it
+    must not be cached right now. Put it below ``login_required``.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            extra = validity() if validity else ()
+            if extra is None:
+                return f(*args, **kwargs)
+            return conditional_response(groups, extra, lambda: f(*args, **kwargs))
+        return decorated_function
+    return decorator
@@ -0,0 +1,322 @@
+import sqlite3
+import threading
+import logging
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .database import get_connection
+from .timestamps import to_datetime
+
+
+_RESOLUTION = timedelta(microseconds=1)
+
+
+class IntervalSet:
+    """Intervals of one lab (e.g. its approved bookings), sorted by (start, id).
+
+    Any interval overlapping [start, end) must begin after
+    ``start - max_length``, so an overlap query only inspects the slice
+    between two bisections instead of every booking of the lab.
+    """
+    __slots__ = ('keys', 'ends', 'max_length')
+
+    def __init__(self):
+        self.keys: List[Tuple[datetime, int]] = []
+        self.ends: List[datetime] = []
+        self.max_length = None
+
+    def add(self, booking_id: int, start: datetime, end: datetime) -> None:
+        key = (start, booking_id)
+        pos = bisect_left(self.keys, key)
+        self.keys.insert(pos, key)
+        self.ends.insert(pos, end)
+        length = end - start
+        if self.max_length is None or length > self.max_length:
+            self.max_length = length
+
+    def remove(self, booking_id: int, start: datetime) -> None:
+        key = (start, booking_id)
+        pos = bisect_left(self.keys, key)
+        if pos < len(self.keys) and self.keys[pos] == key:
+            del self.keys[pos]
+            del self.ends[pos]
+
+    def _candidates(self, start: datetime, end: datetime) -> range:
+        if not self.keys or end <= start:
+            return range(0)
+        lo = bisect_left(self.keys, (start - self.max_length,))
+        hi = bisect_left(self.keys, (end,))
+        return range(lo, hi)
+
+    def overlapping(self, start: datetime, end: datetime) -> List[int]:
+        return [self.keys[i][1] for i in self._candidates(start, end) if self.ends[i] > start]
+
+    def window(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        return [(self.keys[i][0], self.ends[i]) for i in self._candidates(start, end)
+                if self.ends[i] > start]
+
+    def state_at(self, moment: datetime) -> Tuple[Optional[int], Optional[datetime]]:
+        """(ID of an interval covering ``moment`` or None, next time that can change)"""
+        after = moment + _RESOLUTION
+        covering = [i for i in self._candidates(moment, after) if self.ends[i] > moment]
+        boundaries = [self.ends[i] for i in covering]
+        following = bisect_left(self.keys, (after,))
+        if following < len(self.keys):
+            boundaries.append(self.keys[following][0])
+        current = self.keys[covering[0]][1] if covering else None
+        return current, min(boundaries) if boundaries else None
+
+
+# Every change to the set of approved bookings (a booking becoming or
+# ceasing to be approved, or an approved one moving) appends its ID here, so
+# an index only re-reads what changed since the last sequence it saw. The
+# log keeps the latest BOOKING_CHANGES_KEPT entries; an index that falls
+# further behind reloads.
+BOOKING_CHANGES_KEPT = 10000
+
+BOOKING_CHANGES_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS booking_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        bookingID INTEGER NOT NULL
+    )
+    """,
+    "DROP TRIGGER IF EXISTS trg_booking_changes_insert",
+    "DROP TRIGGER IF EXISTS trg_booking_changes_update",
+    "DROP TRIGGER IF EXISTS trg_booking_changes_delete",
+    "DROP TRIGGER IF EXISTS trg_booking_changes_prune",
+    """
+    CREATE TRIGGER trg_booking_changes_insert AFTER INSERT ON lab_bookings
+    WHEN NEW.status = 'approved'
+    BEGIN
+        INSERT INTO booking_changes (bookingID) VALUES (NEW.bookingID);
+    END
+    """,
+    """
+    CREATE TRIGGER trg_booking_changes_update
+    AFTER UPDATE OF status, labID, start_ts, end_ts ON lab_bookings
+    WHEN OLD.status = 'approved' OR NEW.status = 'approved'
+    BEGIN
+        INSERT INTO booking_changes (bookingID) VALUES (NEW.bookingID);
+    END
+    """,
+    """
+    CREATE TRIGGER trg_booking_changes_delete AFTER DELETE ON lab_bookings
+    WHEN OLD.status = 'approved'
+    BEGIN
+        INSERT INTO booking_changes (bookingID) VALUES (OLD.bookingID);
+    END
+    """,
+    f"""
+    CREATE TRIGGER trg_booking_changes_prune AFTER INSERT ON booking_changes
+    WHEN NEW.seq % 1000 = 0
+    BEGIN
+        DELETE FROM booking_changes WHERE seq <= NEW.seq - {BOOKING_CHANGES_KEPT};
+    END
+    """,
+)
+
+# Changes after a sequence number with the booking's current state (NULL
+# status once it was deleted)
+BOOKING_CHANGES_QUERY = """
+    SELECT c.seq, c.bookingID, b.labID, b.start_ts, b.end_ts, b.status
+    FROM booking_changes c
+    LEFT JOIN lab_bookings b ON b.bookingID = c.bookingID
+    WHERE c.seq > ?
+    ORDER BY c.seq
+"""
+
+
+def install(conn: sqlite3.Connection) -> None:
+    """Create booking_changes and the triggers that fill it"""
+    for statement in BOOKING_CHANGES_DDL:
+        conn.execute(statement)
+
+
+class BookingIntervalIndex:
+    """In-memory index of approved bookings used for conflict checks.
+
+    Loaded at startup and updated by LabManagement whenever a booking is
+    created or changes status. Other processes (more workers, the standalone
+    scheduler) write lab_bookings without touching this index, so at most
+    once per ``sync_interval`` a read goes through ``sync()``, which applies
+    the booking_changes entries newer than the last one seen. Pending
+    bookings and other writes that leave the approved set alone log nothing.
+    ``verify()`` compares it with lab_bookings.
+    """
+
+    def __init__(self, sync_interval: float = 1.0):
+        self.sync_interval = sync_interval
+        self._labs: Dict[str, IntervalSet] = {}
+        self._bookings: Dict[int, Tuple[str, datetime, datetime]] = {}
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()  # one thread syncs, the others read on
+        self._loaded = False
+        self._seq = 0  # last booking_changes entry applied
+        self._checked_at = 0.0
+        self.version = 0  # bumped on every change, lets caches detect staleness
+
+    @staticmethod
+    def _fetch_approved() -> Tuple[int, Dict[int, Tuple[str, datetime, datetime]]]:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            # Read the sequence first: a change landing during the fetch is
+            # logged after it and re-applied by the next sync()
+            cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM booking_changes")
+            seq, = cursor.fetchone()
+            cursor.execute("""
+                SELECT bookingID, labID, start_ts, end_ts
+                FROM lab_bookings
+                WHERE status = 'approved'
+            """)
+            return seq, {row[0]: (str(row[1]), to_datetime(row[2]), to_datetime(row[3]))
+                         for row in cursor}
+
+    def load(self) -> int:
+        """(Re)build the index from the database; returns the booking count.
+
+        The fetch and sort happen before the lock is taken; readers keep
+        using the old index until the new one is swapped in.
+        """
+        seq, bookings = self._fetch_approved()
+        labs: Dict[str, IntervalSet] = {}
+        for booking_id, (lab_id, start, end) in sorted(bookings.items(), key=lambda item: item[1][1]):
+            labs.setdefault(lab_id, IntervalSet()).add(booking_id, start, end)
+        with self._lock:
+            if self._loaded and seq < self._seq:
+                return len(self._bookings)  # a concurrent sync is already newer
+            self._labs = labs
+            self._bookings = bookings
+            self._loaded = True
+            self._seq = seq
+            self._checked_at = time.monotonic()
+            self.version += 1
+        logging.info(f"Booking index loaded with {len(bookings)} approved bookings")
+        return len(bookings)
+
+    def sync(self) -> int:
+        """Apply changes to approved bookings logged since the last sync.
+
+        Reads only the booking_changes entries after the last applied one,
+        joined to their bookings' current rows; reloads instead if entries
+        were pruned before they were seen. Returns how many entries were
+        applied. A database error keeps the current index.
+        """
+        if not self._sync_lock.acquire(blocking=False):
+            return 0
+        try:
+            self._checked_at = time.monotonic()
+            try:
+                with get_connection() as conn:
+                    rows = conn.execute(BOOKING_CHANGES_QUERY, (self._seq,)).fetchall()
+            except sqlite3.Error as e:
+                logging.warning(f"Booking index sync failed: {e}")
+                return 0
+            if not rows:
+                return 0
+            if rows[0][0] != self._seq + 1:
+                self.load()
+                return len(rows)
+            latest = {row[1]: row for row in rows}
+            with self._lock:
+                for booking_id, (_, _, lab_id, start_ts, end_ts, status) in latest.items():
+                    if status == 'approved':
+                        self.add(booking_id, lab_id, start_ts, end_ts)
+                    else:
+                        self.remove(booking_id)
+                self._seq = rows[-1][0]
+            return len(rows)
+        finally:
+            self._sync_lock.release()
+
+    def ensure_loaded(self) -> None:
+        """Load on first use, then sync at most once per ``sync_interval``"""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.load()
+        elif time.monotonic() - self._checked_at >= self.sync_interval:
+            self.sync()
+
+    def add(self, booking_id: int, lab_id: str, start, end) -> None:
+        lab_id, start, end = str(lab_id), to_datetime(start), to_datetime(end)
+        with self._lock:
+            self.remove(booking_id)
+            self._labs.setdefault(lab_id, IntervalSet()).add(booking_id, start, end)
+            self._bookings[booking_id] = (lab_id, start, end)
+            self.version += 1
+
+    def remove(self, booking_id: int) -> None:
+        with self._lock:
+            entry = self._bookings.pop(booking_id, None)
+            if entry:
+                lab_id, start, _ = entry
+                self._labs[lab_id].remove(booking_id, start)
+                self.version += 1
+
+    def sync_booking(self, booking_id: int) -> None:
+        """Re-read one booking and add or drop it according to its status"""
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT labID, start_ts, end_ts, status
+                FROM lab_bookings
+                WHERE bookingID = ?
+            """, (booking_id,))
+            row = cursor.fetchone()
+        if row and row[3] == 'approved':
+            self.add(booking_id, str(row[0]), row[1], row[2])
+        else:
+            self.remove(booking_id)
+
+    def conflicts(self, lab_id: str, start: datetime, end: datetime) -> List[int]:
+        """IDs of approved bookings of ``lab_id`` overlapping [start, end)"""
+        self.ensure_loaded()
+        with self._lock:
+            intervals = self._labs.get(str(lab_id))
+            return intervals.overlapping(start, end) if intervals else []
+
+    def is_free(self, lab_id: str, start: datetime, end: datetime) -> bool:
+        return not self.conflicts(lab_id, start, end)
+
+    def intervals_between(self, lab_id: str, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """Approved (start, end) pairs of a lab overlapping [start, end), sorted by start"""
+        self.ensure_loaded()
+        with self._lock:
+            intervals = self._labs.get(str(lab_id))
+            return intervals.window(start, end) if intervals else []
+
+    def state_at(self, lab_id: str, moment: datetime) -> Tuple[Optional[int], Optional[datetime]]:
+        """(approved booking in progress at ``moment`` or None, next start/end after it)"""
+        self.ensure_loaded()
+        with self._lock:
+            intervals = self._labs.get(str(lab_id))
+            return intervals.state_at(moment) if intervals else (None, None)
+
+    def verify(self, repair: bool = False) -> Dict[str, List[int]]:
+        """Compare the index with lab_bookings.
+
+        Returns booking IDs that are missing from the index, present but no
+        longer approved, or stored with different lab/times. With
+        ``repair=True`` the index is rebuilt when any difference is found.
+        """
+        self.ensure_loaded()
+        _, expected = self._fetch_approved()
+        with self._lock:
+            actual = dict(self._bookings)
+        report = {
+            'missing': sorted(set(expected) - set(actual)),
+            'extra': sorted(set(actual) - set(expected)),
+            'mismatched': sorted(booking_id for booking_id in set(expected) & set(actual)
+                                 if expected[booking_id] != actual[booking_id]),
+        }
+        if any(report.values()):
+            logging.warning(f"Booking index out of sync with database: {report}")
+            if repair:
+                self.load()
+        return report
+
+
+booking_index = BookingIntervalIndex()
@@ -0,0 +1,174 @@
+import json
+import time
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from .database import get_connection
+from .equipment_management import MAINTENANCE_QUEUE_POLICY, _queue_params
+from .summary import Summary, summary_from_rows
+from .timestamps import now_epoch
+
+DASHBOARD_LIST_SIZE = 5
+
+# Each section is one SELECT of (section, JSON object) rows, so a dashboard
+# is a single UNION ALL statement over the sections the user's permissions
+# call for. Parameters are named and shared: :user_id, :now, :limit.
+SECTIONS: Dict[str, Tuple[str, str]] = {
+    'active_booking': ('access_lab', """
+        SELECT 'active_booking', json_object('booking_id', bookingID, 'lab_id', labID)
+        FROM lab_bookings
+        WHERE userID = :user_id
+        AND status = 'approved'
+        AND start_ts <= :now
+        AND end_ts >= :now
+    """),
+    'upcoming_bookings': ('book_lab', """
+        SELECT 'upcoming_bookings', json_object(
+            'bookingID', bookingID, 'labID', labID, 'start_ts', start_ts,
+            'end_ts', end_ts, 'status', status)
+        FROM (
+            SELECT * FROM lab_bookings
+            WHERE userID = :user_id
+            AND start_ts > :now
+            AND status <> 'rejected'
+            ORDER BY start_ts
+            LIMIT :limit
+        )
+    """),
+    'pending_approvals': ('assign_lab', """
+        SELECT 'pending_approvals', json_object(
+            'bookingID', bookingID, 'userID', userID, 'labID', labID,
+            'start_ts', start_ts, 'end_ts', end_ts)
+        FROM (
+            SELECT * FROM lab_bookings
+            WHERE start_ts > :now
+            AND status = 'pending'
+            ORDER BY start_ts
+            LIMIT :limit
+        )
+    """),
+    'open_tasks': ('maintain_equipment', """
+        SELECT 'open_tasks', json_object(
+            'issueID', issueID, 'equipID', equipID, 'equipType', equipType,
+            'issue', issue, 'claimed_by', claimed_by, 'claim_state', claim_state,
+            'priority', priority)
+        FROM ({queue})
+    """),
+    'inventory_requests': ('request_equipment', """
+        SELECT 'inventory_requests', json_object(
+            'type', type, 'id', id, 'equipment_type', equipment_type,
+            'quantity', quantity, 'status', status)
+        FROM (
+            SELECT * FROM (
+                SELECT 'request' as type, request_id as id, equipment_type, quantity, request_date, status
+                FROM inventory_requests
+                WHERE status = 'pending'
+            )
+            UNION ALL
+            SELECT * FROM (
+                SELECT 'purchase' as type, purchase_id as id, equipment_type, quantity, request_date, status
+                FROM purchase_requests
+                WHERE status = 'pending'
+            )
+            ORDER BY request_date DESC
+            LIMIT :limit
+        )
+    """),
+    'summary': ('check_equipment', """
+        SELECT 'summary', json_array(name, key, count)
+        FROM summary_counters
+        WHERE count <> 0
+    """),
+}
+
+
+@dataclass
+class DashboardData:
+    """What one user's dashboard shows; list entries are plain dicts"""
+    active_booking: Optional[Dict] = None
+    upcoming_bookings: List[Dict] = field(default_factory=list)
+    pending_approvals: List[Dict] = field(default_factory=list)
+    open_tasks: List[Dict] = field(default_factory=list)
+    inventory_requests: List[Dict] = field(default_factory=list)
+    summary: Optional[Summary] = None
+
+
+def _dashboard_query(sections: Iterable[str]) -> Tuple[str, Dict]:
+    """SQL and parameters of one read covering ``sections``"""
+    params = {'now': now_epoch(), 'limit': DASHBOARD_LIST_SIZE}
+    selects = []
+    for name in sections:
+        sql = SECTIONS[name][1]
+        if name == 'open_tasks':
+            queue, queue_params = _queue_params(MAINTENANCE_QUEUE_POLICY, True, DASHBOARD_LIST_SIZE)
+            params.update(queue_params)
+            sql = sql.format(queue=queue)
+        selects.append(sql)
+    return '\nUNION ALL\n'.join(selects), params
+
+
+class DashboardLoader:
+    """Loads dashboards in one statement and memoises them per user.
+
+    Entries live for ``ttl`` seconds; ``clear()`` drops them all and is
+    called after every write request of this process, so a user sees their
+    own changes straight away and other users' within ``ttl``.
+    """
+
+    def __init__(self, ttl: float = 5.0, max_entries: int = 1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._memo: Dict[Tuple[str, FrozenSet[str]], Tuple[float, DashboardData]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, user_id, permissions: Iterable[str]) -> DashboardData:
+        permissions = frozenset(permissions)
+        key = (str(user_id), permissions)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._memo.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+
+        data = self._fetch(user_id, [name for name, (permission, _) in SECTIONS.items()
+                                     if permission in permissions])
+        with self._lock:
+            if len(self._memo) >= self.max_entries:
+                self._memo = {k: v for k, v in self._memo.items() if v[0] > now}
+            self._memo[key] = (now + self.ttl, data)
+        return data
+
+    @staticmethod
+    def _fetch(user_id, sections: List[str]) -> DashboardData:
+        data = DashboardData()
+        if not sections:
+            return data
+        query, params = _dashboard_query(sections)
+        params['user_id'] = user_id
+        try:
+            with get_connection() as conn:
+                rows = conn.execute(query, params).fetchall()
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return data
+        counters = []
+        for section, payload in rows:
+            value = json.loads(payload)
+            if section == 'active_booking':
+                data.active_booking = value
+            elif section == 'summary':
+                counters.append(value)
+            else:
+                getattr(data, section).append(value)
+        if 'summary' in sections:
+            data.summary = summary_from_rows(counters)
+        return data
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memo.clear()
+
+
+dashboard_loader = DashboardLoader()
@@ -0,0 +1,80 @@
+import sqlite3
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from .database import get_connection
+
+# Pages and API responses depend on groups of tables; a write to any table
+# of a group moves that group's version. PRAGMA data_version cannot be used
+# for this: it is per connection and ignores the connection's own writes,
+# so it means nothing across a connection pool or several processes.
+TABLE_GROUPS: Dict[str, Tuple[str, ...]] = {
+    'labs': ('labs', 'lab_bookings'),
+    'equipment': ('equipment',),
+    'maintenance': ('equipment_issues', 'equipment'),
+    'inventory': ('inventory_requests', 'purchase_requests'),
+}
+
+
+def _groups_by_table() -> Dict[str, Tuple[str, ...]]:
+    tables: Dict[str, Tuple[str, ...]] = {}
+    for group, group_tables in TABLE_GROUPS.items():
+        for table in group_tables:
+            tables[table] = tables.get(table, ()) + (group,)
+    return tables
+
+
+def install(conn: sqlite3.Connection) -> None:
+    """Create data_versions and the triggers that bump it"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            changed_at INTEGER
+        ) WITHOUT ROWID
+    """)
+    conn.executemany("""
+        INSERT OR IGNORE INTO data_versions (name, version, changed_at)
+        VALUES (?, 0, CAST(strftime('%s', 'now') AS INTEGER))
+    """, [(group,) for group in TABLE_GROUPS])
+    for table, groups in _groups_by_table().items():
+        names = ', '.join(f"'{group}'" for group in groups)
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            trigger = f"trg_data_version_{table}_{event.lower()}"
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            # changed_at is real Unix time (UTC), as HTTP Last-Modified needs
+            conn.execute(f"""
+                CREATE TRIGGER {trigger} AFTER {event} ON {table}
+                BEGIN
+                    UPDATE data_versions
+                    SET version = version + 1,
+                        changed_at = CAST(strftime('%s', 'now') AS INTEGER)
+                    WHERE name IN ({names});
+                END
+            """)
+
+
+@dataclass(frozen=True)
+class DataVersion:
+    """Combined version of some table groups"""
+    token: str  # changes whenever any of the groups changes; '' if unreadable
+    changed_at: Optional[int]  # Unix time of the latest change
+
+
+def data_version(*groups: str) -> DataVersion:
+    """Current version of ``groups``; one primary-key read of a tiny table"""
+    placeholders = ','.join('?' * len(groups))
+    try:
+        with get_connection() as conn:
+            rows = conn.execute(f"""
+                SELECT name, version, changed_at
+                FROM data_versions
+                WHERE name IN ({placeholders})
+                ORDER BY name
+            """, groups).fetchall()
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+        return DataVersion(token='', changed_at=None)
+    token = hashlib.sha1(repr([row[:2] for row in rows]).encode()).hexdigest()[:16]
+    return DataVersion(token=token, changed_at=max((row[2] or 0 for row in rows), default=None))
@@ -0,0 +1,324 @@
+import os
+import sqlite3
+import threading
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Optional, Dict, Iterator, Union
+
+DATABASE_PATH = os.environ.get('LAB_DB_PATH', 'lab_management.db')
+STORAGE_PROFILE = os.environ.get('LAB_DB_PROFILE', 'throughput')
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes free within the pool timeout"""
+    pass
+
+
+@dataclass(frozen=True)
+class StorageProfile:
+    """PRAGMA settings applied to every pooled connection"""
+    journal_mode: str = 'wal'
+    synchronous: str = 'normal'
+    mmap_size: int = 0
+    cache_size: int = -2000  # negative values are KiB, positive values are pages
+    temp_store: str = 'default'
+    busy_timeout: int = 5000  # milliseconds
+    wal_autocheckpoint: int = 1000  # pages
+
+    def apply(self, conn: sqlite3.Connection) -> None:
+        # busy_timeout goes first so the journal_mode switch waits for locks
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout)}")
+        conn.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = {int(self.cache_size)}")
+        conn.execute(f"PRAGMA temp_store = {self.temp_store}")
+        conn.execute(f"PRAGMA wal_autocheckpoint = {int(self.wal_autocheckpoint)}")
+
+
+@dataclass(frozen=True)
+class CheckpointPolicy:
+    """Run a WAL checkpoint from a released connection every ``interval`` seconds.
+
+    PASSIVE never blocks readers or writers; the WAL is truncated when the
+    pool is closed.
+    """
+    interval: float = 60.0
+    mode: str = 'PASSIVE'
+
+
+STORAGE_PROFILES: Dict[str, StorageProfile] = {
+    # WAL lets readers proceed while a writer commits; synchronous=NORMAL
+    # only syncs at checkpoints, which may lose the last commits on power loss.
+    'throughput': StorageProfile(
+        journal_mode='wal',
+        synchronous='normal',
+        mmap_size=256 * 1024 * 1024,
+        cache_size=-64000,
+        temp_store='memory',
+        busy_timeout=5000,
+    ),
+    # Still WAL for concurrency, but every commit is fsynced.
+    'durability': StorageProfile(
+        journal_mode='wal',
+        synchronous='full',
+        mmap_size=0,
+        cache_size=-16000,
+        temp_store='default',
+        busy_timeout=10000,
+    ),
+}
+
+
+def get_storage_profile(name: str) -> StorageProfile:
+    """Look up a named storage profile"""
+    try:
+        return STORAGE_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown storage profile: {name}") from None
+
+
+@dataclass
+class PoolMetrics:
+    created: int = 0
+    reused: int = 0
+    checkouts: int = 0
+    nested_checkouts: int = 0
+    waits: int = 0
+    timeouts: int = 0
+    health_checks: int = 0
+    health_check_failures: int = 0
+    discarded: int = 0
+    checkpoints: int = 0
+
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections shared by all manager classes.
+
+    A thread keeps the connection it checked out for as long as it holds it,
+    so nested calls (a manager method calling another) reuse one connection
+    and only the outermost block commits or rolls back.
+    """
+
+    def __init__(self, database: str = DATABASE_PATH, max_size: int = 8,
+                 timeout: float = 5.0, health_check_interval: float = 30.0,
+                 profile: Union[StorageProfile, str, None] = None,
+                 checkpoint_policy: Optional[CheckpointPolicy] = CheckpointPolicy()):
+        self.database = database
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        if isinstance(profile, str) or profile is None:
+            profile = get_storage_profile(profile or STORAGE_PROFILE)
+        self.profile = profile
+        self.checkpoint_policy = checkpoint_policy
+        self._last_checkpoint = time.monotonic()
+        self._idle = deque()  # (connection, last_used)
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._metrics = PoolMetrics()
+
+    def _count(self, metric: str) -> None:
+        # Checkouts run on many threads; += on a shared counter is not atomic
+        with self._cond:
+            setattr(self._metrics, metric, getattr(self._metrics, metric) + 1)
+
+    def _create_connection(self) -> sqlite3.Connection:
+        # Connections move between threads through the pool, but only one
+        # thread uses a connection at a time.
+        conn = sqlite3.connect(self.database, check_same_thread=False,
+                               timeout=self.profile.busy_timeout / 1000)
+        try:
+            self.profile.apply(conn)
+        except sqlite3.Error:
+            conn.close()
+            raise
+        self._count('created')
+        return conn
+
+    def _maybe_checkpoint(self, conn: sqlite3.Connection) -> None:
+        policy = self.checkpoint_policy
+        if policy is None or self.profile.journal_mode.lower() != 'wal':
+            return
+        now = time.monotonic()
+        with self._cond:
+            if now - self._last_checkpoint < policy.interval:
+                return
+            self._last_checkpoint = now
+        try:
+            conn.execute(f"PRAGMA wal_checkpoint({policy.mode})").fetchone()
+            self._count('checkpoints')
+        except sqlite3.Error as e:
+            logging.warning(f"WAL checkpoint failed: {e}")
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        self._count('health_checks')
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            self._count('health_check_failures')
+            return False
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._metrics.discarded += 1
+            self._cond.notify()
+
+    def _acquire(self) -> sqlite3.Connection:
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Connection pool is closed")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._metrics.timeouts += 1
+                    raise PoolTimeoutError(
+                        f"No database connection available after {self.timeout}s")
+                self._metrics.waits += 1
+                self._cond.wait(remaining)
+
+        if conn is None:
+            try:
+                return self._create_connection()
+            except sqlite3.Error:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+
+        if time.monotonic() - last_used > self.health_check_interval and not self._is_healthy(conn):
+            self._discard(conn)
+            return self._acquire()
+
+        self._count('reused')
+        return conn
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        self._maybe_checkpoint(conn)
+        with self._cond:
+            if self._closed:
+                conn.close()
+                self._size -= 1
+                return
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a connection; commits on success and rolls back on error,
+        like ``with sqlite3.connect(...) as conn``."""
+        local = self._local
+        conn = getattr(local, 'conn', None)
+        if conn is not None:
+            local.depth += 1
+            self._count('nested_checkouts')
+            try:
+                yield conn
+            finally:
+                local.depth -= 1
+            return
+
+        conn = self._acquire()
+        self._count('checkouts')
+        local.conn, local.depth = conn, 1
+        try:
+            with conn:
+                yield conn
+        finally:
+            local.conn, local.depth = None, 0
+            self._release(conn)
+
+    def metrics(self) -> Dict[str, int]:
+        """Current pool counters plus size/in-use gauges"""
+        with self._cond:
+            snapshot = asdict(self._metrics)
+            snapshot['size'] = self._size
+            snapshot['idle'] = len(self._idle)
+            snapshot['in_use'] = self._size - len(self._idle)
+            snapshot['max_size'] = self.max_size
+        return snapshot
+
+    def close(self) -> None:
+        """Close idle connections; checked-out ones are closed on release"""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for i, conn in enumerate(idle):
+            if i == 0 and self.profile.journal_mode.lower() == 'wal':
+                try:
+                    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+                except sqlite3.Error as e:
+                    logging.warning(f"WAL checkpoint on close failed: {e}")
+            conn.close()
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def configure_pool(**kwargs) -> ConnectionPool:
+    """Replace the process-wide pool (e.g. to point at another database file)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = ConnectionPool(**kwargs)
+        logging.info(f"Database pool configured: {kwargs}")
+    return _pool
+
+
+def get_connection():
+    """Shortcut for ``get_pool().connection()``"""
+    return get_pool().connection()
+
+
+@contextmanager
+def transaction(mode: str = 'IMMEDIATE') -> Iterator[sqlite3.Connection]:
+    """Run a block in one explicit transaction on a pooled connection.
+
+    IMMEDIATE takes the write lock up front, so a check-then-write sequence
+    cannot interleave with another writer. Joins the caller's transaction
+    when one is already open on this thread's connection.
+    """
+    with get_connection() as conn:
+        if not conn.in_transaction:
+            conn.execute(f"BEGIN {mode}")
+        yield conn
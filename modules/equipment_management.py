@@ -1,11 +1,339 @@
-from datetime import datetime
-from typing import Optional, List, Dict
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Iterable, Tuple, Union
+import csv
+import json
 import sqlite3
+import logging
 from dataclasses import dataclass
 
+from .database import get_connection, transaction
+from .records import Record, record_cursor
+from .error_handling import InventoryServiceError, ValidationError
+from .inventory_client import check_availability
+from .timestamps import format_datetime, now_epoch, to_epoch
+from .pagination import Page, clamp_limit, decode_cursor, make_page, MAX_TIMESTAMP, MAX_ID
+
+# Hot-path query; migrations.verify_query_plans() checks its index use.
+OPEN_ISSUES_QUERY = """
+    SELECT 
+        ei.issueID,
+        e.equipID,
+        e.equipType,
+        ei.description as issue,
+        ei.report_date,
+        e.status
+    FROM equipment_issues ei
+    JOIN equipment e ON ei.equipID = e.equipID
+    WHERE ei.resolved_date IS NULL
+    ORDER BY ei.report_date DESC
+"""
+
+# Open issues ranked for the maintenance queue; {type_weight} is filled in
+# by _queue_params from the QueuePolicy. A claim whose lease has run out
+# counts as available again. CROSS JOIN keeps equipment_issues as the outer
+# loop so the partial idx_equipment_issues_open index drives the query
+# instead of a scan of equipment.
+MAINTENANCE_QUEUE_QUERY = """
+    SELECT
+        *,
+        type_weight
+            + age_days * :weight_per_day
+            + repeat_failures * :weight_per_repeat AS priority
+    FROM (
+        SELECT
+            ei.issueID,
+            e.equipID,
+            e.equipType,
+            ei.description as issue,
+            ei.report_date,
+            e.status,
+            ei.claimed_by,
+            ei.claim_expires,
+            CASE
+                WHEN ei.claimed_by IS NOT NULL AND ei.claim_expires > :now THEN 'claimed'
+                ELSE 'available'
+            END as claim_state,
+            julianday('now') - julianday(ei.report_date) as age_days,
+            (
+                SELECT COUNT(*)
+                FROM equipment_issues past
+                WHERE past.equipID = ei.equipID
+                AND past.report_date >= datetime('now', :repeat_window)
+                AND past.issueID <> ei.issueID
+            ) as repeat_failures,
+            {type_weight} as type_weight
+        FROM equipment_issues ei
+        CROSS JOIN equipment e ON ei.equipID = e.equipID
+        WHERE ei.resolved_date IS NULL
+    )
+    WHERE :include_claimed OR claim_state = 'available'
+    ORDER BY priority DESC, report_date, issueID
+    LIMIT :limit
+"""
+
+CLAIM_TASK_QUERY = """
+    UPDATE equipment_issues
+    SET claimed_by = :staff_id,
+        claim_expires = :expires
+    WHERE issueID = :issue_id
+    AND resolved_date IS NULL
+    AND (claimed_by IS NULL OR claimed_by = :staff_id OR claim_expires <= :now)
+"""
+
+# Issue listings page by keyset on (report_date, issueID), newest first
+MAINTENANCE_HISTORY_QUERY = """
+    SELECT 
+        ei.issueID,
+        e.equipID,
+        e.equipType,
+        ei.description as issue,
+        ei.report_date,
+        ei.resolved_date,
+        ei.resolution,
+        e.status,
+        CASE 
+            WHEN ei.resolved_date IS NOT NULL THEN 'Resolved'
+            ELSE 'Pending'
+        END as maintenance_status
+    FROM equipment_issues ei
+    JOIN equipment e ON ei.equipID = e.equipID
+    WHERE (ei.report_date, ei.issueID) < (?, ?)
+    ORDER BY ei.report_date DESC, ei.issueID DESC
+    LIMIT ?
+"""
+
+
+@dataclass(frozen=True)
+class RequestSource:
+    table: str
+    id_column: str
+    ready_status: str  # status in which its equipment can be added
+    done_status: str  # status once it has been
+
+
+# Inventory and purchase requests have separate ID sequences, so a request
+# is only identified by its source together with its ID
+REQUEST_SOURCES = {
+    'inventory': RequestSource('inventory_requests', 'request_id', 'pending', 'completed'),
+    'purchase': RequestSource('purchase_requests', 'purchase_id', 'delivered', 'provisioned'),
+}
+
+# Purchase lifecycle: pending -> approved -> ordered -> delivered -> provisioned,
+# with the statuses each one may move to. Provisioning adds the equipment, so
+# it only happens through provision_requests or reconcile_deliveries.
+PURCHASE_TRANSITIONS: Dict[str, Tuple[str, ...]] = {
+    'pending': ('approved', 'rejected'),
+    'approved': ('ordered', 'rejected'),
+    'ordered': ('delivered',),
+    'delivered': ('provisioned',),
+}
+
+# Column recording when a purchase reached a status
+PURCHASE_STATUS_DATES = {
+    'approved': 'approval_date',
+    'ordered': 'order_date',
+    'delivered': 'delivery_date',
+    'provisioned': 'provisioned_date',
+}
+
+# Supplier manifest lines (a JSON array of [purchase_id, equipment_type,
+# quantity]) against purchase_requests in one pass; reason is NULL for a
+# line that matches an ordered purchase exactly
+MANIFEST_MATCH_QUERY = """
+    WITH manifest AS (
+        SELECT
+            key AS line,
+            json_extract(value, '$[0]') AS purchase_id,
+            json_extract(value, '$[1]') AS equipment_type,
+            json_extract(value, '$[2]') AS quantity
+        FROM json_each(:manifest)
+    )
+    SELECT
+        m.line,
+        CASE
+            WHEN ROW_NUMBER() OVER (PARTITION BY m.purchase_id ORDER BY m.line) > 1
+                THEN 'duplicate line'
+            WHEN p.purchase_id IS NULL THEN 'unknown purchase'
+            WHEN p.status <> 'ordered' THEN 'purchase is ' || p.status
+            WHEN p.equipment_type <> m.equipment_type COLLATE NOCASE OR p.quantity <> m.quantity
+                THEN 'ordered ' || p.quantity || ' x ' || p.equipment_type
+        END AS reason,
+        p.equipment_type
+    FROM manifest m
+    LEFT JOIN purchase_requests p ON p.purchase_id = m.purchase_id
+    ORDER BY m.line
+"""
+
+# Inserts the equipment of many matched lines (a JSON array of
+# [equipment_type, quantity]) in one statement, line by line, so each line
+# gets a consecutive block of IDs
+PROVISION_LINES_QUERY = """
+    WITH RECURSIVE
+    lines(line, equipment_type, quantity) AS (
+        SELECT key, json_extract(value, '$[0]'), json_extract(value, '$[1]')
+        FROM json_each(?)
+    ),
+    units(line, n) AS (
+        SELECT line, 1 FROM lines WHERE quantity >= 1
+        UNION ALL
+        SELECT units.line, units.n + 1
+        FROM units JOIN lines ON lines.line = units.line
+        WHERE units.n < lines.quantity
+    )
+    INSERT INTO equipment (equipType, status, last_checked)
+    SELECT lines.equipment_type, 'operational', datetime('now')
+    FROM units JOIN lines ON lines.line = units.line
+    ORDER BY units.line, units.n
+"""
+
+# Inserts ? equipment rows of one type in a single statement
+PROVISION_EQUIPMENT_QUERY = """
+    WITH RECURSIVE seq(n) AS (
+        SELECT 1
+        UNION ALL
+        SELECT n + 1 FROM seq WHERE n < ?
+    )
+    INSERT INTO equipment (equipType, status, last_checked)
+    SELECT ?, 'operational', datetime('now') FROM seq
+"""
+
+
+@dataclass(frozen=True)
+class RequestRef:
+    """Source-qualified request ID, written as 'inventory:12' or 'purchase:7'"""
+    source: str
+    request_id: int
+
+    def __post_init__(self):
+        if self.source not in REQUEST_SOURCES:
+            raise ValidationError(f"Unknown request source: {self.source}", 'INVALID_REQUEST_SOURCE')
+
+    @classmethod
+    def parse(cls, value: Union[str, 'RequestRef']) -> 'RequestRef':
+        if isinstance(value, RequestRef):
+            return value
+        source, _, request_id = str(value).partition(':')
+        try:
+            return cls(source, int(request_id))
+        except ValueError:
+            raise ValidationError(f"Invalid request reference: {value}", 'INVALID_REQUEST_REF') from None
+
+    def __str__(self) -> str:
+        return f"{self.source}:{self.request_id}"
+
+
+@dataclass
+class ProvisionResult:
+    """Outcome of provisioning one request; ``equipment_ids`` is empty when
+    the request was not found or no longer pending"""
+    request: RequestRef
+    equipment_type: Optional[str] = None
+    equipment_ids: range = range(0)
+
+    @property
+    def provisioned(self) -> bool:
+        return self.equipment_type is not None
+
+
+@dataclass(frozen=True)
+class ManifestLine:
+    """One line of a supplier delivery manifest"""
+    purchase_id: int
+    equipment_type: str
+    quantity: int
+
+
+@dataclass
+class ReconcileResult:
+    """Outcome of one manifest line; ``reason`` explains a line that did not
+    match, ``equipment_ids`` are the items added for one that did"""
+    line: ManifestLine
+    reason: Optional[str] = None
+    equipment_type: Optional[str] = None  # as the purchase names it
+    equipment_ids: range = range(0)
+
+    @property
+    def matched(self) -> bool:
+        return self.reason is None
+
+
+def read_manifest(lines: Iterable[str]) -> List[ManifestLine]:
+    """Parse a CSV manifest with purchase_id, equipment_type and quantity
+    columns (a header row is required)"""
+    manifest = []
+    reader = csv.DictReader(lines)
+    missing = {'purchase_id', 'equipment_type', 'quantity'} - set(reader.fieldnames or ())
+    if missing:
+        raise ValidationError(f"Manifest is missing columns: {', '.join(sorted(missing))}",
+                              'INVALID_MANIFEST')
+    for row in reader:
+        try:
+            line = ManifestLine(int(row['purchase_id']), row['equipment_type'].strip(), int(row['quantity']))
+        except (TypeError, ValueError, AttributeError):
+            raise ValidationError(f"Invalid manifest line {reader.line_num}", 'INVALID_MANIFEST') from None
+        if line.quantity < 1 or not line.equipment_type:
+            raise ValidationError(f"Invalid manifest line {reader.line_num}", 'INVALID_MANIFEST')
+        manifest.append(line)
+    return manifest
+
+
+@dataclass(frozen=True)
+class QueuePolicy:
+    """How the maintenance queue ranks open issues and how long a claim lasts.
+
+    Priority is the equipment type's weight, plus ``weight_per_day`` for
+    every day the issue has been open, plus ``weight_per_repeat`` for every
+    other issue of the same item within ``repeat_window_days``.
+    """
+    type_weights: Tuple[Tuple[str, int], ...] = (
+        ('Server', 40),
+        ('Network', 35),
+        ('Projector', 25),
+        ('Computer', 20),
+        ('Printer', 10),
+    )
+    default_type_weight: int = 15
+    weight_per_day: float = 2.0
+    weight_per_repeat: int = 10
+    repeat_window_days: int = 90
+    lease: timedelta = timedelta(hours=2)
+
+
+MAINTENANCE_QUEUE_POLICY = QueuePolicy()
+MAX_QUEUE_SIZE = 500
+
+
+def _queue_params(policy: QueuePolicy, include_claimed: bool, limit: int) -> Tuple[str, Dict]:
+    """SQL and parameters of MAINTENANCE_QUEUE_QUERY for ``policy``"""
+    params = {
+        'now': now_epoch(),
+        'weight_per_day': policy.weight_per_day,
+        'weight_per_repeat': policy.weight_per_repeat,
+        'repeat_window': f'-{policy.repeat_window_days} days',
+        'include_claimed': include_claimed,
+        'limit': limit,
+        'default_type_weight': policy.default_type_weight,
+    }
+    cases = []
+    for index, (equip_type, weight) in enumerate(policy.type_weights):
+        params[f'type{index}'] = equip_type
+        params[f'weight{index}'] = weight
+        cases.append(f"WHEN :type{index} THEN :weight{index}")
+    type_weight = f"CASE e.equipType {' '.join(cases)} ELSE :default_type_weight END"
+    return MAINTENANCE_QUEUE_QUERY.format(type_weight=type_weight), params
+
+
+@dataclass
+class BatchItemResult:
+    """Per-item outcome of a batch operation; ``reason`` explains a failure"""
+    item_id: int
+    ok: bool = False
+    reason: Optional[str] = None
+
 
 @dataclass
 class Equipment:
+    __slots__ = ('equip_id', 'equip_type', 'status', 'last_checked')
     equip_id: int
     equip_type: str
     status: str
@@ -17,7 +345,7 @@ class EquipmentManagement:
     def add_equipment(equip_type: str) -> Optional[int]:
         """Add new equipment to the system"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
+            with get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     INSERT INTO equipment (equipType, status, last_checked)
@@ -31,7 +359,7 @@ class EquipmentManagement:
     def request_equipment(user_id: int, equip_id: int) -> bool:
         """Request to use equipment"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
+            with get_connection() as conn:
                 cursor = conn.cursor()
                 # Check if equipment is available
                 cursor.execute("""
@@ -54,7 +382,7 @@ class EquipmentManagement:
     def approve_equipment_request(request_id: int) -> bool:
         """Approve an equipment request"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
+            with get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     UPDATE equipment_requests
@@ -69,7 +397,7 @@ class EquipmentManagement:
     def return_equipment(equip_id: int) -> bool:
         """Mark equipment as returned"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
+            with get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     UPDATE equipment
@@ -81,11 +409,11 @@ class EquipmentManagement:
             return False
 
     @staticmethod
-    def get_equipment_history(equip_id: int) -> List[Dict]:
+    def get_equipment_history(equip_id: int) -> List[Record]:
         """Get usage history for specific equipment"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
+            with get_connection() as conn:
+                cursor = record_cursor(conn)
                 cursor.execute("""
                     SELECT er.*, u.name as user_name
                     FROM equipment_requests er
@@ -93,102 +421,139 @@ class EquipmentManagement:
                     WHERE er.equipID = ?
                     ORDER BY er.request_date DESC
                 """, (equip_id,))
-                columns = [desc[0] for desc in cursor.description]
-                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+                return cursor.fetchall()
         except sqlite3.Error:
             return []
 
     @staticmethod
     def schedule_maintenance(equip_id: int, maintenance_date: datetime) -> bool:
-        """Schedule maintenance for equipment"""
+        """Schedule maintenance for equipment; the maintenance scheduler opens
+        an issue for it when it falls due"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
+            with get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    INSERT INTO maintenance_schedule (equipID, scheduled_date, status)
-                    VALUES (?, ?, 'scheduled')
-                """, (equip_id, maintenance_date))
+                    INSERT INTO maintenance_schedule (equipID, scheduled_date, due_ts, status)
+                    VALUES (?, ?, ?, 'scheduled')
+                """, (equip_id, format_datetime(maintenance_date), to_epoch(maintenance_date)))
                 return True
         except sqlite3.Error:
             return False
 
 
     @staticmethod
-    def get_all_equipment() -> List[Dict]:
-        """Retrieve all equipment with their status"""
+    def get_all_equipment(limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+        """One page of equipment with their status, by equipment ID"""
+        limit = clamp_limit(limit)
+        after_id, = decode_cursor(cursor, (0,))
         try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM equipment")
-                rows = cursor.fetchall()  # Get rows once
-                columns = [desc[0] for desc in cursor.description]
-                return [dict(zip(columns, row)) for row in rows]  # Use stored rows
+            with get_connection() as conn:
+                db_cursor = record_cursor(conn)
+                db_cursor.execute("""
+                    SELECT * FROM equipment
+                    WHERE equipID > ?
+                    ORDER BY equipID
+                    LIMIT ?
+                """, (after_id, limit + 1))
+                rows = db_cursor.fetchall()
+            return make_page(rows, limit, lambda row: (row['equipID'],))
         except sqlite3.Error as e:
             print(f"Database error: {e}")
-            return []
+            return Page(limit=limit)
 
     @staticmethod
-    def report_issue(equip_id: int, description: str, reported_by: int) -> bool:
-        """Report equipment issue and update status"""
+    def get_equipment(equip_ids: Iterable[int]) -> List[Record]:
+        """Equipment with the given IDs, by equipment ID; unknown IDs are left out"""
+        equip_ids = list(dict.fromkeys(equip_ids))
+        if not equip_ids:
+            return []
+        placeholders = ','.join('?' * len(equip_ids))
         try:
-            print(f"Attempting to insert issue:")  # Debug prints
-            print(f"Equipment ID: {equip_id}")
-            print(f"Description: {description}")
-            print(f"Reported by: {reported_by}")
+            with get_connection() as conn:
+                db_cursor = record_cursor(conn)
+                db_cursor.execute(f"""
+                    SELECT * FROM equipment
+                    WHERE equipID IN ({placeholders})
+                    ORDER BY equipID
+                """, equip_ids)
+                return db_cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return []
 
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
-                # Create issue record
-                cursor.execute("""
-                    INSERT INTO equipment_issues 
+    @staticmethod
+    def _equipment_status(conn: sqlite3.Connection, equip_ids: List[int]) -> Dict[int, str]:
+        placeholders = ','.join('?' * len(equip_ids))
+        return dict(conn.execute(
+            f"SELECT equipID, status FROM equipment WHERE equipID IN ({placeholders})", equip_ids))
+
+    @staticmethod
+    def report_issue_batch(equip_ids: Iterable[int], description: str,
+                           reported_by: int) -> List[BatchItemResult]:
+        """Report the same issue on many items (e.g. after a power surge) in
+        one transaction; removed or unknown equipment is skipped"""
+        results = [BatchItemResult(equip_id) for equip_id in dict.fromkeys(equip_ids)]
+        if not results:
+            return results
+        try:
+            with transaction() as conn:
+                status = EquipmentManagement._equipment_status(conn, [r.item_id for r in results])
+                for result in results:
+                    if result.item_id not in status:
+                        result.reason = 'not found'
+                    elif status[result.item_id] == 'removed':
+                        result.reason = 'removed'
+                    else:
+                        result.ok = True
+                reported = [(result.item_id,) for result in results if result.ok]
+                conn.executemany("""
+                    INSERT INTO equipment_issues
                     (equipID, description, reported_by, report_date)
                     VALUES (?, ?, ?, datetime('now'))
-                """, (equip_id, description, reported_by))
-
-                # Update equipment status
-                cursor.execute("""
-                    UPDATE equipment 
+                """, [(equip_id, description, reported_by) for equip_id, in reported])
+                conn.executemany("""
+                    UPDATE equipment
                     SET status = 'maintenance_required',
                         last_checked = datetime('now')
                     WHERE equipID = ?
-                """, (equip_id,))
-
-                conn.commit()  # Make sure to commit changes
-                return True
+                """, reported)
         except sqlite3.Error as e:
-            print(f"Database error: {e}")  # Print specific error
-            return False
+            print(f"Database error: {e}")
+            return [BatchItemResult(result.item_id, reason='database error') for result in results]
+        return results
 
     @staticmethod
-    def get_reported_issues() -> List[Dict]:
+    def report_issue(equip_id: int, description: str, reported_by: int) -> bool:
+        """Report equipment issue and update status"""
+        result, = EquipmentManagement.report_issue_batch([equip_id], description, reported_by)
+        return result.ok
+
+    @staticmethod
+    def get_reported_issues() -> List[Record]:
         """Get all reported and unresolved issues"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT 
-                        ei.issueID,
-                        e.equipID,
-                        e.equipType,
-                        ei.description as issue,
-                        ei.report_date,
-                        e.status
-                    FROM equipment_issues ei
-                    JOIN equipment e ON ei.equipID = e.equipID
-                    WHERE ei.resolved_date IS NULL
-                    ORDER BY ei.report_date DESC
-                """)
-                columns = [desc[0] for desc in cursor.description]
-                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            with get_connection() as conn:
+                cursor = record_cursor(conn)
+                cursor.execute(OPEN_ISSUES_QUERY)
+                return cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Database error: {e}")  # Debug print
             return []
 
     @staticmethod
     def check_inventory(equip_type: str, quantity: int) -> Dict:
-        """Simulate inventory check"""
+        """Ask the inventory service and record the request"""
+        # The service is asked before a database connection is taken, so a
+        # slow answer never holds one
         try:
-            with sqlite3.connect('lab_management.db') as conn:
+            availability = check_availability(equip_type, quantity)
+        except InventoryServiceError as e:
+            logging.warning(f"Inventory check failed: {e}")
+            return {'available': False, 'error': e.message}
+        except ValueError:
+            return {'available': False, 'error': f'Invalid quantity: {quantity}'}
+        try:
+            with get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     INSERT INTO inventory_requests 
@@ -196,11 +561,9 @@ class EquipmentManagement:
                     VALUES (?, ?, datetime('now'), 'pending')
                 """, (equip_type, quantity))
 
-                # Simulate inventory response (in real system, this would be an API call)
-                is_available = True  # For testing, assume equipment is available
-
                 return {
-                    'available': is_available,
+                    'available': availability.available,
+                    'in_stock': availability.in_stock,
                     'request_id': cursor.lastrowid
                 }
         except sqlite3.Error as e:
@@ -208,50 +571,46 @@ class EquipmentManagement:
             return {'available': False, 'error': str(e)}
 
     @staticmethod
-    def get_inventory_requests(user_id: int) -> List[Dict]:
-        """Get all inventory and purchase requests"""
-        try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT equipment_type, quantity, request_date, status, NULL as justification
-                    FROM inventory_requests
-                    UNION ALL
-                    SELECT equipment_type, quantity, request_date, status, justification
-                    FROM purchase_requests
-                    ORDER BY request_date DESC
-                """)
-                columns = [desc[0] for desc in cursor.description]
-                return [dict(zip(columns, row)) for row in cursor.fetchall()]
-        except sqlite3.Error as e:
-            print(f"Database error: {e}")
-            return []
-
-    @staticmethod
-    def get_inventory_requests(user_id: int) -> List[Dict]:
+    def get_inventory_requests(user_id: int, limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+        """One page of inventory and purchase requests, newest first"""
+        limit = clamp_limit(limit)
+        request_date, request_type, request_id = decode_cursor(cursor, (MAX_TIMESTAMP, '~', MAX_ID))
         try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
+            with get_connection() as conn:
+                db_cursor = record_cursor(conn)
                 # Note the different ID column names
-                cursor.execute("""
-                    SELECT 'request' as type, request_id as id, equipment_type, quantity, request_date, status
-                    FROM inventory_requests
+                db_cursor.execute("""
+                    SELECT * FROM (
+                        SELECT 'request' as type, request_id as id, equipment_type, quantity, request_date, status
+                        FROM inventory_requests
+                        WHERE (request_date, 'request', request_id) < (?, ?, ?)
+                        ORDER BY request_date DESC, request_id DESC
+                        LIMIT ?
+                    )
                     UNION ALL
-                    SELECT 'purchase' as type, purchase_id as id, equipment_type, quantity, request_date, status
-                    FROM purchase_requests
-                    ORDER BY request_date DESC
-                """)
-                columns = [desc[0] for desc in cursor.description]
-                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+                    SELECT * FROM (
+                        SELECT 'purchase' as type, purchase_id as id, equipment_type, quantity, request_date, status
+                        FROM purchase_requests
+                        WHERE (request_date, 'purchase', purchase_id) < (?, ?, ?)
+                        ORDER BY request_date DESC, purchase_id DESC
+                        LIMIT ?
+                    )
+                    ORDER BY request_date DESC, type DESC, id DESC
+                    LIMIT ?
+                """, (request_date, request_type, request_id, limit + 1,
+                      request_date, request_type, request_id, limit + 1,
+                      limit + 1))
+                rows = db_cursor.fetchall()
+            return make_page(rows, limit, lambda row: (row['request_date'], row['type'], row['id']))
         except sqlite3.Error as e:
             print(f"Database error: {e}")
-            return []
+            return Page(limit=limit)
 
     @staticmethod
-    def get_pending_inventory_requests() -> List[Dict]:
+    def get_pending_inventory_requests() -> List[Record]:
         try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
+            with get_connection() as conn:
+                cursor = record_cursor(conn)
                 cursor.execute("""
                     SELECT 
                         request_id, 
@@ -269,11 +628,10 @@ class EquipmentManagement:
                         request_date,
                         'purchase' as source
                     FROM purchase_requests 
-                    WHERE status = 'pending'
+                    WHERE status = 'delivered'
                     ORDER BY request_date DESC
                 """)
-                columns = [desc[0] for desc in cursor.description]
-                rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                rows = cursor.fetchall()
                 # Rename request_id to match template
                 return rows
         except sqlite3.Error as e:
@@ -281,104 +639,127 @@ class EquipmentManagement:
             return []
 
     @staticmethod
-    def add_equipment_from_request(request_id: int) -> bool:
-        try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
-                print(f"Processing request ID: {request_id}")  # Debug print
-
-                # Check if already processed
-                cursor.execute("""
-                    SELECT equipment_type, quantity 
-                    FROM (
-                        SELECT request_id as id, equipment_type, quantity 
-                        FROM inventory_requests 
-                        WHERE status = 'pending'
-                        UNION ALL
-                        SELECT purchase_id as id, equipment_type, quantity 
-                        FROM purchase_requests 
-                        WHERE status = 'pending'
-                    ) WHERE id = ?
-                """, (request_id,))
+    def provision_equipment(conn: sqlite3.Connection, equip_type: str, quantity: int) -> range:
+        """Insert ``quantity`` operational items of one type with a single
+        statement; returns their IDs.
 
-                result = cursor.fetchone()
-                print(f"Query result: {result}")  # Debug print
+        Must run inside a write transaction (see database.transaction): the
+        lock keeps the AUTOINCREMENT IDs of the batch consecutive.
+        """
+        if quantity < 1:
+            return range(0)
+        cursor = conn.execute(PROVISION_EQUIPMENT_QUERY, (quantity, equip_type))
+        last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+        return range(last_id - quantity + 1, last_id + 1)
 
-                if not result:
-                    print("No pending request found")  # Debug print
-                    return False
+    @staticmethod
+    def provision_requests(requests: Iterable[Union[str, RequestRef]]) -> List[ProvisionResult]:
+        """Add the equipment of many ready requests and mark them done, all
+        in one transaction.
 
-                equip_type, quantity = result
-                print(f"Adding {quantity} {equip_type}(s)")  # Debug print
+        ``requests`` are source-qualified references ('inventory:12').
+        Inventory requests are ready while pending, purchases once delivered
+        (see REQUEST_SOURCES). The results are in the order given; requests
+        that are unknown or not ready are returned unprovisioned.
+        """
+        refs = list(dict.fromkeys(RequestRef.parse(request) for request in requests))
+        results = [ProvisionResult(ref) for ref in refs]
+        if not refs:
+            return results
 
-                # Add equipment
-                for _ in range(quantity):
-                    cursor.execute("""
-                        INSERT INTO equipment (equipType, status, last_checked)
-                        VALUES (?, 'operational', datetime('now'))
-                    """, (equip_type,))
+        with transaction() as conn:
+            ready = {}
+            for name, source in REQUEST_SOURCES.items():
+                ids = [ref.request_id for ref in refs if ref.source == name]
+                if not ids:
+                    continue
+                placeholders = ','.join('?' * len(ids))
+                for request_id, equip_type, quantity in conn.execute(f"""
+                    SELECT {source.id_column}, equipment_type, quantity
+                    FROM {source.table}
+                    WHERE status = ?
+                    AND {source.id_column} IN ({placeholders})
+                """, [source.ready_status] + ids):
+                    ready[RequestRef(name, request_id)] = (equip_type, quantity)
 
-                # Update request status in both tables
-                cursor.execute("""
-                    UPDATE inventory_requests 
-                    SET status = 'completed'
-                    WHERE request_id = ? AND status = 'pending'
-                """, (request_id,))
-
-                cursor.execute("""
-                    UPDATE purchase_requests 
-                    SET status = 'completed'
-                    WHERE purchase_id = ? AND status = 'pending'
-                """, (request_id,))
+            for result in results:
+                if result.request not in ready:
+                    continue
+                result.equipment_type, quantity = ready[result.request]
+                result.equipment_ids = EquipmentManagement.provision_equipment(
+                    conn, result.equipment_type, quantity)
 
-                conn.commit()
-                print("Transaction completed")  # Debug print
-                return True
+            for name, source in REQUEST_SOURCES.items():
+                ids = [ref.request_id for ref in ready if ref.source == name]
+                if not ids:
+                    continue
+                placeholders = ','.join('?' * len(ids))
+                dated = ", provisioned_date = datetime('now')" if name == 'purchase' else ''
+                conn.execute(f"""
+                    UPDATE {source.table}
+                    SET status = ?{dated}
+                    WHERE {source.id_column} IN ({placeholders})
+                """, [source.done_status] + ids)
+        return results
 
+    @staticmethod
+    def add_equipment_from_request(request: Union[str, RequestRef]) -> bool:
+        """Provision a single pending request, e.g. 'purchase:7'"""
+        try:
+            result, = EquipmentManagement.provision_requests([request])
+            return result.provisioned
         except sqlite3.Error as e:
-            print(f"Database error: {e}")  # Debug print
+            print(f"Database error: {e}")
             return False
 
     @staticmethod
-    def remove_equipment(equip_id: int, reason: str, staff_id: int) -> bool:
+    def remove_equipment_batch(equip_ids: Iterable[int], reason: str,
+                               staff_id: int) -> List[BatchItemResult]:
+        """Retire many items in one transaction, logging each removal"""
+        results = [BatchItemResult(equip_id) for equip_id in dict.fromkeys(equip_ids)]
+        if not results:
+            return results
         try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
-
-                # Check if equipment exists and is operational
-                cursor.execute("SELECT status FROM equipment WHERE equipID = ?", (equip_id,))
-                result = cursor.fetchone()
-                if not result:
-                    return False
-
-                # Update equipment status to removed
-                cursor.execute("""
-                    UPDATE equipment 
+            with transaction() as conn:
+                status = EquipmentManagement._equipment_status(conn, [r.item_id for r in results])
+                for result in results:
+                    if result.item_id not in status:
+                        result.reason = 'not found'
+                    elif status[result.item_id] == 'removed':
+                        result.reason = 'already removed'
+                    else:
+                        result.ok = True
+                removed = [(result.item_id,) for result in results if result.ok]
+                conn.executemany("""
+                    UPDATE equipment
                     SET status = 'removed',
                         last_checked = datetime('now')
                     WHERE equipID = ?
-                """, (equip_id,))
-
-                # Log removal
-                cursor.execute("""
-                    INSERT INTO equipment_removals 
+                """, removed)
+                conn.executemany("""
+                    INSERT INTO equipment_removals
                     (equipID, removed_by, removal_date, reason)
                     VALUES (?, ?, datetime('now'), ?)
-                """, (equip_id, staff_id, reason))
-
-                conn.commit()
-                return True
+                """, [(equip_id, staff_id, reason) for equip_id, in removed])
         except sqlite3.Error as e:
             print(f"Database error: {e}")
-            return False
+            return [BatchItemResult(result.item_id, reason='database error') for result in results]
+        return results
 
     @staticmethod
-    def get_maintenance_tasks() -> List[Dict]:
-        """Get all maintenance tasks with equipment details"""
+    def remove_equipment(equip_id: int, reason: str, staff_id: int) -> bool:
+        result, = EquipmentManagement.remove_equipment_batch([equip_id], reason, staff_id)
+        return result.ok
+
+    @staticmethod
+    def get_maintenance_tasks(limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+        """One page of maintenance tasks with equipment details, newest first"""
+        limit = clamp_limit(limit)
+        report_date, issue_id = decode_cursor(cursor, (MAX_TIMESTAMP, MAX_ID))
         try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
+            with get_connection() as conn:
+                db_cursor = record_cursor(conn)
+                db_cursor.execute("""
                     SELECT 
                         ei.issueID,
                         e.equipID,
@@ -390,20 +771,99 @@ class EquipmentManagement:
                         ei.resolution
                     FROM equipment_issues ei
                     JOIN equipment e ON ei.equipID = e.equipID
-                    ORDER BY ei.report_date DESC
-                """)
-                columns = [desc[0] for desc in cursor.description]
-                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+                    WHERE (ei.report_date, ei.issueID) < (?, ?)
+                    ORDER BY ei.report_date DESC, ei.issueID DESC
+                    LIMIT ?
+                """, (report_date, issue_id, limit + 1))
+                rows = db_cursor.fetchall()
+            return make_page(rows, limit, lambda row: (row['report_date'], row['issueID']))
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return Page(limit=limit)
+
+    @staticmethod
+    def get_maintenance_queue(include_claimed: bool = True, limit: int = MAX_QUEUE_SIZE,
+                              policy: QueuePolicy = MAINTENANCE_QUEUE_POLICY) -> List[Record]:
+        """Open issues, highest priority first, each marked 'available' or
+        'claimed' (by ``claimed_by`` until the epoch ``claim_expires``)"""
+        query, params = _queue_params(policy, include_claimed, limit)
+        try:
+            with get_connection() as conn:
+                cursor = record_cursor(conn)
+                cursor.execute(query, params)
+                return cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return []
+
+    @staticmethod
+    def claim_next_tasks(staff_id: int, count: int = 1,
+                         policy: QueuePolicy = MAINTENANCE_QUEUE_POLICY) -> List[int]:
+        """Claim the ``count`` highest-priority available issues for
+        ``staff_id``; returns the claimed issue IDs.
+
+        Each claim is a conditional UPDATE that only succeeds while the issue
+        is open and unclaimed (or its lease ran out), so two staff members
+        can never hold the same task.
+        """
+        if count < 1:
+            return []
+        query, params = _queue_params(policy, include_claimed=False, limit=count)
+        expires = params['now'] + int(policy.lease.total_seconds())
+        claimed = []
+        try:
+            with transaction() as conn:
+                for row in conn.execute(query, params).fetchall():
+                    cursor = conn.execute(CLAIM_TASK_QUERY, {
+                        'staff_id': staff_id, 'expires': expires,
+                        'issue_id': row[0], 'now': params['now']})
+                    if cursor.rowcount:
+                        claimed.append(row[0])
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return []
+        return claimed
+
+    @staticmethod
+    def claim_task(issue_id: int, staff_id: int,
+                   policy: QueuePolicy = MAINTENANCE_QUEUE_POLICY) -> bool:
+        """Claim one issue, or renew the lease on an issue already claimed by
+        ``staff_id``; False when someone else holds it or it is resolved"""
+        now = now_epoch()
+        try:
+            with get_connection() as conn:
+                cursor = conn.execute(CLAIM_TASK_QUERY, {
+                    'staff_id': staff_id, 'expires': now + int(policy.lease.total_seconds()),
+                    'issue_id': issue_id, 'now': now})
+                return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return False
+
+    @staticmethod
+    def release_task(issue_id: int, staff_id: int) -> bool:
+        """Return a claimed issue to the queue"""
+        try:
+            with get_connection() as conn:
+                cursor = conn.execute("""
+                    UPDATE equipment_issues
+                    SET claimed_by = NULL,
+                        claim_expires = NULL
+                    WHERE issueID = ?
+                    AND claimed_by = ?
+                    AND resolved_date IS NULL
+                """, (issue_id, staff_id))
+                return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return False
 
     @staticmethod
-    def get_maintenance_task(task_id: int) -> Optional[Dict]:
+    def get_maintenance_task(task_id: int) -> Optional[Record]:
         """Get specific maintenance task details"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
+            with get_connection() as conn:
+                cursor = record_cursor(conn)
                 cursor.execute("""
                     SELECT 
                         ei.issueID,
@@ -416,51 +876,98 @@ class EquipmentManagement:
                     JOIN equipment e ON ei.equipID = e.equipID
                     WHERE ei.issueID = ? AND ei.resolved_date IS NULL
                 """, (task_id,))
-                columns = [desc[0] for desc in cursor.description]
-                row = cursor.fetchone()
-                return dict(zip(columns, row)) if row else None
+                return cursor.fetchone()
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
 
     @staticmethod
-    def resolve_maintenance(task_id: int, resolution: str, staff_id: int) -> bool:
-        """Complete maintenance task and update equipment status"""
-        try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
+    def resolve_issue_batch(issue_ids: Iterable[int], resolution: str,
+                            staff_id: int) -> List[BatchItemResult]:
+        """Resolve many open issues in one transaction.
 
-                # Get equipment ID for this task
-                cursor.execute("SELECT equipID FROM equipment_issues WHERE issueID = ?",
-                               (task_id,))
-                equip_id = cursor.fetchone()[0]
-
-                # Update issue status
-                cursor.execute("""
-                    UPDATE equipment_issues 
+        Issues claimed by another staff member with an unexpired lease are
+        skipped; schedules that opened the resolved issues are completed.
+        Equipment returns to 'operational' once none of its issues is open,
+        so resolving one of two issues on the same PC leaves it in
+        maintenance. Removed equipment stays removed.
+        """
+        results = [BatchItemResult(issue_id) for issue_id in dict.fromkeys(issue_ids)]
+        if not results:
+            return results
+        try:
+            with transaction() as conn:
+                placeholders = ','.join('?' * len(results))
+                issues = {row[0]: row[1:] for row in conn.execute(f"""
+                    SELECT
+                        issueID,
+                        equipID,
+                        resolved_date,
+                        CASE
+                            WHEN claimed_by <> ? AND claim_expires > ? THEN claimed_by
+                        END as claimed_by_other
+                    FROM equipment_issues
+                    WHERE issueID IN ({placeholders})
+                """, [staff_id, now_epoch()] + [result.item_id for result in results])}
+                for result in results:
+                    if result.item_id not in issues:
+                        result.reason = 'not found'
+                        continue
+                    _, resolved_date, claimed_by_other = issues[result.item_id]
+                    if resolved_date is not None:
+                        result.reason = 'already resolved'
+                    elif claimed_by_other is not None:
+                        result.reason = f'claimed by staff {claimed_by_other}'
+                    else:
+                        result.ok = True
+                resolved = [result.item_id for result in results if result.ok]
+                conn.executemany("""
+                    UPDATE equipment_issues
                     SET resolved_date = datetime('now'),
                         resolution = ?,
-                        resolved_by = ?
+                        resolved_by = ?,
+                        claim_expires = NULL
                     WHERE issueID = ?
-                """, (resolution, staff_id, task_id))
-
-                # Update equipment status
-                cursor.execute("""
-                    UPDATE equipment 
+                """, [(resolution, staff_id, issue_id) for issue_id in resolved])
+                # Preventive maintenance opened by the scheduler is now done
+                conn.executemany("""
+                    UPDATE maintenance_schedule
+                    SET status = 'completed',
+                        completed_date = datetime('now')
+                    WHERE issueID = ?
+                """, [(issue_id,) for issue_id in resolved])
+                equip_ids = dict.fromkeys(issues[issue_id][0] for issue_id in resolved)
+                conn.executemany("""
+                    UPDATE equipment
                     SET status = 'operational',
                         last_checked = datetime('now')
                     WHERE equipID = ?
-                """, (equip_id,))
-
-                return True
+                    AND status <> 'removed'
+                    AND NOT EXISTS (
+                        SELECT 1 FROM equipment_issues
+                        WHERE equipID = ? AND resolved_date IS NULL
+                    )
+                """, [(equip_id, equip_id) for equip_id in equip_ids])
         except sqlite3.Error as e:
             print(f"Database error: {e}")
-            return False
+            return [BatchItemResult(result.item_id, reason='database error') for result in results]
+        return results
+
+    @staticmethod
+    def resolve_issue(issue_id: int, resolution: str, staff_id: int) -> bool:
+        """Resolve one open issue and return its equipment to service"""
+        result, = EquipmentManagement.resolve_issue_batch([issue_id], resolution, staff_id)
+        return result.ok
+
+    @staticmethod
+    def resolve_maintenance(task_id: int, resolution: str, staff_id: int) -> bool:
+        """Complete maintenance task (an open issue) and update equipment status"""
+        return EquipmentManagement.resolve_issue(task_id, resolution, staff_id)
 
     @staticmethod
     def submit_purchase_request(equip_type: str, quantity: int, justification: str, requester_id: int) -> bool:
         try:
-            with sqlite3.connect('lab_management.db') as conn:
+            with get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     INSERT INTO purchase_requests 
@@ -473,47 +980,106 @@ class EquipmentManagement:
             return False
 
     @staticmethod
-    def mark_purchase_delivered(request_id: int) -> bool:
+    def transition_purchases(purchase_ids: Iterable[int], status: str) -> List[BatchItemResult]:
+        """Move many purchases to ``status`` in one transaction, as far as
+        the lifecycle allows each of them (see PURCHASE_TRANSITIONS)"""
+        if status == 'provisioned' or not any(status in targets for targets in PURCHASE_TRANSITIONS.values()):
+            raise ValidationError(f"Cannot set purchases to {status}", 'INVALID_PURCHASE_STATUS')
+        results = [BatchItemResult(purchase_id) for purchase_id in dict.fromkeys(purchase_ids)]
+        if not results:
+            return results
         try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
-                # Update purchase request status
-                cursor.execute("""
-                    UPDATE purchase_requests 
-                    SET status = 'delivered',
+            with transaction() as conn:
+                current = dict(conn.execute("""
+                    SELECT purchase_id, status FROM purchase_requests
+                    WHERE purchase_id IN (SELECT value FROM json_each(?))
+                """, (json.dumps([result.item_id for result in results]),)))
+                for result in results:
+                    if result.item_id not in current:
+                        result.reason = 'not found'
+                    elif current[result.item_id] == status:
+                        result.reason = f'already {status}'
+                    elif status not in PURCHASE_TRANSITIONS.get(current[result.item_id], ()):
+                        result.reason = f'is {current[result.item_id]}'
+                    else:
+                        result.ok = True
+                date_column = PURCHASE_STATUS_DATES.get(status)
+                dated = f", {date_column} = datetime('now')" if date_column else ''
+                conn.execute(f"""
+                    UPDATE purchase_requests
+                    SET status = ?{dated}
+                    WHERE purchase_id IN (SELECT value FROM json_each(?))
+                """, (status, json.dumps([result.item_id for result in results if result.ok])))
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return [BatchItemResult(result.item_id, reason='database error') for result in results]
+        return results
+
+    @staticmethod
+    def mark_purchase_delivered(purchase_id: int) -> bool:
+        """Record the delivery of an ordered purchase"""
+        result, = EquipmentManagement.transition_purchases([purchase_id], 'delivered')
+        return result.ok
+
+    @staticmethod
+    def reconcile_deliveries(manifest: Iterable[ManifestLine], provision: bool = True) -> List[ReconcileResult]:
+        """Match a supplier delivery manifest against ordered purchases and
+        mark the matching ones delivered, adding their equipment (and
+        marking them provisioned) unless ``provision`` is False.
+
+        A line matches an ordered purchase of the same type and quantity;
+        every other line is returned with the reason. All of it runs in one
+        transaction as three statements, whatever the manifest's size.
+        """
+        results = [ReconcileResult(line) for line in manifest]
+        if not results:
+            return results
+        lines = json.dumps([[r.line.purchase_id, r.line.equipment_type, r.line.quantity] for r in results])
+        try:
+            with transaction() as conn:
+                matched = []
+                for line, reason, equipment_type in conn.execute(MANIFEST_MATCH_QUERY, {'manifest': lines}):
+                    results[line].reason = reason
+                    if reason is None:
+                        results[line].equipment_type = equipment_type
+                        matched.append(results[line])
+                if not matched:
+                    return results
+
+                status = 'provisioned' if provision else 'delivered'
+                conn.execute(f"""
+                    UPDATE purchase_requests
+                    SET status = ?,
                         delivery_date = datetime('now')
-                    WHERE request_id = ? AND status = 'pending'
-                """, (request_id,))
-                return True
+                        {", provisioned_date = datetime('now')" if provision else ''}
+                    WHERE status = 'ordered'
+                    AND purchase_id IN (SELECT value FROM json_each(?))
+                """, (status, json.dumps([result.line.purchase_id for result in matched])))
+
+                if provision:
+                    conn.execute(PROVISION_LINES_QUERY, (json.dumps(
+                        [[result.equipment_type, result.line.quantity] for result in matched]),))
+                    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                    next_id = last_id - sum(result.line.quantity for result in matched) + 1
+                    for result in matched:
+                        result.equipment_ids = range(next_id, next_id + result.line.quantity)
+                        next_id += result.line.quantity
         except sqlite3.Error as e:
             print(f"Database error: {e}")
-            return False
+            return [ReconcileResult(result.line, reason='database error') for result in results]
+        return results
 
     @staticmethod
-    def get_maintenance_history() -> List[Dict]:
+    def get_maintenance_history(limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+        """One page of maintenance history, newest first"""
+        limit = clamp_limit(limit)
+        report_date, issue_id = decode_cursor(cursor, (MAX_TIMESTAMP, MAX_ID))
         try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT 
-                        ei.issueID,
-                        e.equipID,
-                        e.equipType,
-                        ei.description as issue,
-                        ei.report_date,
-                        ei.resolved_date,
-                        ei.resolution,
-                        e.status,
-                        CASE 
-                            WHEN ei.resolved_date IS NOT NULL THEN 'Resolved'
-                            ELSE 'Pending'
-                        END as maintenance_status
-                    FROM equipment_issues ei
-                    JOIN equipment e ON ei.equipID = e.equipID
-                    ORDER BY ei.report_date DESC
-                """)
-                columns = [desc[0] for desc in cursor.description]
-                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            with get_connection() as conn:
+                db_cursor = record_cursor(conn)
+                db_cursor.execute(MAINTENANCE_HISTORY_QUERY, (report_date, issue_id, limit + 1))
+                rows = db_cursor.fetchall()
+            return make_page(rows, limit, lambda row: (row['report_date'], row['issueID']))
         except sqlite3.Error as e:
             print(f"Database error: {e}")
-            return []
\ No newline at end of file
+            return Page(limit=limit)
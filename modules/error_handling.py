@@ -29,6 +29,10 @@ class AuthorizationError(LabManagementError):
     """Raised when user lacks required permissions"""
     pass
 
+class InventoryServiceError(LabManagementError):
+    """Raised when the external inventory service cannot answer"""
+    pass
+
 def handle_errors(func):
     """Decorator for consistent error handling"""
     @wraps(func)
@@ -0,0 +1,239 @@
+import csv
+import io
+import sys
+import json
+import argparse
+from datetime import date, datetime, time, timedelta
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+from .database import get_connection
+from .timestamps import format_datetime, to_epoch
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+DEFAULT_BATCH_SIZE = 1000
+
+# Lower bounds of the sort keys, the seek position of the first batch
+MIN_TIMESTAMP = '0000-01-01 00:00:00'
+MIN_EPOCH = -2 ** 63
+MIN_ID = -1
+
+
+@dataclass(frozen=True)
+class ExportSource:
+    """A table export that is read in (timestamp, id) order.
+
+    ``query`` takes the filters built by ``export_rows`` plus the keyset
+    position ``(timestamp, id)`` and a batch size, so each batch is an index
+    seek no matter how far into the table the export has got.
+    ``time_value`` converts a datetime to how ``time_column`` stores it.
+    """
+    name: str
+    query: str
+    columns: Tuple[str, ...]
+    time_column: str
+    time_value: Callable[[datetime], Any]
+    first_position: Tuple[Any, int]
+    status_filters: dict
+
+    @property
+    def sort_key(self):
+        """(timestamp, id) of a row, the keyset position after it"""
+        time_index = self.columns.index(self.time_column.split('.')[-1])
+        return lambda row: (row[time_index], row[0])
+
+
+BOOKINGS = ExportSource(
+    name='bookings',
+    query="""
+        SELECT
+            lb.bookingID,
+            lb.userID,
+            lb.labID,
+            l.location,
+            lb.start_time,
+            lb.end_time,
+            lb.start_ts,
+            lb.end_ts,
+            lb.status,
+            lb.created_at
+        FROM lab_bookings lb
+        LEFT JOIN labs l ON lb.labID = l.labID
+        WHERE (lb.start_ts, lb.bookingID) > (?, ?)
+        {filters}
+        ORDER BY lb.start_ts, lb.bookingID
+        LIMIT ?
+    """,
+    columns=('bookingID', 'userID', 'labID', 'location', 'start_time', 'end_time',
+             'start_ts', 'end_ts', 'status', 'created_at'),
+    time_column='lb.start_ts',
+    time_value=to_epoch,
+    first_position=(MIN_EPOCH, MIN_ID),
+    status_filters={
+        status: ("lb.status = ?", (status,))
+        for status in ('pending', 'approved', 'rejected')
+    },
+)
+
+MAINTENANCE = ExportSource(
+    name='maintenance',
+    query="""
+        SELECT
+            ei.issueID,
+            ei.equipID,
+            e.equipType,
+            ei.description,
+            ei.report_date,
+            ei.reported_by,
+            ei.resolved_date,
+            ei.resolved_by,
+            ei.resolution,
+            CASE
+                WHEN ei.resolved_date IS NOT NULL THEN 'Resolved'
+                ELSE 'Pending'
+            END as maintenance_status
+        FROM equipment_issues ei
+        LEFT JOIN equipment e ON ei.equipID = e.equipID
+        WHERE (ei.report_date, ei.issueID) > (?, ?)
+        {filters}
+        ORDER BY ei.report_date, ei.issueID
+        LIMIT ?
+    """,
+    columns=('issueID', 'equipID', 'equipType', 'description', 'report_date', 'reported_by',
+             'resolved_date', 'resolved_by', 'resolution', 'maintenance_status'),
+    time_column='ei.report_date',
+    time_value=format_datetime,
+    first_position=(MIN_TIMESTAMP, MIN_ID),
+    status_filters={
+        'pending': ("ei.resolved_date IS NULL", ()),
+        'resolved': ("ei.resolved_date IS NOT NULL", ()),
+    },
+)
+
+SOURCES = {source.name: source for source in (BOOKINGS, MAINTENANCE)}
+
+
+def get_source(name: str) -> ExportSource:
+    try:
+        return SOURCES[name]
+    except KeyError:
+        raise ValueError(f"Unknown export: {name} (expected one of {', '.join(SOURCES)})")
+
+
+def _filters(source: ExportSource, date_from: Optional[date], date_to: Optional[date],
+             status: Optional[str]) -> Tuple[str, tuple]:
+    clauses, params = [], []
+    if date_from:
+        clauses.append(f"{source.time_column} >= ?")
+        params.append(source.time_value(datetime.combine(date_from, time.min)))
+    if date_to:
+        # date_to is inclusive
+        clauses.append(f"{source.time_column} < ?")
+        params.append(source.time_value(datetime.combine(date_to + timedelta(days=1), time.min)))
+    if status:
+        if status not in source.status_filters:
+            raise ValueError(f"Unknown {source.name} status: {status}")
+        clause, values = source.status_filters[status]
+        clauses.append(clause)
+        params.extend(values)
+    return ''.join(f"AND {clause}\n" for clause in clauses), tuple(params)
+
+
+def export_rows(source: ExportSource, date_from: Optional[date] = None,
+                date_to: Optional[date] = None, status: Optional[str] = None,
+                batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[tuple]:
+    """Yield matching rows as tuples in ``source.columns`` order.
+
+    Rows are read in keyset batches of ``batch_size``; a pooled connection is
+    only held while one batch is fetched, never while the consumer (e.g. a
+    slow HTTP client) is still reading. Memory use is bounded by one batch.
+    """
+    filters, params = _filters(source, date_from, date_to, status)
+    query = source.query.format(filters=filters)
+    position = source.first_position
+    sort_key = source.sort_key
+    while True:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, position + params + (batch_size,))
+            batch = cursor.fetchall()
+        yield from batch
+        if len(batch) < batch_size:
+            return
+        position = sort_key(batch[-1])
+
+
+def _csv_line(writer, buffer: io.StringIO, values: Sequence) -> str:
+    writer.writerow(values)
+    line = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return line
+
+
+def iter_csv(columns: Sequence[str], rows: Iterator[tuple]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    yield _csv_line(writer, buffer, columns)
+    for row in rows:
+        yield _csv_line(writer, buffer, row)
+
+
+def iter_ndjson(columns: Sequence[str], rows: Iterator[tuple]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), default=str) + '\n'
+
+
+def render(source: ExportSource, fmt: str, rows: Iterator[tuple]) -> Iterator[str]:
+    """Encode rows as CSV (with a header line) or NDJSON, one line per chunk"""
+    if fmt == 'csv':
+        return iter_csv(source.columns, rows)
+    if fmt == 'ndjson':
+        return iter_ndjson(source.columns, rows)
+    raise ValueError(f"Unknown export format: {fmt} (expected csv or ndjson)")
+
+
+def export(name: str, fmt: str = 'csv', date_from: Optional[date] = None,
+           date_to: Optional[date] = None, status: Optional[str] = None) -> Iterator[str]:
+    """Lines of an export; validates all arguments before the first row is read"""
+    source = get_source(name)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt} (expected csv or ndjson)")
+    _filters(source, date_from, date_to, status)
+    return render(source, fmt, export_rows(source, date_from, date_to, status))
+
+
+def _parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date (expected YYYY-MM-DD): {value}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export bookings or maintenance history as CSV or NDJSON")
+    parser.add_argument('source', choices=sorted(SOURCES))
+    parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+    parser.add_argument('--from', dest='date_from', type=_parse_date, help="first date, YYYY-MM-DD")
+    parser.add_argument('--to', dest='date_to', type=_parse_date, help="last date, YYYY-MM-DD")
+    parser.add_argument('--status')
+    parser.add_argument('-o', '--output', help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    try:
+        lines = export(args.source, args.format, args.date_from, args.date_to, args.status)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as output:
+            output.writelines(lines)
+    else:
+        sys.stdout.writelines(lines)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
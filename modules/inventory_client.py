@@ -0,0 +1,246 @@
+import os
+import json
+import random
+import threading
+import http.client
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from time import monotonic, perf_counter, sleep
+from typing import Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+from .error_handling import InventoryServiceError
+
+# Base URL of the inventory service (e.g. http://inventory.campus:8080);
+# unset keeps the built-in simulation where everything is in stock
+INVENTORY_SERVICE_URL = os.environ.get('LAB_INVENTORY_URL')
+
+# Worth retrying: the service or a proxy in front of it is briefly unwell
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+@dataclass(frozen=True)
+class Availability:
+    equipment_type: str
+    in_stock: int
+    quantity: int
+
+    @property
+    def available(self) -> bool:
+        return self.in_stock >= self.quantity
+
+
+class ConnectionPool:
+    """Keep-alive HTTP connections to one host, reused most recent first.
+
+    At most ``max_size`` connections exist; a thread that finds them all in
+    use waits up to ``timeout`` for one. A connection that failed is closed
+    instead of being returned.
+    """
+
+    def __init__(self, base_url: str, max_size: int = 8, timeout: float = 2.0):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or 'http'
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle: 'deque[http.client.HTTPConnection]' = deque()
+        self._size = 0
+        self._cond = threading.Condition()
+        self.created = 0
+
+    def _connect(self) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        deadline = monotonic() + self.timeout
+        with self._cond:
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    raise InventoryServiceError("No inventory connection free", 'INVENTORY_POOL_TIMEOUT')
+                self._cond.wait(remaining)
+            if self._idle:
+                return self._idle.pop()
+            self._size += 1
+            self.created += 1
+        try:
+            return self._connect()
+        except Exception:
+            self._discard()
+            raise
+
+    def _discard(self) -> None:
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[http.client.HTTPConnection]:
+        conn = self._acquire()
+        try:
+            yield conn
+        except BaseException:
+            conn.close()
+            self._discard()
+            raise
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def close(self) -> None:
+        with self._cond:
+            while self._idle:
+                self._idle.pop().close()
+                self._size -= 1
+
+
+class InventoryClient:
+    """Client of the external inventory service.
+
+    Requests go over pooled keep-alive connections with a short timeout.
+    Connection errors, timeouts and 429/5xx answers are retried up to
+    ``retries`` times with exponential backoff and full jitter, so a burst
+    of workers does not retry in lockstep. Stock levels are cached per
+    equipment type for ``cache_ttl`` seconds; ``check_many`` asks for all
+    uncached types in batches of ``batch_size``, the batches in parallel.
+    """
+
+    def __init__(self, base_url: str, pool_size: int = 8, timeout: float = 2.0,
+                 retries: int = 2, backoff: float = 0.05, cache_ttl: float = 30.0,
+                 batch_size: int = 100):
+        self.pool = ConnectionPool(base_url, pool_size, timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.cache_ttl = cache_ttl
+        self.batch_size = batch_size
+        self._cache: Dict[str, tuple] = {}
+        self._cache_lock = threading.Lock()  # also guards the counters below
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='inventory-client')
+        self.requests = 0
+        self.retried = 0
+        self.cache_hits = 0
+
+    def _request(self, method: str, path: str, payload: Optional[Dict] = None) -> Dict:
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {'Accept': 'application/json'}
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(self.retries + 1):
+            error = None
+            try:
+                with self.pool.connection() as conn:
+                    with self._cache_lock:
+                        self.requests += 1
+                    conn.request(method, self.pool.prefix + path, body, headers)
+                    response = conn.getresponse()
+                    data = response.read()
+                if response.status == 200:
+                    return json.loads(data)
+                error = f"inventory service answered {response.status}"
+                if response.status not in RETRY_STATUSES:
+                    break
+            except (OSError, http.client.HTTPException) as e:
+                error = f"inventory service unreachable: {e}"
+            if attempt < self.retries:
+                with self._cache_lock:
+                    self.retried += 1
+                sleep(random.uniform(0, self.backoff * 2 ** attempt))
+        raise InventoryServiceError(error, 'INVENTORY_UNAVAILABLE')
+
+    def _cached(self, equipment_type: str) -> Optional[int]:
+        entry = self._cache.get(equipment_type)
+        if entry is not None and entry[1] > monotonic():
+            return entry[0]
+        return None
+
+    def _fetch(self, types: List[str]) -> Dict[str, int]:
+        stock = self._request('POST', '/v1/availability', {'types': types})['stock']
+        expires = monotonic() + self.cache_ttl
+        with self._cache_lock:
+            for equipment_type in types:
+                self._cache[equipment_type] = (int(stock.get(equipment_type, 0)), expires)
+        return {equipment_type: int(stock.get(equipment_type, 0)) for equipment_type in types}
+
+    def stock(self, equipment_types: Iterable[str]) -> Dict[str, int]:
+        """In-stock count of each type, from the cache where fresh"""
+        stock: Dict[str, int] = {}
+        missing = []
+        for equipment_type in dict.fromkeys(equipment_types):
+            cached = self._cached(equipment_type)
+            if cached is None:
+                missing.append(equipment_type)
+            else:
+                stock[equipment_type] = cached
+        with self._cache_lock:
+            self.cache_hits += len(stock)
+        batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+        if len(batches) == 1:
+            stock.update(self._fetch(batches[0]))
+        elif batches:
+            for fetched in self._executor.map(self._fetch, batches):
+                stock.update(fetched)
+        return stock
+
+    def check(self, equipment_type: str, quantity: int = 1) -> Availability:
+        return Availability(equipment_type, self.stock([equipment_type])[equipment_type], int(quantity))
+
+    def check_many(self, wanted: Dict[str, int]) -> Dict[str, Availability]:
+        """Availability of many equipment types (type -> quantity) at once"""
+        stock = self.stock(wanted)
+        return {equipment_type: Availability(equipment_type, stock[equipment_type], int(quantity))
+                for equipment_type, quantity in wanted.items()}
+
+    def invalidate(self, equipment_type: Optional[str] = None) -> None:
+        with self._cache_lock:
+            if equipment_type is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(equipment_type, None)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        self.pool.close()
+
+
+inventory_client: Optional[InventoryClient] = (
+    InventoryClient(INVENTORY_SERVICE_URL) if INVENTORY_SERVICE_URL else None)
+
+
+def check_availability(equipment_type: str, quantity: int) -> Availability:
+    """Availability from the inventory service, or the simulation when no
+    service is configured"""
+    if inventory_client is None:
+        quantity = int(quantity)
+        return Availability(equipment_type, quantity, quantity)
+    return inventory_client.check(equipment_type, quantity)
+
+
+def benchmark(base_url: str, checks: int, threads: int, types: int, ttl: float) -> Dict:
+    """Run ``checks`` single-type checks from ``threads`` threads"""
+    client = InventoryClient(base_url, pool_size=threads, cache_ttl=ttl)
+    names = [f'Type{i}' for i in range(types)]
+
+    def worker(n: int) -> int:
+        failures = 0
+        for i in range(n):
+            try:
+                client.check(names[i % types], 1)
+            except InventoryServiceError:
+                failures += 1
+        return failures
+
+    start = perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        failures = sum(pool.map(worker, [checks // threads] * threads))
+    elapsed = perf_counter() - start
+    done = checks // threads * threads
+    client.close()
+    return {'checks': done, 'seconds': round(elapsed, 3), 'checks_per_second': round(done / elapsed),
+            'requests': client.requests, 'retried': client.retried, 'cache_hits': client.cache_hits,
+            'connections': client.pool.created, 'failures': failures}
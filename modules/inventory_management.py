@@ -1,14 +1,49 @@
 from datetime import datetime
-from typing import Optional, Dict, List
+from typing import Optional, Dict, Iterable, List
+import json
 import sqlite3
 
+from .database import get_connection, transaction
+from .error_handling import InventoryServiceError
+from .inventory_client import check_availability
+from .notifications import Digest, notification_pipeline
+from .pagination import MAX_ID, Page, clamp_limit, decode_cursor, make_page
+from .records import Record, record_cursor
+from .timestamps import format_datetime, now_epoch
+
+# Pending notifications, newest first, from a keyset cursor (the last id seen)
+PENDING_NOTIFICATIONS_QUERY = """
+    SELECT
+        id,
+        request_id,
+        equipment_details,
+        json_extract(equipment_details, '$.equipment_type') AS equipment_type,
+        json_extract(equipment_details, '$.quantity') AS quantity,
+        status,
+        notification_date
+    FROM it_staff_notifications
+    WHERE status = 'pending'
+    AND id < ?
+    ORDER BY id DESC
+    LIMIT ?
+"""
+
+NOTIFICATION_STATUSES = ('processed', 'rejected')
+
 
 class InventoryManagement:
     @staticmethod
     def request_equipment(equipment_type: str, quantity: int) -> Dict:
         """Request equipment from inventory"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
+            availability = check_availability(equipment_type, quantity)
+        except InventoryServiceError as e:
+            return {
+                'success': False,
+                'message': f'Inventory service error: {e.message}'
+            }
+        try:
+            with get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     INSERT INTO equipment_requests 
@@ -17,9 +52,7 @@ class InventoryManagement:
                 """, (equipment_type, quantity, datetime.now()))
 
                 request_id = cursor.lastrowid
-
-                # Simulate inventory check (in real system, this would be an API call)
-                is_available = True  # Simulated response
+                is_available = availability.available
 
                 return {
                     'success': True,
@@ -37,7 +70,7 @@ class InventoryManagement:
     def purchase_equipment(equipment_type: str, quantity: int) -> Dict:
         """Send purchase request to inventory system"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
+            with get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     INSERT INTO purchase_requests 
@@ -61,48 +94,101 @@ class InventoryManagement:
 
     @staticmethod
     def notify_it_staff(request_id: int, equipment_details: Dict) -> bool:
-        """Notify IT staff about new equipment"""
-        try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO it_staff_notifications 
-                    (request_id, equipment_details, status, notification_date)
-                    VALUES (?, ?, 'pending', ?)
-                """, (request_id, str(equipment_details), datetime.now()))
-                return True
-        except sqlite3.Error:
-            return False
+        """Notify IT staff about new equipment.
+
+        Only queues the notification; the pipeline writes it shortly after,
+        batched with others, and folds it into the staff's next digest.
+        """
+        return notification_pipeline.submit(request_id, equipment_details)
 
     @staticmethod
-    def get_all_requests() -> List[Dict]:
+    def get_all_requests() -> List[Record]:
         """Get all equipment requests and their status"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
+            with get_connection() as conn:
+                cursor = record_cursor(conn)
                 cursor.execute("""
                     SELECT * FROM equipment_requests 
                     UNION 
                     SELECT * FROM purchase_requests 
                     ORDER BY request_date DESC
                 """)
-                columns = [col[0] for col in cursor.description]
-                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+                return cursor.fetchall()
         except sqlite3.Error:
             return []
 
     @staticmethod
-    def get_it_notifications() -> List[Dict]:
-        """Get pending IT staff notifications"""
+    def get_it_notifications(limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+        """One page of pending IT staff notifications, newest first"""
+        limit = clamp_limit(limit)
+        before, = decode_cursor(cursor, (MAX_ID,))
         try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
+            with get_connection() as conn:
+                cursor = record_cursor(conn)
+                cursor.execute(PENDING_NOTIFICATIONS_QUERY, (before, limit + 1))
+                return make_page(cursor.fetchall(), limit, lambda row: (row.id,))
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return Page(limit=limit)
+
+    @staticmethod
+    def get_it_digests(staff_id: int, limit: int = 10) -> List[Digest]:
+        """A staff member's latest notification digests"""
+        try:
+            with get_connection() as conn:
+                cursor = record_cursor(conn)
                 cursor.execute("""
-                    SELECT * FROM it_staff_notifications 
-                    WHERE status = 'pending' 
-                    ORDER BY notification_date DESC
-                """)
-                columns = [col[0] for col in cursor.description]
-                return [dict(zip(columns, row)) for row in cursor.fetchall()]
-        except sqlite3.Error:
-            return []
\ No newline at end of file
+                    SELECT * FROM it_staff_digests
+                    WHERE staff_id = ?
+                    ORDER BY last_notification_id DESC
+                    LIMIT ?
+                """, (staff_id, limit))
+                return [Digest.from_row(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return []
+
+    @staticmethod
+    def process_notifications(notification_ids: Iterable[int], staff_id: int,
+                              status: str = 'processed', notes: Optional[str] = None) -> int:
+        """Mark many pending notifications in one statement; returns how
+        many changed"""
+        if status not in NOTIFICATION_STATUSES:
+            raise ValueError(f"Invalid notification status: {status}")
+        ids = json.dumps(list(dict.fromkeys(int(i) for i in notification_ids)))
+        try:
+            with transaction() as conn:
+                return conn.execute("""
+                    UPDATE it_staff_notifications
+                    SET status = ?, processed_date = ?, processed_by = ?, notes = ?
+                    WHERE status = 'pending'
+                    AND id IN (SELECT value FROM json_each(?))
+                """, (status, format_datetime(datetime.now()), staff_id, notes, ids)).rowcount
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return 0
+
+    @staticmethod
+    def process_digest(digest_id: int, staff_id: int) -> int:
+        """Mark a staff member's digest read and every notification it
+        covered processed; returns how many notifications changed"""
+        try:
+            with transaction() as conn:
+                digest = conn.execute("""
+                    SELECT first_notification_id, last_notification_id
+                    FROM it_staff_digests
+                    WHERE id = ? AND staff_id = ?
+                """, (digest_id, staff_id)).fetchone()
+                if digest is None:
+                    return 0
+                conn.execute("UPDATE it_staff_digests SET read_ts = ? WHERE id = ?",
+                             (now_epoch(), digest_id))
+                return conn.execute("""
+                    UPDATE it_staff_notifications
+                    SET status = 'processed', processed_date = ?, processed_by = ?
+                    WHERE status = 'pending'
+                    AND id BETWEEN ? AND ?
+                """, (format_datetime(datetime.now()), staff_id) + tuple(digest)).rowcount
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return 0
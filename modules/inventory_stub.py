@@ -0,0 +1,146 @@
+import sys
+import json
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep
+from typing import Dict, List, Optional
+from urllib.parse import unquote
+
+# Stock of the stub; types not listed have none
+DEFAULT_STOCK = {
+    'Computer': 40,
+    'Monitor': 60,
+    'Printer': 5,
+    'Scanner': 3,
+    'Projector': 4,
+}
+
+
+class StubInventoryHandler(BaseHTTPRequestHandler):
+    """Answers like the inventory service:
+
+    GET  /v1/stock/<type>                       -> {"equipment_type": ..., "in_stock": n}
+    POST /v1/availability {"types": [...]}      -> {"stock": {type: n, ...}}
+    """
+    protocol_version = 'HTTP/1.1'  # keep-alive, as the real service
+    # Headers and body go out in separate writes; without this Nagle's
+    # algorithm holds the body for the client's delayed ACK (~40ms)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload: Dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _misbehave(self) -> bool:
+        server = self.server
+        if server.latency:
+            sleep(server.latency)
+        if server.fail_rate and random.random() < server.fail_rate:
+            self._send(503, {'error': 'try again'})
+            return True
+        return False
+
+    def do_GET(self):
+        if self._misbehave():
+            return
+        prefix = '/v1/stock/'
+        if not self.path.startswith(prefix):
+            self._send(404, {'error': 'not found'})
+            return
+        equipment_type = unquote(self.path[len(prefix):])
+        self._send(200, {'equipment_type': equipment_type,
+                         'in_stock': self.server.stock.get(equipment_type, 0)})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        raw = self.rfile.read(length)
+        if self._misbehave():
+            return
+        if self.path != '/v1/availability':
+            self._send(404, {'error': 'not found'})
+            return
+        try:
+            types = json.loads(raw)['types']
+        except (ValueError, KeyError, TypeError):
+            self._send(400, {'error': 'expected {"types": [...]}'})
+            return
+        self._send(200, {'stock': {t: self.server.stock.get(t, 0) for t in types}})
+
+
+class StubInventoryServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, stock: Dict[str, int], latency: float = 0.0, fail_rate: float = 0.0):
+        super().__init__(address, StubInventoryHandler)
+        self.stock = stock
+        self.latency = latency
+        self.fail_rate = fail_rate
+
+
+def serve(host: str = '127.0.0.1', port: int = 8765, stock: Optional[Dict[str, int]] = None,
+          latency: float = 0.0, fail_rate: float = 0.0) -> StubInventoryServer:
+    """Start a stub inventory server on a daemon thread (port 0 picks a free one)"""
+    server = StubInventoryServer((host, port), dict(DEFAULT_STOCK if stock is None else stock),
+                                 latency, fail_rate)
+    threading.Thread(target=server.serve_forever, name='inventory-stub', daemon=True).start()
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Local stand-in for the inventory service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--stock', action='append', default=[], metavar='TYPE=COUNT',
+                        help="stock of a type (repeatable); replaces the defaults")
+    parser.add_argument('--latency', type=float, default=0.0, help="delay per request (seconds)")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="share of requests answered 503")
+    parser.add_argument('--bench', action='store_true',
+                        help="benchmark the inventory client against this stub and exit")
+    parser.add_argument('--checks', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--types', type=int, default=50)
+    parser.add_argument('--ttl', type=float, default=0.0,
+                        help="client cache TTL for --bench (0 measures the network path)")
+    args = parser.parse_args(argv)
+
+    stock = None
+    if args.stock:
+        stock = {}
+        for item in args.stock:
+            equipment_type, _, count = item.partition('=')
+            stock[equipment_type] = int(count)
+
+    if args.bench:
+        from .inventory_client import benchmark
+        server = serve(args.host, 0, stock, args.latency, args.fail_rate)
+        try:
+            url = f"http://{args.host}:{server.server_address[1]}"
+            print(json.dumps(benchmark(url, args.checks, args.threads, args.types, args.ttl)))
+        finally:
+            server.shutdown()
+            server.server_close()
+        return 0
+
+    server = StubInventoryServer((args.host, args.port), dict(DEFAULT_STOCK if stock is None else stock),
+                                 args.latency, args.fail_rate)
+    print(f"Stub inventory service on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,81 @@
-from datetime import datetime
-from typing import Optional, List, Dict
+from datetime import datetime, time, timedelta
+from enum import Enum
+from heapq import merge
+from itertools import islice
+from typing import Optional, List, Dict, Iterator, Tuple
 import sqlite3
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+from .database import get_connection, transaction
+from .records import Record, record_cursor
+from .timestamps import booking_times, now_epoch, parse_datetime, to_epoch
+from .booking_index import booking_index
+from .recurrence import RecurrenceRule
+from .occupancy import occupancy_cache
+from .live_updates import live_updates
+from .pagination import Page, clamp_limit, decode_cursor, make_page, MAX_ID
+
+# Hot-path queries; migrations.verify_query_plans() checks their index use.
+BOOKING_CONFLICT_QUERY = """
+    SELECT bookingID
+    FROM lab_bookings
+    WHERE labID = ?
+    AND status = 'approved'
+    AND start_ts < ?
+    AND end_ts > ?
+"""
+
+# Listings page by keyset on (start_ts, bookingID), newest first
+USER_BOOKINGS_QUERY = """
+    SELECT 
+        lb.bookingID,
+        lb.labID,
+        lb.start_time,
+        lb.end_time,
+        lb.start_ts,
+        lb.end_ts,
+        lb.status,
+        l.location,
+        l.info
+    FROM lab_bookings lb
+    JOIN labs l ON lb.labID = l.labID
+    WHERE lb.userID = ?
+    AND (lb.start_ts, lb.bookingID) < (?, ?)
+    ORDER BY lb.start_ts DESC, lb.bookingID DESC
+    LIMIT ?
+"""
+
+ALL_BOOKINGS_QUERY = """
+    SELECT 
+        lb.bookingID,
+        lb.userID,
+        lb.labID,
+        lb.start_time,
+        lb.end_time,
+        lb.start_ts,
+        lb.end_ts,
+        lb.status,
+        l.location,
+        l.size
+    FROM lab_bookings lb
+    JOIN labs l ON lb.labID = l.labID
+    WHERE (lb.start_ts, lb.bookingID) < (?, ?)
+    ORDER BY lb.start_ts DESC, lb.bookingID DESC
+    LIMIT ?
+"""
+
+ACTIVE_BOOKING_QUERY = """
+    SELECT bookingID, labID
+    FROM lab_bookings
+    WHERE userID = ?
+    AND status = 'approved'
+    AND start_ts <= ?
+    AND end_ts >= ?
+"""
 
 @dataclass
 class Lab:
+    __slots__ = ('lab_id', 'size', 'location', 'info', 'is_available', 'created_at')
     lab_id: str
     size: int
     location: str
@@ -12,64 +83,104 @@ class Lab:
     is_available: bool
     created_at: datetime
 
+
+@dataclass
+class FreeSlot:
+    """Earliest slot of the requested duration at the start of a free gap"""
+    lab_id: str
+    size: int
+    location: str
+    start: datetime
+    end: datetime
+    free_until: datetime
+
+
+class BookingOutcome(str, Enum):
+    BOOKED = 'booked'
+    CONFLICT = 'conflict'
+    LAB_UNAVAILABLE = 'lab_unavailable'
+    ERROR = 'error'
+
+
+@dataclass
+class BookingResult:
+    """Result of LabManagement.book_lab; truthy only when the booking was made"""
+    outcome: BookingOutcome
+    booking_id: Optional[int] = None
+    conflicts: List[int] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return self.outcome is BookingOutcome.BOOKED
+
+
+@dataclass
+class OccurrenceResult:
+    start: datetime
+    end: datetime
+    booking_id: Optional[int] = None
+    conflicts: List[int] = field(default_factory=list)
+
+
+@dataclass
+class RecurringBookingResult:
+    """Result of LabManagement.book_recurring, one entry per occurrence"""
+    outcome: BookingOutcome
+    occurrences: List[OccurrenceResult] = field(default_factory=list)
+
+    @property
+    def booked(self) -> List[OccurrenceResult]:
+        return [occ for occ in self.occurrences if occ.booking_id is not None]
+
+    @property
+    def conflicted(self) -> List[OccurrenceResult]:
+        return [occ for occ in self.occurrences if occ.conflicts]
+
+    def __bool__(self) -> bool:
+        return self.outcome is BookingOutcome.BOOKED
+
+
 class LabManagement:
     @staticmethod
     def create_lab(lab_id: str, size: int, location: str, info: str) -> bool:
         """Create a new lab in the system"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
+            with get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     INSERT INTO labs (labID, size, location, info, isAvailable)
                     VALUES (?, ?, ?, ?, TRUE)
                 """, (lab_id, size, location, info))
-                return True
+            occupancy_cache.invalidate()
+            live_updates.labs_changed()
+            return True
         except sqlite3.Error:
             return False
 
+    @staticmethod
+    def _lab_from_row(row, occupied: bool) -> Lab:
+        return Lab(
+            lab_id=str(row[0]),
+            size=int(row[1]),
+            location=str(row[2]),
+            info=str(row[3]),
+            is_available=bool(row[4]) and not occupied,
+            created_at=parse_datetime(row[5]) if row[5] else datetime.now()
+        )
+
     @staticmethod
     def get_all_labs() -> List[Lab]:
-        """Get all labs with current availability status"""
+        """Get all labs with current availability status (served from the occupancy cache)"""
         try:
-            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')  # Format datetime correctly
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
-                # Simplified query first to debug
-                cursor.execute("""
-                    SELECT 
-                        l.labID,
-                        l.size,
-                        l.location,
-                        l.info,
-                        CASE 
-                            WHEN b.bookingID IS NOT NULL THEN 0
-                            ELSE l.isAvailable
-                        END as isAvailable,
-                        l.created_at
-                    FROM labs l
-                    LEFT JOIN lab_bookings b ON l.labID = b.labID
-                        AND b.status = 'approved'
-                        AND ? BETWEEN b.start_time AND b.end_time
-                """, (current_time,))
+            rows, occupancy = occupancy_cache.snapshot()
+            labs = []
+            for row in rows:
+                try:
+                    labs.append(LabManagement._lab_from_row(row, occupancy.get(str(row[0])) is not None))
+                except Exception as e:
+                    print(f"Error creating lab object: {e}")
+                    continue
 
-                rows = cursor.fetchall()
-                labs = []
-                for row in rows:
-                    try:
-                        lab = Lab(
-                            lab_id=str(row[0]),
-                            size=int(row[1]),
-                            location=str(row[2]),
-                            info=str(row[3]),
-                            is_available=bool(row[4]),
-                            created_at=datetime.strptime(row[5], '%Y-%m-%d %H:%M:%S') if row[5] else datetime.now()
-                        )
-                        labs.append(lab)
-                    except Exception as e:
-                        print(f"Error creating lab object: {e}")
-                        continue
-
-                return labs
+            return labs
 
         except sqlite3.Error as e:
             print(f"Database error in get_all_labs: {e}")
@@ -82,38 +193,11 @@ class LabManagement:
     def get_lab(lab_id: str) -> Optional[Lab]:
         """Get a specific lab with its current availability"""
         try:
-            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                        SELECT 
-                            l.labID,
-                            l.size,
-                            l.location,
-                            l.info,
-                            CASE 
-                                WHEN b.bookingID IS NOT NULL THEN 0
-                                ELSE l.isAvailable
-                            END as isAvailable,
-                            l.created_at
-                        FROM labs l
-                        LEFT JOIN lab_bookings b ON l.labID = b.labID
-                            AND b.status = 'approved'
-                            AND ? BETWEEN b.start_time AND b.end_time
-                        WHERE l.labID = ?
-                    """, (current_time, lab_id))
-
-                row = cursor.fetchone()
-                if row:
-                    return Lab(
-                        lab_id=str(row[0]),
-                        size=int(row[1]),
-                        location=str(row[2]),
-                        info=str(row[3]),
-                        is_available=bool(row[4]),
-                        created_at=datetime.strptime(row[5], '%Y-%m-%d %H:%M:%S') if row[5] else datetime.now()
-                    )
-                return None
+            rows, occupancy = occupancy_cache.snapshot()
+            for row in rows:
+                if str(row[0]) == str(lab_id):
+                    return LabManagement._lab_from_row(row, occupancy.get(str(row[0])) is not None)
+            return None
         except sqlite3.Error as e:
             print(f"Database error in get_lab: {e}")
             return None
@@ -125,27 +209,98 @@ class LabManagement:
     def get_available_labs(start_time: datetime, end_time: datetime) -> List[Lab]:
         """Get list of available labs for a specific time slot"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
+            with get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    SELECT l.* FROM labs l
-                    WHERE l.isAvailable = TRUE
-                    AND l.labID NOT IN (
-                        SELECT labID FROM lab_bookings
-                        WHERE (start_time <= ? AND end_time >= ?)
-                        OR (start_time <= ? AND end_time >= ?)
-                        AND status != 'cancelled'
-                    )
-                """, (end_time, start_time, end_time, start_time))
-                return [Lab(*row) for row in cursor.fetchall()]
-        except sqlite3.Error:
+                    SELECT labID, size, location, info, isAvailable, created_at
+                    FROM labs
+                    WHERE isAvailable = TRUE
+                    ORDER BY labID
+                """)
+                rows = cursor.fetchall()
+            return [
+                LabManagement._lab_from_row(row, occupied=False)
+                for row in rows
+                if booking_index.is_free(row[0], start_time, end_time)
+            ]
+        except sqlite3.Error as e:
+            print(f"Database error in get_available_labs: {e}")
+            return []
+
+    @staticmethod
+    def _free_gaps(lab_id: str, windows: List[Tuple[datetime, datetime]],
+                   duration: timedelta) -> Iterator[Tuple[datetime, datetime]]:
+        """Sweep the lab's approved bookings and yield (gap_start, gap_end)
+        for every gap of at least ``duration`` inside the given windows"""
+        for window_start, window_end in windows:
+            cursor = window_start
+            for booked_start, booked_end in booking_index.intervals_between(lab_id, window_start, window_end):
+                if booked_start - cursor >= duration:
+                    yield cursor, booked_start
+                cursor = max(cursor, booked_end)
+                if cursor >= window_end:
+                    break
+            if window_end - cursor >= duration:
+                yield cursor, window_end
+
+    @staticmethod
+    def find_free_slots(duration: timedelta, range_start: datetime, range_end: datetime,
+                        min_size: int = 0, location: Optional[str] = None, limit: int = 10,
+                        day_start: Optional[time] = None, day_end: Optional[time] = None) -> List[FreeSlot]:
+        """Earliest ``limit`` free slots across all labs.
+
+        Each lab's gaps come from one sweep over its sorted approved bookings;
+        the per-lab streams are merged by start time, so only as many gaps as
+        needed are produced. With ``day_start``/``day_end`` the search is
+        limited to those hours on each day of the range.
+        """
+        if duration <= timedelta(0) or range_end <= range_start or limit <= 0:
+            return []
+
+        if day_start is not None and day_end is not None:
+            windows = []
+            day = range_start.date()
+            while day <= range_end.date():
+                window = (max(range_start, datetime.combine(day, day_start)),
+                          min(range_end, datetime.combine(day, day_end)))
+                if window[1] > window[0]:
+                    windows.append(window)
+                day += timedelta(days=1)
+        else:
+            windows = [(range_start, range_end)]
+
+        try:
+            with get_connection() as conn:
+                cursor = conn.cursor()
+                query = """
+                    SELECT labID, size, location
+                    FROM labs
+                    WHERE isAvailable = TRUE
+                    AND size >= ?
+                """
+                params = [min_size]
+                if location:
+                    query += " AND location LIKE ?"
+                    params.append(f"%{location}%")
+                cursor.execute(query, params)
+                labs = cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Database error in find_free_slots: {e}")
             return []
 
+        def lab_slots(lab_id, size, lab_location):
+            for gap_start, gap_end in LabManagement._free_gaps(lab_id, windows, duration):
+                yield FreeSlot(str(lab_id), int(size), str(lab_location),
+                               gap_start, gap_start + duration, gap_end)
+
+        streams = [lab_slots(*lab) for lab in labs]
+        return list(islice(merge(*streams, key=lambda slot: (slot.start, slot.lab_id)), limit))
+
     @staticmethod
     def is_lab_available(lab_id: str, start_time: datetime, end_time: datetime) -> bool:
         """Check if a lab is available for a specific time slot"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
+            with get_connection() as conn:
                 cursor = conn.cursor()
 
                 # Check if lab exists and is generally available
@@ -159,25 +314,9 @@ class LabManagement:
                 if not lab_status or not lab_status[0]:
                     return False
 
-                # Format datetime objects correctly
-                start_str = start_time.strftime('%Y-%m-%d %H:%M:%S')
-                end_str = end_time.strftime('%Y-%m-%d %H:%M:%S')
-
-                # Check for booking conflicts
-                cursor.execute("""
-                        SELECT COUNT(*) 
-                        FROM lab_bookings 
-                        WHERE labID = ?
-                        AND status = 'approved'
-                        AND (
-                            (start_time <= ? AND end_time >= ?)
-                            OR (start_time <= ? AND end_time >= ?)
-                            OR (start_time >= ? AND end_time <= ?)
-                        )
-                    """, (lab_id, end_str, start_str, end_str, start_str, start_str, end_str))
-
-                count = cursor.fetchone()[0]
-                return count == 0
+            # Check for booking conflicts against the in-memory index
+            # (back-to-back bookings do not overlap)
+            return booking_index.is_free(lab_id, start_time, end_time)
 
         except sqlite3.Error as e:
             print(f"Database error in is_lab_available: {e}")
@@ -187,102 +326,174 @@ class LabManagement:
             return False
 
     @staticmethod
-    def book_lab(user_id: int, lab_id: str, start_time: datetime, end_time: datetime) -> bool:
-        """Book a lab with improved error handling"""
+    def book_lab(user_id: int, lab_id: str, start_time: datetime, end_time: datetime) -> BookingResult:
+        """Check for conflicts and create a pending booking in one transaction"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
+            start_str, end_str, start_ts, end_ts = booking_times(start_time, end_time)
 
-                # Format datetime objects
-                start_str = start_time.strftime('%Y-%m-%d %H:%M:%S')
-                end_str = end_time.strftime('%Y-%m-%d %H:%M:%S')
+            # BEGIN IMMEDIATE holds the write lock from the check to the insert,
+            # so two concurrent requests cannot both book the same slot
+            with transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT isAvailable FROM labs WHERE labID = ?", (lab_id,))
+                lab_status = cursor.fetchone()
+                if not lab_status or not lab_status[0]:
+                    return BookingResult(BookingOutcome.LAB_UNAVAILABLE)
 
-                # Check availability first
-                if not LabManagement.is_lab_available(lab_id, start_time, end_time):
-                    print("Lab not available for booking")
-                    return False
+                cursor.execute(BOOKING_CONFLICT_QUERY, (lab_id, end_ts, start_ts))
+                conflicts = [row[0] for row in cursor.fetchall()]
+                if conflicts:
+                    return BookingResult(BookingOutcome.CONFLICT, conflicts=conflicts)
 
-                # Create booking
                 cursor.execute("""
-                       INSERT INTO lab_bookings (userID, labID, start_time, end_time, status)
-                       VALUES (?, ?, ?, ?, 'pending')
-                   """, (user_id, lab_id, start_str, end_str))
+                    INSERT INTO lab_bookings (userID, labID, start_time, end_time, start_ts, end_ts, status)
+                    VALUES (?, ?, ?, ?, ?, ?, 'pending')
+                """, (user_id, lab_id, start_str, end_str, start_ts, end_ts))
+                booking_id = cursor.lastrowid
 
-                conn.commit()
-                return True
+            booking_index.sync_booking(booking_id)
+            live_updates.booking_changed(booking_id, user_id, lab_id, 'pending')
+            return BookingResult(BookingOutcome.BOOKED, booking_id=booking_id)
 
         except sqlite3.Error as e:
             print(f"Database error in book_lab: {e}")
-            return False
+            return BookingResult(BookingOutcome.ERROR)
         except Exception as e:
             print(f"Unexpected error in book_lab: {e}")
-            return False
+            return BookingResult(BookingOutcome.ERROR)
+
+    @staticmethod
+    def _match_conflicts(occurrences: List[Tuple[int, int]],
+                         existing: List[Tuple[int, int, int]]) -> List[List[int]]:
+        """Sorted merge of occurrences against existing (ID, start, end)
+        bookings, both sorted by start and in epoch seconds; returns the
+        conflicting booking IDs per occurrence"""
+        conflicts = []
+        active = []
+        i = 0
+        for occ_start, occ_end in occurrences:
+            while i < len(existing) and existing[i][1] < occ_end:
+                active.append(existing[i])
+                i += 1
+            active = [booking for booking in active if booking[2] > occ_start]
+            conflicts.append([booking[0] for booking in active])
+        return conflicts
+
+    @staticmethod
+    def book_recurring(user_id: int, lab_id: str, start_time: datetime, end_time: datetime,
+                       rule: RecurrenceRule, all_or_nothing: bool = False) -> RecurringBookingResult:
+        """Book every occurrence of a recurring series in one transaction.
+
+        Occurrences that clash with approved bookings are reported and skipped
+        (or, with ``all_or_nothing``, nothing is booked).
+        """
+        occurrences = rule.expand(start_time, end_time)
+        if not occurrences:
+            return RecurringBookingResult(BookingOutcome.CONFLICT)
+
+        epochs = [(to_epoch(occ_start), to_epoch(occ_end)) for occ_start, occ_end in occurrences]
+        try:
+            with transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT isAvailable FROM labs WHERE labID = ?", (lab_id,))
+                lab_status = cursor.fetchone()
+                if not lab_status or not lab_status[0]:
+                    return RecurringBookingResult(BookingOutcome.LAB_UNAVAILABLE)
+
+                # One range read covers the whole series
+                cursor.execute("""
+                    SELECT bookingID, start_ts, end_ts
+                    FROM lab_bookings
+                    WHERE labID = ?
+                    AND status = 'approved'
+                    AND start_ts < ?
+                    AND end_ts > ?
+                    ORDER BY start_ts
+                """, (lab_id, epochs[-1][1], epochs[0][0]))
+                existing = cursor.fetchall()
+
+                results = [OccurrenceResult(occ_start, occ_end, conflicts=occ_conflicts)
+                           for (occ_start, occ_end), occ_conflicts
+                           in zip(occurrences, LabManagement._match_conflicts(epochs, existing))]
+                to_book = [result for result in results if not result.conflicts]
+
+                if not to_book or (all_or_nothing and len(to_book) < len(results)):
+                    return RecurringBookingResult(BookingOutcome.CONFLICT, results)
+
+                cursor.executemany("""
+                    INSERT INTO lab_bookings (userID, labID, start_time, end_time, start_ts, end_ts, status)
+                    VALUES (?, ?, ?, ?, ?, ?, 'pending')
+                """, [(user_id, lab_id) + booking_times(result.start, result.end) for result in to_book])
+
+                # The write lock is held, so the new IDs are consecutive
+                last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+                for offset, result in enumerate(to_book):
+                    result.booking_id = last_id - len(to_book) + 1 + offset
+
+            for result in to_book:
+                live_updates.booking_changed(result.booking_id, user_id, lab_id, 'pending')
+            return RecurringBookingResult(BookingOutcome.BOOKED, results)
+
+        except sqlite3.Error as e:
+            print(f"Database error in book_recurring: {e}")
+            return RecurringBookingResult(BookingOutcome.ERROR)
 
     @staticmethod
     def update_lab_status(lab_id: str, is_available: bool) -> bool:
         """Update lab's general availability status"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
+            with get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                        UPDATE labs 
                        SET isAvailable = ? 
                        WHERE labID = ?
                    """, (is_available, lab_id))
-                return True
+            occupancy_cache.invalidate()
+            live_updates.labs_changed()
+            return True
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return False
 
     @staticmethod
-    def get_lab_schedule(lab_id: str) -> List[Dict]:
+    def get_lab_schedule(lab_id: str) -> List[Record]:
         """Get the schedule for a specific lab"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
+            with get_connection() as conn:
+                cursor = record_cursor(conn)
                 cursor.execute("""
                     SELECT lb.*, u.name
                     FROM lab_bookings lb
                     JOIN users u ON lb.userID = u.userID
                     WHERE lb.labID = ?
-                    AND lb.start_time >= datetime('now')
-                    ORDER BY lb.start_time
-                """, (lab_id,))
-                columns = [desc[0] for desc in cursor.description]
-                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+                    AND lb.start_ts >= ?
+                    ORDER BY lb.start_ts
+                """, (lab_id, now_epoch()))
+                return cursor.fetchall()
         except sqlite3.Error:
             return []
 
     @staticmethod
-    def get_user_bookings(user_id: int) -> List[Dict]:
+    def get_user_bookings(user_id: int, limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+        """One page of a user's bookings, newest first"""
+        limit = clamp_limit(limit)
+        start_ts, booking_id = decode_cursor(cursor, (MAX_ID, MAX_ID))
         try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT 
-                        lb.bookingID,
-                        lb.labID,
-                        lb.start_time,
-                        lb.end_time,
-                        lb.status,
-                        l.location,
-                        l.info
-                    FROM lab_bookings lb
-                    JOIN labs l ON lb.labID = l.labID
-                    WHERE lb.userID = ?
-                    ORDER BY lb.start_time DESC
-                """, (user_id,))
-                columns = [description[0] for description in cursor.description]
-                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            with get_connection() as conn:
+                db_cursor = record_cursor(conn)
+                db_cursor.execute(USER_BOOKINGS_QUERY, (user_id, start_ts, booking_id, limit + 1))
+                rows = db_cursor.fetchall()
+            return make_page(rows, limit, lambda row: (row['start_ts'], row['bookingID']))
         except sqlite3.Error as e:
             print(f"Database error: {e}")
-            return []
+            return Page(limit=limit)
 
     @staticmethod
-    def get_booking(booking_id: int) -> Optional[Dict]:
+    def get_booking(booking_id: int) -> Optional[Record]:
         try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
+            with get_connection() as conn:
+                cursor = record_cursor(conn)
                 cursor.execute("""
                     SELECT 
                         lb.*,
@@ -292,9 +503,7 @@ class LabManagement:
                     JOIN labs l ON lb.labID = l.labID
                     WHERE lb.bookingID = ?
                 """, (booking_id,))
-                columns = [description[0] for description in cursor.description]
-                row = cursor.fetchone()
-                return dict(zip(columns, row)) if row else None
+                return cursor.fetchone()
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
@@ -302,17 +511,10 @@ class LabManagement:
     @staticmethod
     def get_current_active_booking(user_id: int) -> Optional[Dict]:
         try:
-            current_time = datetime.now()
-            with sqlite3.connect('lab_management.db') as conn:
+            now = now_epoch()
+            with get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT bookingID, labID
-                    FROM lab_bookings
-                    WHERE userID = ?
-                    AND status = 'approved'
-                    AND start_time <= ?
-                    AND end_time >= ?
-                """, (user_id, current_time, current_time))
+                cursor.execute(ACTIVE_BOOKING_QUERY, (user_id, now, now))
                 result = cursor.fetchone()
                 return {'booking_id': result[0], 'lab_id': result[1]} if result else None
         except sqlite3.Error:
@@ -323,42 +525,49 @@ class LabManagement:
         """Update booking status (approve/reject)"""
         try:
             status = 'approved' if action == 'approve' else 'rejected'
-            with sqlite3.connect('lab_management.db') as conn:
+            with transaction() as conn:
                 cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT userID, labID, start_ts, end_ts
+                    FROM lab_bookings
+                    WHERE bookingID = ?
+                """, (booking_id,))
+                booking = cursor.fetchone()
+                if not booking:
+                    return False
+                user_id, lab_id, start_ts, end_ts = booking
+                if status == 'approved':
+                    # Refuse to approve over an already approved booking
+                    cursor.execute(BOOKING_CONFLICT_QUERY, (lab_id, end_ts, start_ts))
+                    if any(row[0] != booking_id for row in cursor.fetchall()):
+                        print(f"Booking {booking_id} conflicts with an approved booking")
+                        return False
+
                 cursor.execute("""
                     UPDATE lab_bookings 
                     SET status = ? 
                     WHERE bookingID = ?
                 """, (status, booking_id))
-                conn.commit()
-                return True
+
+            booking_index.sync_booking(booking_id)
+            live_updates.booking_changed(booking_id, user_id, lab_id, status)
+            return True
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return False
 
 
     @staticmethod
-    def get_all_bookings() -> List[Dict]:
-        """Get all bookings with user and lab details"""
+    def get_all_bookings(limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+        """One page of all bookings with user and lab details, newest first"""
+        limit = clamp_limit(limit)
+        start_ts, booking_id = decode_cursor(cursor, (MAX_ID, MAX_ID))
         try:
-            with sqlite3.connect('lab_management.db') as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT 
-                        lb.bookingID,
-                        lb.userID,
-                        lb.labID,
-                        lb.start_time,
-                        lb.end_time,
-                        lb.status,
-                        l.location,
-                        l.size
-                    FROM lab_bookings lb
-                    JOIN labs l ON lb.labID = l.labID
-                    ORDER BY lb.start_time DESC
-                """)
-                columns = [description[0] for description in cursor.description]
-                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            with get_connection() as conn:
+                db_cursor = record_cursor(conn)
+                db_cursor.execute(ALL_BOOKINGS_QUERY, (start_ts, booking_id, limit + 1))
+                rows = db_cursor.fetchall()
+            return make_page(rows, limit, lambda row: (row['start_ts'], row['bookingID']))
         except sqlite3.Error as e:
             print(f"Database error: {e}")
-        return []
\ No newline at end of file
+        return Page(limit=limit)
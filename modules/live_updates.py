@@ -0,0 +1,162 @@
+import json
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from .occupancy import occupancy_cache
+
+
+@dataclass(frozen=True)
+class LiveEvent:
+    """One server-sent event; ``user_id`` None means every subscriber"""
+    id: int
+    name: str
+    data: Dict
+    user_id: Optional[str] = None
+
+    def encode(self) -> str:
+        return f"id: {self.id}\nevent: {self.name}\ndata: {json.dumps(self.data, separators=(',', ':'))}\n\n"
+
+
+class LiveUpdates:
+    """In-process broadcaster of lab occupancy and booking status changes.
+
+    Events go into one shared, bounded log guarded by a condition variable;
+    every subscriber waits on it and reads what is newer than the last event
+    it saw, so an idle subscriber costs a sleeping thread, not a query.
+    A single producer thread watches occupancy: it sleeps until the next
+    booking start or end (the occupancy cache's next boundary) or until a
+    booking or lab changes, then publishes only the labs whose state moved.
+    Subscribers that fall further behind than the log get a 'resync' event.
+    """
+
+    def __init__(self, backlog: int = 1000, max_sleep: float = 60.0):
+        self.max_sleep = max_sleep
+        self._events: 'deque[LiveEvent]' = deque(maxlen=backlog)
+        self._last_id = 0
+        self._changed = threading.Condition()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._available: Optional[Dict[str, bool]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def publish(self, name: str, data: Dict, user_id=None) -> LiveEvent:
+        with self._changed:
+            self._last_id += 1
+            event = LiveEvent(self._last_id, name, data, None if user_id is None else str(user_id))
+            self._events.append(event)
+            self._changed.notify_all()
+        return event
+
+    def booking_changed(self, booking_id: int, user_id, lab_id: str, status: str) -> None:
+        """Tell the booking's owner, and re-check occupancy (an approval may
+        have made a lab busy right now)"""
+        self.publish('booking', {'booking_id': booking_id, 'lab_id': lab_id, 'status': status}, user_id)
+        self._wake.set()
+
+    def labs_changed(self) -> None:
+        """Re-check occupancy after a lab is added or its status changes"""
+        self._wake.set()
+
+    @staticmethod
+    def _lab_availability() -> Dict[str, bool]:
+        rows, occupancy = occupancy_cache.snapshot()
+        return {str(row[0]): bool(row[4]) and occupancy.get(str(row[0])) is None for row in rows}
+
+    def availability(self) -> Dict[str, bool]:
+        """Current lab_id -> available, as /labs/view shows it"""
+        return self._lab_availability()
+
+    def check_occupancy(self) -> List[LiveEvent]:
+        """Publish an 'occupancy' event for every lab whose availability changed"""
+        current = self._lab_availability()
+        previous, self._available = self._available, current
+        if previous is None:
+            return []
+        return [self.publish('occupancy', {'lab_id': lab_id, 'available': available})
+                for lab_id, available in current.items() if previous.get(lab_id) != available]
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.check_occupancy()
+            except Exception as e:
+                logging.warning(f"Live occupancy check failed: {e}")
+            timeout = self.max_sleep
+            valid_until = occupancy_cache.next_change()
+            if valid_until is not None:
+                timeout = min(timeout, max(0.0, (valid_until - datetime.now()).total_seconds()))
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def start(self) -> None:
+        """Start the producer thread (idempotent)"""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='live-updates', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        with self._changed:
+            self._changed.notify_all()
+
+    @property
+    def last_event_id(self) -> int:
+        with self._changed:
+            return self._last_id
+
+    def _newer(self, after: int) -> List[LiveEvent]:
+        newer = []
+        for event in reversed(self._events):
+            if event.id <= after:
+                break
+            newer.append(event)
+        newer.reverse()
+        return newer
+
+    def events(self, user_id, after: Optional[int] = None,
+               keepalive: float = 15.0) -> Iterator[Optional[LiveEvent]]:
+        """Events for ``user_id`` newer than ``after`` (default: from now),
+        as they happen; yields None after ``keepalive`` seconds of silence.
+
+        An ``after`` this log cannot continue from (newer than the last event,
+        e.g. from before a restart, or older than the oldest kept) starts the
+        stream with a 'resync' event.
+        """
+        user_id = str(user_id)
+        self.start()
+        with self._changed:
+            oldest = self._events[0].id if self._events else self._last_id + 1
+            resync = after is not None and (after > self._last_id or after + 1 < oldest)
+            after = self._last_id if after is None or resync else after
+        if resync:
+            yield LiveEvent(after, 'resync', {})
+        while not self._stop.is_set():
+            with self._changed:
+                if self._last_id == after:
+                    self._changed.wait(keepalive)
+                batch = self._newer(after)
+                oldest = self._events[0].id if self._events else self._last_id + 1
+            if not batch:
+                yield None
+                continue
+            if oldest > after + 1:
+                # Missed events fell out of the log
+                yield LiveEvent(batch[-1].id, 'resync', {})
+                after = batch[-1].id
+                continue
+            for event in batch:
+                if event.user_id is None or event.user_id == user_id:
+                    yield event
+            after = batch[-1].id
+
+
+live_updates = LiveUpdates()
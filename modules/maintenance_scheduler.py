@@ -0,0 +1,284 @@
+import sys
+import heapq
+import logging
+import argparse
+import threading
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .database import get_connection, transaction
+from .timestamps import format_datetime, from_epoch, now_epoch
+
+# Schedules that are due, with what firing them needs. {selection} narrows
+# the rows further (e.g. to the schedule IDs popped from the heap).
+DUE_SCHEDULES_QUERY = """
+    SELECT
+        ms.scheduleID,
+        ms.equipID,
+        ms.due_ts,
+        ms.notes,
+        e.equipType,
+        e.status
+    FROM maintenance_schedule ms
+    LEFT JOIN equipment e ON ms.equipID = e.equipID
+    WHERE ms.status = 'scheduled'
+    AND ms.due_ts <= :now
+    {selection}
+    ORDER BY ms.due_ts, ms.scheduleID
+    LIMIT :limit
+"""
+
+# Pending schedules in [start, horizon), plus ones inserted since the last
+# load (IDs in (last_id, max_id]) that fall before the horizon; both are
+# index seeks, so a load never scans the table
+UPCOMING_SCHEDULES_QUERY = """
+    SELECT scheduleID, due_ts
+    FROM maintenance_schedule
+    WHERE status = 'scheduled'
+    AND due_ts >= :start AND due_ts < :horizon
+    UNION
+    SELECT scheduleID, due_ts
+    FROM maintenance_schedule
+    WHERE scheduleID > :last_id AND scheduleID <= :max_id
+    AND status = 'scheduled'
+    AND due_ts < :horizon
+"""
+
+MIN_EPOCH = -2 ** 63
+
+
+@dataclass(frozen=True)
+class SchedulerPolicy:
+    """Recurrence and timing of preventive maintenance.
+
+    When a schedule fires and its equipment type has an interval, the next
+    one is booked ``interval`` after it (skipping occurrences missed during
+    downtime, so catching up never opens a backlog of duplicates).
+    """
+    intervals: Tuple[Tuple[str, timedelta], ...] = (
+        ('Server', timedelta(days=30)),
+        ('Network', timedelta(days=60)),
+        ('Printer', timedelta(days=60)),
+        ('Computer', timedelta(days=90)),
+        ('Projector', timedelta(days=90)),
+    )
+    lookahead: timedelta = timedelta(hours=1)  # how far ahead the heap is loaded
+    poll_interval: float = 60.0  # longest sleep between ticks, in seconds
+    batch_size: int = 500
+
+
+DEFAULT_SCHEDULER_POLICY = SchedulerPolicy()
+
+
+class MaintenanceScheduler:
+    """Fires due rows of ``maintenance_schedule``.
+
+    Upcoming schedules sit in a heap of (due_ts, scheduleID) covering the
+    next ``lookahead``; each tick pops what is due and fires it in one
+    transaction. Firing a schedule opens an ``equipment_issues`` work item,
+    marks the equipment 'maintenance_required' and moves the schedule to
+    'issued'. Due rows are re-read (status 'scheduled') under the write lock
+    of that transaction, so an in-process scheduler and a standalone worker
+    can run side by side without firing anything twice.
+    """
+
+    def __init__(self, policy: SchedulerPolicy = DEFAULT_SCHEDULER_POLICY):
+        self.policy = policy
+        self._intervals = {equip_type: int(interval.total_seconds())
+                           for equip_type, interval in policy.intervals}
+        self._heap: List[Tuple[int, int]] = []
+        self._queued = set()
+        self._horizon = MIN_EPOCH  # every pending schedule due before this is in the heap
+        self._last_id = 0  # highest scheduleID seen by a load
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _next_due(self, equip_type: str, due_ts: int, now: int) -> Optional[int]:
+        interval = self._intervals.get(equip_type)
+        if not interval:
+            return None
+        return due_ts + interval * ((now - due_ts) // interval + 1)
+
+    def _fire(self, conn, now: int, selection: str = '', params: Optional[Dict] = None) -> int:
+        """Fire up to ``batch_size`` due schedules matching ``selection``"""
+        rows = conn.execute(DUE_SCHEDULES_QUERY.format(selection=selection), {
+            'now': now, 'limit': self.policy.batch_size, **(params or {})}).fetchall()
+        if not rows:
+            return 0
+        live = [row for row in rows if row[4] is not None and row[5] != 'removed']
+        cancelled = [(row[0],) for row in rows if row[4] is None or row[5] == 'removed']
+        conn.executemany("""
+            UPDATE maintenance_schedule
+            SET status = 'cancelled'
+            WHERE scheduleID = ? AND status = 'scheduled'
+        """, cancelled)
+        if live:
+            conn.executemany("""
+                INSERT INTO equipment_issues (equipID, description, report_date)
+                VALUES (?, ?, datetime('now'))
+            """, [(equip_id, f"Preventive maintenance: {notes}" if notes else "Preventive maintenance")
+                  for _, equip_id, _, notes, _, _ in live])
+            # The transaction holds the write lock, so the new issue IDs are
+            # the consecutive run ending at last_insert_rowid()
+            last_id, = conn.execute("SELECT last_insert_rowid()").fetchone()
+            issue_ids = range(last_id - len(live) + 1, last_id + 1)
+            conn.executemany("""
+                UPDATE maintenance_schedule
+                SET status = 'issued',
+                    issueID = ?
+                WHERE scheduleID = ? AND status = 'scheduled'
+            """, [(issue_id, row[0]) for issue_id, row in zip(issue_ids, live)])
+            conn.executemany("""
+                UPDATE equipment
+                SET status = 'maintenance_required'
+                WHERE equipID = ?
+            """, [(row[1],) for row in live])
+            upcoming = []
+            for schedule_id, equip_id, due_ts, notes, equip_type, _ in live:
+                next_due = self._next_due(equip_type, due_ts, now)
+                if next_due is not None:
+                    upcoming.append((equip_id, format_datetime(from_epoch(next_due)), next_due, notes))
+            conn.executemany("""
+                INSERT INTO maintenance_schedule (equipID, scheduled_date, due_ts, status, notes)
+                VALUES (?, ?, ?, 'scheduled', ?)
+            """, upcoming)
+        return len(rows)
+
+    def catch_up(self, now: Optional[int] = None) -> int:
+        """Fire every overdue schedule, a batch per transaction, e.g. after
+        downtime; returns how many schedules were handled"""
+        now = now_epoch() if now is None else now
+        handled = 0
+        while True:
+            with transaction() as conn:
+                count = self._fire(conn, now)
+            handled += count
+            if count < self.policy.batch_size:
+                break
+        if handled:
+            logging.info(f"Maintenance scheduler caught up {handled} schedule(s)")
+        return handled
+
+    def load(self, now: Optional[int] = None) -> int:
+        """Extend the heap to ``now + lookahead``; returns how many schedules
+        were added"""
+        now = now_epoch() if now is None else now
+        horizon = max(self._horizon, now + int(self.policy.lookahead.total_seconds()))
+        with get_connection() as conn:
+            max_id, = conn.execute("SELECT COALESCE(MAX(scheduleID), 0) FROM maintenance_schedule").fetchone()
+            # The first load's time window already covers every ID
+            last_id = max_id if self._horizon == MIN_EPOCH else self._last_id
+            rows = conn.execute(UPCOMING_SCHEDULES_QUERY, {
+                'start': self._horizon, 'horizon': horizon,
+                'last_id': last_id, 'max_id': max_id}).fetchall()
+        added = 0
+        with self._lock:
+            for schedule_id, due_ts in rows:
+                if schedule_id not in self._queued:
+                    heapq.heappush(self._heap, (due_ts, schedule_id))
+                    self._queued.add(schedule_id)
+                    added += 1
+            self._horizon = horizon
+            self._last_id = max_id
+        return added
+
+    def _pop_due(self, now: int) -> List[Tuple[int, int]]:
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                self._queued.discard(entry[1])
+                due.append(entry)
+        return due
+
+    def _requeue(self, entries: List[Tuple[int, int]]) -> None:
+        """Put popped (due_ts, scheduleID) entries back, e.g. after a failed firing"""
+        with self._lock:
+            for entry in entries:
+                if entry[1] not in self._queued:
+                    heapq.heappush(self._heap, entry)
+                    self._queued.add(entry[1])
+
+    def run_pending(self, now: Optional[int] = None) -> int:
+        """One tick: load what came into range and fire what is due.
+
+        If a firing transaction fails (busy timeout, lock) its batch and the
+        ones after it go back on the heap for the next tick, since load()
+        never revisits schedules due before its horizon.
+        """
+        now = now_epoch() if now is None else now
+        self.load(now)
+        due = self._pop_due(now)
+        fired = 0
+        for start in range(0, len(due), self.policy.batch_size):
+            batch = [schedule_id for _, schedule_id in due[start:start + self.policy.batch_size]]
+            params = {f's{index}': schedule_id for index, schedule_id in enumerate(batch)}
+            try:
+                with transaction() as conn:
+                    fired += self._fire(conn, now,
+                                        f"AND ms.scheduleID IN ({', '.join(':' + name for name in params)})",
+                                        params)
+            except Exception:
+                self._requeue(due[start:])
+                raise
+        if fired:
+            logging.info(f"Maintenance scheduler fired {fired} schedule(s)")
+        return fired
+
+    def seconds_until_next(self, now: Optional[int] = None) -> float:
+        """How long the worker may sleep before the next tick"""
+        now = now_epoch() if now is None else now
+        with self._lock:
+            if self._heap:
+                return max(0.0, min(self.policy.poll_interval, self._heap[0][0] - now))
+        return self.policy.poll_interval
+
+    def run_forever(self) -> None:
+        self.catch_up()
+        while not self._stop.is_set():
+            try:
+                self.run_pending()
+            except Exception as e:
+                logging.warning(f"Maintenance scheduler tick failed: {e}")
+            self._stop.wait(self.seconds_until_next())
+
+    def start(self) -> None:
+        """Run the scheduler on a daemon thread of this process"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name='maintenance-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+maintenance_scheduler = MaintenanceScheduler()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Fire scheduled preventive maintenance")
+    parser.add_argument('--once', action='store_true',
+                        help="catch up overdue schedules, run one tick and exit")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.once:
+        handled = maintenance_scheduler.catch_up() + maintenance_scheduler.run_pending()
+        print(f"Handled {handled} schedule(s)")
+        return 0
+    try:
+        maintenance_scheduler.run_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,522 @@
+import ast
+import json
+import sqlite3
+import sys
+import logging
+from dataclasses import dataclass
+from typing import Callable, List, Dict, Tuple, Union
+
+from .database import get_connection
+
+# A migration step is either a tuple of SQL statements or a callable that
+# receives the open connection (for changes that depend on the current schema).
+MigrationStep = Union[Tuple[str, ...], Callable[[sqlite3.Connection], None]]
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    step: MigrationStep
+
+
+def _add_missing_columns(conn: sqlite3.Connection, table: str, columns: Dict[str, str]) -> None:
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for column, definition in columns.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _reconcile_columns(conn: sqlite3.Connection) -> None:
+    # Databases created by the old database_setup.py lack the columns the
+    # modules write to.
+    _add_missing_columns(conn, 'equipment_issues', {
+        'reported_by': 'INTEGER REFERENCES users(userID)',
+        'resolution': 'TEXT',
+        'resolved_by': 'INTEGER REFERENCES users(userID)',
+    })
+    _add_missing_columns(conn, 'equipment_requests', {
+        'equipment_type': 'TEXT',
+        'quantity': 'INTEGER',
+    })
+
+
+def _epoch_booking_times(conn: sqlite3.Connection) -> None:
+    # Integer copies of the booking times for range predicates; the text
+    # columns stay for display and exports. strftime('%s') treats the stored
+    # wall-clock text as UTC, matching modules.timestamps.to_epoch.
+    _add_missing_columns(conn, 'lab_bookings', {
+        'start_ts': 'INTEGER',
+        'end_ts': 'INTEGER',
+    })
+    conn.execute("""
+        UPDATE lab_bookings
+        SET start_ts = CAST(strftime('%s', start_time) AS INTEGER),
+            end_ts = CAST(strftime('%s', end_time) AS INTEGER)
+    """)
+    # Writers in modules/ bind both forms; these keep rows written by other
+    # tools (or by hand) consistent
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_lab_bookings_ts_insert
+        AFTER INSERT ON lab_bookings
+        WHEN NEW.start_ts IS NULL OR NEW.end_ts IS NULL
+        BEGIN
+            UPDATE lab_bookings
+            SET start_ts = CAST(strftime('%s', NEW.start_time) AS INTEGER),
+                end_ts = CAST(strftime('%s', NEW.end_time) AS INTEGER)
+            WHERE bookingID = NEW.bookingID;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_lab_bookings_ts_update
+        AFTER UPDATE OF start_time, end_time ON lab_bookings
+        BEGIN
+            UPDATE lab_bookings
+            SET start_ts = CAST(strftime('%s', NEW.start_time) AS INTEGER),
+                end_ts = CAST(strftime('%s', NEW.end_time) AS INTEGER)
+            WHERE bookingID = NEW.bookingID;
+        END
+    """)
+    for index in ('idx_lab_bookings_lab_status_time', 'idx_lab_bookings_user_start',
+                  'idx_lab_bookings_start'):
+        conn.execute(f"DROP INDEX IF EXISTS {index}")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_lab_bookings_lab_status_ts
+        ON lab_bookings(labID, status, start_ts, end_ts)
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_lab_bookings_user_start_ts ON lab_bookings(userID, start_ts)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_lab_bookings_start_ts ON lab_bookings(start_ts)")
+    conn.execute("ANALYZE lab_bookings")
+
+
+def _maintenance_claims(conn: sqlite3.Connection) -> None:
+    # Staff claim open issues from the maintenance queue for a lease period
+    # (claim_expires is in epoch seconds, see modules.timestamps)
+    _add_missing_columns(conn, 'equipment_issues', {
+        'claimed_by': 'INTEGER REFERENCES users(userID)',
+        'claim_expires': 'INTEGER',
+    })
+    # Repeat-failure counts of the queue look up earlier issues per item
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_equipment_issues_equip_date
+        ON equipment_issues(equipID, report_date)
+    """)
+
+
+def _maintenance_schedule_due(conn: sqlite3.Connection) -> None:
+    # The preventive maintenance scheduler reads due schedules by epoch
+    # second and links each fired schedule to the issue it opened
+    _add_missing_columns(conn, 'maintenance_schedule', {
+        'due_ts': 'INTEGER',
+        'issueID': 'INTEGER REFERENCES equipment_issues(issueID)',
+    })
+    conn.execute("""
+        UPDATE maintenance_schedule
+        SET due_ts = CAST(strftime('%s', scheduled_date) AS INTEGER)
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_maintenance_schedule_due_insert
+        AFTER INSERT ON maintenance_schedule
+        WHEN NEW.due_ts IS NULL
+        BEGIN
+            UPDATE maintenance_schedule
+            SET due_ts = CAST(strftime('%s', NEW.scheduled_date) AS INTEGER)
+            WHERE scheduleID = NEW.scheduleID;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_maintenance_schedule_due_update
+        AFTER UPDATE OF scheduled_date ON maintenance_schedule
+        BEGIN
+            UPDATE maintenance_schedule
+            SET due_ts = CAST(strftime('%s', NEW.scheduled_date) AS INTEGER)
+            WHERE scheduleID = NEW.scheduleID;
+        END
+    """)
+    # Only pending schedules are ever looked up by time
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_maintenance_schedule_due
+        ON maintenance_schedule(due_ts)
+        WHERE status = 'scheduled'
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_maintenance_schedule_issue
+        ON maintenance_schedule(issueID)
+        WHERE issueID IS NOT NULL
+    """)
+
+
+def _summary_counters(conn: sqlite3.Connection) -> None:
+    # Trigger-maintained counts behind modules.summary.get_summary()
+    from .summary import install
+    install(conn)
+
+
+def _data_versions(conn: sqlite3.Connection) -> None:
+    # Trigger-maintained change counters behind ETags and the page cache
+    from .data_versions import install
+    install(conn)
+
+
+def _notification_digests(conn: sqlite3.Connection) -> None:
+    # Notification details used to be str(dict); store them as JSON so
+    # digests can coalesce them in SQL
+    rows = conn.execute("""
+        SELECT id, equipment_details FROM it_staff_notifications
+        WHERE NOT json_valid(equipment_details)
+    """).fetchall()
+    updates = []
+    for notification_id, text in rows:
+        try:
+            details = ast.literal_eval(text)
+        except (ValueError, SyntaxError):
+            details = None
+        if not isinstance(details, dict):
+            details = {'text': text}
+        updates.append((json.dumps(details, default=str), notification_id))
+    conn.executemany("UPDATE it_staff_notifications SET equipment_details = ? WHERE id = ?", updates)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS it_staff_digests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            staff_id INTEGER NOT NULL,
+            created_ts INTEGER NOT NULL,
+            first_notification_id INTEGER NOT NULL,
+            last_notification_id INTEGER NOT NULL,
+            item_count INTEGER NOT NULL,
+            body TEXT NOT NULL,
+            read_ts INTEGER
+        )
+    """)
+    # Each staff member's watermark and latest digests are one seek
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_it_staff_digests_staff
+        ON it_staff_digests(staff_id, last_notification_id)
+    """)
+
+
+def _purchase_lifecycle(conn: sqlite3.Connection) -> None:
+    # One date per lifecycle step (see equipment_management.PURCHASE_TRANSITIONS)
+    _add_missing_columns(conn, 'purchase_requests', {
+        'order_date': 'DATETIME',
+        'delivery_date': 'DATETIME',
+        'provisioned_date': 'DATETIME',
+    })
+    # Purchases whose equipment was added used to be marked 'completed'
+    conn.execute("UPDATE purchase_requests SET status = 'provisioned' WHERE status = 'completed'")
+
+
+def _booking_changes(conn: sqlite3.Connection) -> None:
+    # Change log behind modules.booking_index.BookingIntervalIndex.sync()
+    from .booking_index import install
+    install(conn)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, 'baseline_schema', (
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            userID INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            role TEXT NOT NULL,
+            contact_info TEXT,
+            password_hash TEXT NOT NULL,
+            major TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS labs (
+            labID TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            location TEXT NOT NULL,
+            info TEXT,
+            isAvailable BOOLEAN DEFAULT TRUE,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS equipment (
+            equipID INTEGER PRIMARY KEY AUTOINCREMENT,
+            equipType TEXT NOT NULL,
+            status TEXT DEFAULT 'operational',
+            last_checked DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS lab_bookings (
+            bookingID INTEGER PRIMARY KEY AUTOINCREMENT,
+            userID INTEGER,
+            labID TEXT,
+            start_time DATETIME,
+            end_time DATETIME,
+            status TEXT DEFAULT 'pending',
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (userID) REFERENCES users(userID),
+            FOREIGN KEY (labID) REFERENCES labs(labID)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS equipment_requests (
+            requestID INTEGER PRIMARY KEY AUTOINCREMENT,
+            userID INTEGER,
+            equipID INTEGER,
+            request_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'pending',
+            return_date DATETIME,
+            equipment_type TEXT,
+            quantity INTEGER,
+            FOREIGN KEY (userID) REFERENCES users(userID),
+            FOREIGN KEY (equipID) REFERENCES equipment(equipID)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS maintenance_schedule (
+            scheduleID INTEGER PRIMARY KEY AUTOINCREMENT,
+            equipID INTEGER,
+            scheduled_date DATETIME,
+            status TEXT DEFAULT 'scheduled',
+            completed_date DATETIME,
+            notes TEXT,
+            FOREIGN KEY (equipID) REFERENCES equipment(equipID)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS equipment_issues (
+            issueID INTEGER PRIMARY KEY AUTOINCREMENT,
+            equipID INTEGER,
+            description TEXT,
+            report_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+            resolved_date DATETIME,
+            reported_by INTEGER,
+            resolution TEXT,
+            resolved_by INTEGER,
+            FOREIGN KEY (equipID) REFERENCES equipment(equipID),
+            FOREIGN KEY (reported_by) REFERENCES users(userID),
+            FOREIGN KEY (resolved_by) REFERENCES users(userID)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS equipment_removals (
+            removal_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            equipID INTEGER,
+            removed_by INTEGER,
+            removal_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+            reason TEXT,
+            FOREIGN KEY (equipID) REFERENCES equipment(equipID),
+            FOREIGN KEY (removed_by) REFERENCES users(userID)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS inventory_requests (
+            request_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            equipment_type TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            request_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'pending',
+            response_date DATETIME,
+            notes TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS purchase_requests (
+            purchase_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            equipment_type TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            status TEXT DEFAULT 'pending',
+            request_date DATETIME NOT NULL,
+            approval_date DATETIME,
+            requester_id INTEGER,
+            justification TEXT,
+            FOREIGN KEY (requester_id) REFERENCES users(userID)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS it_staff_notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            request_id INTEGER,
+            equipment_details TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',
+            notification_date DATETIME NOT NULL,
+            processed_date DATETIME,
+            processed_by INTEGER,
+            notes TEXT,
+            FOREIGN KEY (request_id) REFERENCES equipment_requests(request_id),
+            FOREIGN KEY (processed_by) REFERENCES users(userID)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_equipment_requests_status ON equipment_requests(status)",
+        "CREATE INDEX IF NOT EXISTS idx_purchase_requests_status ON purchase_requests(status)",
+        "CREATE INDEX IF NOT EXISTS idx_notifications_status ON it_staff_notifications(status)",
+    )),
+    Migration(2, 'reconcile_columns', _reconcile_columns),
+    Migration(3, 'hot_path_indexes', (
+        """
+        CREATE INDEX IF NOT EXISTS idx_lab_bookings_lab_status_time
+        ON lab_bookings(labID, status, start_time, end_time)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_lab_bookings_user_start
+        ON lab_bookings(userID, start_time)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_equipment_issues_open
+        ON equipment_issues(report_date)
+        WHERE resolved_date IS NULL
+        """,
+        "ANALYZE",
+    )),
+    Migration(4, 'keyset_pagination_indexes', (
+        # The rowid is the implicit last column, so these also cover the
+        # (time, id) keyset order of the listings
+        "CREATE INDEX IF NOT EXISTS idx_lab_bookings_start ON lab_bookings(start_time)",
+        "CREATE INDEX IF NOT EXISTS idx_equipment_issues_report_date ON equipment_issues(report_date)",
+        "CREATE INDEX IF NOT EXISTS idx_inventory_requests_date ON inventory_requests(request_date)",
+        "CREATE INDEX IF NOT EXISTS idx_purchase_requests_date ON purchase_requests(request_date)",
+    )),
+    Migration(5, 'epoch_booking_times', _epoch_booking_times),
+    Migration(6, 'maintenance_claims', _maintenance_claims),
+    Migration(7, 'maintenance_schedule_due', _maintenance_schedule_due),
+    Migration(8, 'summary_counters', _summary_counters),
+    Migration(9, 'data_versions', _data_versions),
+    Migration(10, 'notification_digests', _notification_digests),
+    Migration(11, 'purchase_lifecycle', _purchase_lifecycle),
+    Migration(12, 'booking_changes', _booking_changes),
+]
+
+
+def _ensure_version_table(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def applied_versions() -> List[int]:
+    """Versions already recorded in schema_migrations"""
+    with get_connection() as conn:
+        _ensure_version_table(conn)
+        return [row[0] for row in conn.execute(
+            "SELECT version FROM schema_migrations ORDER BY version")]
+
+
+def migrate() -> List[int]:
+    """Apply pending migrations in order; returns the versions applied.
+
+    Each migration runs in its own BEGIN IMMEDIATE transaction and re-checks
+    the version table, so concurrent workers starting up apply it once.
+    """
+    applied = []
+    with get_connection() as conn:
+        _ensure_version_table(conn)
+        conn.commit()
+        for migration in MIGRATIONS:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                done = conn.execute(
+                    "SELECT 1 FROM schema_migrations WHERE version = ?",
+                    (migration.version,)).fetchone()
+                if not done:
+                    if callable(migration.step):
+                        migration.step(conn)
+                    else:
+                        for statement in migration.step:
+                            conn.execute(statement)
+                    conn.execute(
+                        "INSERT INTO schema_migrations (version, name) VALUES (?, ?)",
+                        (migration.version, migration.name))
+                    applied.append(migration.version)
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                logging.error(f"Migration {migration.version} ({migration.name}) failed")
+                raise
+    for version in applied:
+        logging.info(f"Applied schema migration {version}")
+    return applied
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    name: str
+    sql: str
+    params: Union[tuple, dict]
+    index: str
+    alias: str  # how the indexed table appears in the plan
+
+
+def hot_queries() -> List[HotQuery]:
+    """Hot-path queries from modules/ and the index each one must use"""
+    from .lab_management import (BOOKING_CONFLICT_QUERY, USER_BOOKINGS_QUERY, ALL_BOOKINGS_QUERY,
+                                 ACTIVE_BOOKING_QUERY)
+    from .equipment_management import (OPEN_ISSUES_QUERY, MAINTENANCE_HISTORY_QUERY,
+                                       MAINTENANCE_QUEUE_POLICY, MAX_QUEUE_SIZE, _queue_params)
+    from .maintenance_scheduler import DUE_SCHEDULES_QUERY, UPCOMING_SCHEDULES_QUERY
+    from .inventory_management import PENDING_NOTIFICATIONS_QUERY
+    from .notifications import DIGEST_GROUPS_QUERY, LAST_DIGESTED_QUERY
+    from .pagination import MAX_TIMESTAMP, MAX_ID
+
+    now = 946684800  # 2000-01-01 00:00
+    return [
+        HotQuery('booking_conflict', BOOKING_CONFLICT_QUERY, ('LAB001', now, now),
+                 'idx_lab_bookings_lab_status_ts', 'lab_bookings'),
+        HotQuery('user_bookings', USER_BOOKINGS_QUERY, (1, MAX_ID, MAX_ID, 50),
+                 'idx_lab_bookings_user_start_ts', 'lb'),
+        HotQuery('all_bookings_page', ALL_BOOKINGS_QUERY, (MAX_ID, MAX_ID, 50),
+                 'idx_lab_bookings_start_ts', 'lb'),
+        HotQuery('maintenance_history_page', MAINTENANCE_HISTORY_QUERY, (MAX_TIMESTAMP, MAX_ID, 50),
+                 'idx_equipment_issues_report_date', 'ei'),
+        HotQuery('active_booking', ACTIVE_BOOKING_QUERY, (1, now, now),
+                 'idx_lab_bookings_user_start_ts', 'lab_bookings'),
+        HotQuery('open_issues', OPEN_ISSUES_QUERY, (),
+                 'idx_equipment_issues_open', 'ei'),
+        HotQuery('maintenance_queue', *_queue_params(MAINTENANCE_QUEUE_POLICY, True, MAX_QUEUE_SIZE),
+                 'idx_equipment_issues_open', 'ei'),
+        HotQuery('repeat_failures', *_queue_params(MAINTENANCE_QUEUE_POLICY, True, MAX_QUEUE_SIZE),
+                 'idx_equipment_issues_equip_date', 'past'),
+        HotQuery('due_schedules', DUE_SCHEDULES_QUERY.format(selection=''), {'now': now, 'limit': 500},
+                 'idx_maintenance_schedule_due', 'ms'),
+        HotQuery('upcoming_schedules', UPCOMING_SCHEDULES_QUERY,
+                 {'start': now, 'horizon': now + 3600, 'last_id': 0, 'max_id': 0},
+                 'idx_maintenance_schedule_due', 'maintenance_schedule'),
+        HotQuery('pending_notifications', PENDING_NOTIFICATIONS_QUERY, (MAX_ID, 50),
+                 'idx_notifications_status', 'it_staff_notifications'),
+        HotQuery('digest_groups', DIGEST_GROUPS_QUERY, {'after': 0, 'upto': MAX_ID},
+                 'idx_notifications_status', 'it_staff_notifications'),
+        HotQuery('last_digested', LAST_DIGESTED_QUERY, (1,),
+                 'idx_it_staff_digests_staff', 'it_staff_digests'),
+    ]
+
+
+def verify_query_plans() -> Dict[str, List[str]]:
+    """Run EXPLAIN QUERY PLAN over the hot queries.
+
+    Returns a mapping of query name to problems found; an empty list means
+    the query uses its index and does not scan its table.
+    """
+    results = {}
+    with get_connection() as conn:
+        for query in hot_queries():
+            details = [row[3] for row in conn.execute(
+                f"EXPLAIN QUERY PLAN {query.sql}", query.params)]
+            problems = []
+            if not any(query.index in detail for detail in details):
+                problems.append(f"does not use {query.index}: {details}")
+            if f"SCAN {query.alias}" in details:
+                problems.append(f"full table scan of {query.alias}")
+            results[query.name] = problems
+    return results
+
+
+if __name__ == '__main__':
+    versions = migrate()
+    print(f"Applied migrations: {versions}" if versions else "Schema is up to date")
+    if '--check-plans' in sys.argv:
+        failed = False
+        for name, problems in verify_query_plans().items():
+            print(f"{name}: {'OK' if not problems else '; '.join(problems)}")
+            failed = failed or bool(problems)
+        sys.exit(1 if failed else 0)
@@ -0,0 +1,235 @@
+import json
+import queue
+import atexit
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from time import monotonic
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .database import transaction
+from .timestamps import format_datetime, now_epoch
+
+INSERT_NOTIFICATION_QUERY = """
+    INSERT INTO it_staff_notifications
+    (request_id, equipment_details, status, notification_date)
+    VALUES (?, ?, 'pending', ?)
+"""
+
+# Pending notifications after a staff member's last digest, coalesced per
+# equipment type; an index range seek on (status, id)
+DIGEST_GROUPS_QUERY = """
+    SELECT
+        json_extract(equipment_details, '$.equipment_type') AS equipment_type,
+        COUNT(*) AS notifications,
+        SUM(CAST(json_extract(equipment_details, '$.quantity') AS INTEGER)) AS quantity,
+        MIN(id) AS first_id,
+        MAX(id) AS last_id
+    FROM it_staff_notifications
+    WHERE status = 'pending'
+    AND id > :after AND id <= :upto
+    GROUP BY 1
+    ORDER BY 1
+"""
+
+LAST_DIGESTED_QUERY = """
+    SELECT COALESCE(MAX(last_notification_id), 0)
+    FROM it_staff_digests
+    WHERE staff_id = ?
+"""
+
+
+@dataclass(frozen=True)
+class DigestGroup:
+    equipment_type: Optional[str]
+    notifications: int
+    quantity: int
+
+
+@dataclass
+class Digest:
+    """What one staff member was told in one interval"""
+    digest_id: int
+    staff_id: int
+    created_ts: int
+    first_notification_id: int
+    last_notification_id: int
+    item_count: int
+    groups: List[DigestGroup] = field(default_factory=list)
+    read_ts: Optional[int] = None
+
+    @classmethod
+    def from_row(cls, row) -> 'Digest':
+        body = json.loads(row['body'])
+        return cls(row['id'], row['staff_id'], row['created_ts'], row['first_notification_id'],
+                   row['last_notification_id'], row['item_count'],
+                   [DigestGroup(**group) for group in body['groups']], row['read_ts'])
+
+
+class NotificationPipeline:
+    """Takes IT-staff notifications off request threads.
+
+    ``submit`` only puts the notification on an in-memory queue (never
+    blocking; when the queue is full the notification is dropped and
+    counted). A background thread writes queued notifications in batches,
+    one transaction per batch, and every ``digest_interval`` seconds gives
+    each staff member one digest of what is pending since their last one.
+    Digests are written under the write lock after re-reading each staff
+    member's watermark, so pipelines in several processes never duplicate
+    one.
+    """
+
+    def __init__(self, batch_size: int = 200, linger: float = 0.2,
+                 digest_interval: float = 300.0, max_queued: int = 10000):
+        self.batch_size = batch_size
+        self.linger = linger
+        self.digest_interval = digest_interval
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()  # submit runs on request threads
+        self._queue: 'queue.Queue[Tuple]' = queue.Queue(maxsize=max_queued)
+        self._retry: List[Tuple] = []
+        self._recipients: Callable[[], Iterable] = lambda: ()
+        self._next_digest = monotonic() + digest_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._flush_lock = threading.Lock()
+
+    def submit(self, request_id: Optional[int], details: Dict) -> bool:
+        """Queue a notification; False if it had to be dropped"""
+        row = (request_id, json.dumps(details, default=str, separators=(',', ':')),
+               format_datetime(datetime.now()))
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+            logging.warning(f"Notification queue full, dropped notification for request {request_id}")
+            return False
+
+    def _take(self, first: Optional[Tuple] = None, wait: float = 0.0) -> List[Tuple]:
+        batch = [first] if first else []
+        deadline = monotonic() + wait
+        while len(batch) < self.batch_size:
+            try:
+                remaining = deadline - monotonic()
+                row = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is not None:  # None only wakes the thread (see stop)
+                batch.append(row)
+        return batch
+
+    def _write(self, batch: List[Tuple]) -> bool:
+        rows = self._retry + batch
+        if not rows:
+            return True
+        try:
+            with transaction() as conn:
+                conn.executemany(INSERT_NOTIFICATION_QUERY, rows)
+            self._retry = []
+            return True
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            # Kept for the next flush, up to the queue's own bound
+            self._retry = rows[-self._queue.maxsize:]
+            return False
+
+    def flush(self) -> int:
+        """Write everything queued so far; returns the number written"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take()
+                pending = len(self._retry) + len(batch)
+                if not pending or not self._write(batch):
+                    return written
+                written += pending
+
+    def send_digests(self, staff_ids: Optional[Iterable] = None) -> int:
+        """One digest per staff member with anything new; returns how many
+        were written"""
+        staff_ids = list(self._recipients() if staff_ids is None else staff_ids)
+        if not staff_ids:
+            return 0
+        written = 0
+        try:
+            with transaction() as conn:
+                upto = conn.execute("SELECT COALESCE(MAX(id), 0) FROM it_staff_notifications").fetchone()[0]
+                # Staff who were digested together share a watermark, so
+                # each distinct one is coalesced once
+                by_watermark: Dict[int, List] = {}
+                for staff_id in staff_ids:
+                    after = conn.execute(LAST_DIGESTED_QUERY, (staff_id,)).fetchone()[0]
+                    by_watermark.setdefault(after, []).append(staff_id)
+                created = now_epoch()
+                for after, members in by_watermark.items():
+                    groups = conn.execute(DIGEST_GROUPS_QUERY, {'after': after, 'upto': upto}).fetchall()
+                    if not groups:
+                        continue
+                    body = json.dumps({'groups': [
+                        {'equipment_type': row[0], 'notifications': row[1], 'quantity': row[2] or 0}
+                        for row in groups
+                    ]}, separators=(',', ':'))
+                    first_id = min(row[3] for row in groups)
+                    count = sum(row[1] for row in groups)
+                    conn.executemany("""
+                        INSERT INTO it_staff_digests
+                        (staff_id, created_ts, first_notification_id, last_notification_id, item_count, body)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, [(staff_id, created, first_id, upto, count, body) for staff_id in members])
+                    written += len(members)
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return 0
+        return written
+
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            timeout = self._next_digest - monotonic()
+            if self._retry:
+                # A failed batch is retried soon, not only when new work arrives
+                timeout = min(timeout, self.linger * 10)
+            try:
+                first = self._queue.get(timeout=max(0.0, timeout))
+            except queue.Empty:
+                first = None
+            if first is not None or self._retry:
+                with self._flush_lock:
+                    # Let a burst gather into one batch before writing it
+                    self._write(self._take(first, self.linger))
+            if monotonic() >= self._next_digest:
+                self._next_digest = monotonic() + self.digest_interval
+                try:
+                    self.send_digests()
+                except Exception as e:
+                    logging.warning(f"Notification digest failed: {e}")
+
+    def start(self, recipients: Optional[Callable[[], Iterable]] = None) -> None:
+        """Run the pipeline on a daemon thread; ``recipients`` returns the
+        IDs of the staff to digest"""
+        if recipients is not None:
+            self._recipients = recipients
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name='notification-pipeline', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the thread and write whatever is still queued"""
+        self._stop.set()
+        if self._thread:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                pass  # the thread is busy writing and will see _stop
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+
+notification_pipeline = NotificationPipeline()
@@ -0,0 +1,95 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .database import get_connection
+from .booking_index import booking_index
+from .data_versions import data_version
+
+
+class OccupancyCache:
+    """Current occupancy of every lab, served from memory.
+
+    Occupancy only changes when a booking starts or ends, or when bookings
+    change. The cache stores each lab's state together with the earliest
+    next boundary and recomputes only when that time passes, when the
+    booking index changes (its version moves), or after ``invalidate()``.
+    Writes from other processes reach it too: every snapshot lets the
+    booking index sync, and at most once per the index's ``sync_interval``
+    it re-reads the lab rows if the 'labs' data version has moved.
+    """
+
+    def __init__(self, max_age: timedelta = timedelta(seconds=60)):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._labs: Optional[List[tuple]] = None
+        self._labs_token: Optional[str] = None  # 'labs' data version of _labs
+        self._checked_at = 0.0
+        self._state: Dict[str, Optional[int]] = {}
+        self._valid_until: Optional[datetime] = None
+        self._index_version = None
+        self.recomputes = 0
+
+    def invalidate(self) -> None:
+        """Drop cached lab rows and occupancy (e.g. after a labs table change)"""
+        with self._lock:
+            self._labs = None
+            self._valid_until = None
+
+    @staticmethod
+    def _load_labs() -> List[tuple]:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT labID, size, location, info, isAvailable, created_at
+                FROM labs
+                ORDER BY labID
+            """)
+            return cursor.fetchall()
+
+    def _labs_changed(self) -> bool:
+        """Whether the 'labs' data version moved since the lab rows were read;
+        checked at most once per sync interval"""
+        if time.monotonic() - self._checked_at < booking_index.sync_interval:
+            return False
+        self._checked_at = time.monotonic()
+        token = data_version('labs').token
+        return bool(token) and token != self._labs_token
+
+    def _refresh(self, now: datetime) -> None:
+        if self._labs is None:
+            self._labs_token = data_version('labs').token
+            self._checked_at = time.monotonic()
+            self._labs = self._load_labs()
+        state = {}
+        valid_until = now + self.max_age
+        for row in self._labs:
+            lab_id = str(row[0])
+            state[lab_id], next_change = booking_index.state_at(lab_id, now)
+            if next_change is not None and next_change < valid_until:
+                valid_until = next_change
+        self._state = state
+        self._valid_until = valid_until
+        self._index_version = booking_index.version
+        self.recomputes += 1
+
+    def snapshot(self, now: Optional[datetime] = None) -> Tuple[List[tuple], Dict[str, Optional[int]]]:
+        """(lab rows, lab_id -> booking in progress or None), recomputed if stale"""
+        now = now or datetime.now()
+        booking_index.ensure_loaded()
+        with self._lock:
+            if self._labs_changed():
+                self._labs = None
+            if (self._labs is None or self._valid_until is None or now >= self._valid_until
+                    or self._index_version != booking_index.version):
+                self._refresh(now)
+            return self._labs, self._state
+
+    def next_change(self) -> Optional[datetime]:
+        """When the cached state expires"""
+        with self._lock:
+            return self._valid_until
+
+
+occupancy_cache = OccupancyCache()
@@ -0,0 +1,49 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    body: bytes
+    mimetype: str
+
+
+class PageCache:
+    """Rendered pages by ETag, least recently used evicted first.
+
+    The ETag already covers the route, the user and the data version, so
+    a stale page is never looked up again and simply ages out.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._pages: 'OrderedDict[str, CachedPage]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, etag: str) -> Optional[CachedPage]:
+        with self._lock:
+            page = self._pages.get(etag)
+            if page is None:
+                self.misses += 1
+                return None
+            self._pages.move_to_end(etag)
+            self.hits += 1
+            return page
+
+    def put(self, etag: str, page: CachedPage) -> None:
+        with self._lock:
+            self._pages[etag] = page
+            self._pages.move_to_end(etag)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+
+
+page_cache = PageCache()
@@ -0,0 +1,69 @@
+import base64
+import json
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional, Sequence
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Sort-key bounds used for the first page, so every page runs the same query
+MAX_TIMESTAMP = '9999-12-31 23:59:59'
+MAX_ID = 2 ** 63 - 1
+
+
+@dataclass
+class Page:
+    """One page of a keyset-paginated listing.
+
+    Iterates like the list it wraps, so templates can loop over it directly.
+    ``next_cursor`` is None on the last page.
+    """
+    items: List[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    limit: int = DEFAULT_PAGE_SIZE
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    """Page size within 1..MAX_PAGE_SIZE, DEFAULT_PAGE_SIZE when unset"""
+    if not limit:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def encode_cursor(values: Sequence) -> str:
+    """Opaque, URL-safe cursor for the sort key of the last row of a page"""
+    raw = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str], first_page_key: Sequence) -> list:
+    """Sort key stored in a cursor; ``first_page_key`` when the cursor is
+    missing or malformed"""
+    if not cursor:
+        return list(first_page_key)
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return list(first_page_key)
+    if not isinstance(values, list) or len(values) != len(first_page_key):
+        return list(first_page_key)
+    return values
+
+
+def make_page(rows: List[Any], limit: int, key: Callable[[Any], Sequence]) -> Page:
+    """Build a Page from up to ``limit + 1`` fetched rows; the extra row only
+    signals that another page exists"""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(key(rows[-1])) if has_more and rows else None
+    return Page(rows, next_cursor, limit)
@@ -0,0 +1,45 @@
+import sqlite3
+from typing import Any, Dict
+
+
+class Record(sqlite3.Row):
+    """Read-only query row, used as ``cursor.row_factory``.
+
+    Built in C by sqlite3 and backed by the row tuple plus the shared cursor
+    description, so a listed row costs far less than a dict per row. It
+    supports ``row['column']``, ``row.column``, ``row[0]``, ``keys()``,
+    ``get()`` and ``dict(row)``, which covers how templates and callers used
+    the dicts it replaces.
+    """
+    __slots__ = ()
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self[name]
+        except IndexError:
+            raise AttributeError(name) from None
+
+    def __contains__(self, key) -> bool:
+        return key in self.keys()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except IndexError:
+            return default
+
+    def items(self):
+        return zip(self.keys(), self)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(zip(self.keys(), self))
+
+    def __repr__(self) -> str:
+        return f"Record({self.as_dict()!r})"
+
+
+def record_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    """Cursor whose rows are Records"""
+    cursor = conn.cursor()
+    cursor.row_factory = Record
+    return cursor
@@ -0,0 +1,67 @@
+from datetime import datetime, date, timedelta
+from typing import Optional, List, Tuple, FrozenSet
+from dataclasses import dataclass
+
+from .error_handling import ValidationError
+
+FREQUENCIES = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(weeks=1),
+}
+
+# Upper bound on one series, so a typo in 'until' cannot create years of bookings
+MAX_OCCURRENCES = 200
+
+
+@dataclass(frozen=True)
+class RecurrenceRule:
+    """Repeat a booking every ``interval`` days or weeks.
+
+    The series ends at ``until`` (inclusive) or after ``count`` occurrences,
+    whichever comes first; dates in ``exceptions`` are skipped after counting,
+    like EXDATE in iCalendar.
+    """
+    frequency: str
+    interval: int = 1
+    until: Optional[date] = None
+    count: Optional[int] = None
+    exceptions: FrozenSet[date] = frozenset()
+
+    def __post_init__(self):
+        if self.frequency not in FREQUENCIES:
+            raise ValidationError(f"Unsupported frequency: {self.frequency}", 'INVALID_FREQUENCY')
+        if self.interval < 1:
+            raise ValidationError("Interval must be at least 1", 'INVALID_INTERVAL')
+        if self.until is None and self.count is None:
+            raise ValidationError("Either an end date or a count is required", 'MISSING_END')
+        if self.count is not None and self.count < 1:
+            raise ValidationError("Count must be at least 1", 'INVALID_COUNT')
+
+    @property
+    def step(self) -> timedelta:
+        return FREQUENCIES[self.frequency] * self.interval
+
+    def expand(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """All (start, end) occurrences of the series, in order"""
+        if end <= start:
+            raise ValidationError("End time must be after start time", 'INVALID_TIME_RANGE')
+        if end - start > self.step:
+            raise ValidationError("Occurrences of the series would overlap", 'OVERLAPPING_SERIES')
+
+        occurrences = []
+        generated = 0
+        current_start, current_end = start, end
+        while True:
+            if self.until is not None and current_start.date() > self.until:
+                break
+            if self.count is not None and generated >= self.count:
+                break
+            if generated >= MAX_OCCURRENCES:
+                raise ValidationError(
+                    f"A series may have at most {MAX_OCCURRENCES} occurrences", 'TOO_MANY_OCCURRENCES')
+            generated += 1
+            if current_start.date() not in self.exceptions:
+                occurrences.append((current_start, current_end))
+            current_start += self.step
+            current_end += self.step
+        return occurrences
@@ -0,0 +1,71 @@
+import json
+import dataclasses
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .pagination import Page
+from .records import Record
+
+
+@lru_cache(maxsize=None)
+def _dataclass_fields(cls: type) -> Tuple[str, ...]:
+    return tuple(f.name for f in dataclasses.fields(cls))
+
+
+def field_names(item: Any) -> Tuple[str, ...]:
+    """Columns of a Record or fields of a dataclass instance"""
+    if isinstance(item, Record):
+        return tuple(item.keys())
+    if dataclasses.is_dataclass(item):
+        return _dataclass_fields(type(item))
+    raise TypeError(f"Cannot serialize {type(item).__name__}")
+
+
+def _select(available: Sequence[str], fields: Optional[Sequence[str]]) -> Sequence[str]:
+    if not fields:
+        return available
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)} (available: {', '.join(available)})")
+    return fields
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat(sep=' ') if isinstance(value, datetime) else value.isoformat()
+    return value
+
+
+def serialize_items(items: Sequence[Any], fields: Optional[Sequence[str]] = None) -> List[Dict]:
+    """Dicts of ``fields`` (default: all) of Records or dataclass instances.
+
+    Items of one listing share their columns, so the projection is worked
+    out once from the first item: Records are read by column index (their
+    values are already JSON types), dataclasses by attribute.
+    """
+    if not items:
+        return []
+    first = items[0]
+    names = _select(field_names(first), fields)
+    if isinstance(first, Record):
+        columns = list(first.keys())
+        indexes = [(name, columns.index(name)) for name in names]
+        return [{name: row[index] for name, index in indexes} for row in items]
+    return [{name: _plain(getattr(item, name)) for name in names} for item in items]
+
+
+def serialize(value: Any, fields: Optional[Sequence[str]] = None) -> Any:
+    """JSON-ready form of a Page, list, Record or dataclass instance"""
+    if value is None:
+        return None
+    if isinstance(value, Page):
+        return {'items': serialize_items(value.items, fields), 'next_cursor': value.next_cursor}
+    if isinstance(value, (list, tuple)):
+        return serialize_items(value, fields)
+    return serialize_items([value], fields)[0]
+
+
+def dumps(payload: Any) -> str:
+    """Compact JSON text of a serialized payload"""
+    return json.dumps(payload, separators=(',', ':'), default=_plain)
@@ -0,0 +1,213 @@
+import sys
+import sqlite3
+import argparse
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .database import get_connection, transaction
+
+
+@dataclass(frozen=True)
+class CounterSpec:
+    """A row count of ``table`` grouped by ``key``, kept in summary_counters.
+
+    ``key`` and ``where`` are SQL expressions over ``{row}``, which is NEW or
+    OLD inside the triggers and the table itself when rebuilding, so the
+    triggers and the rebuild always count the same thing. ``columns`` are the
+    columns whose updates can move a row between keys.
+    """
+    name: str
+    table: str
+    key: str
+    where: str
+    columns: Tuple[str, ...]
+
+    def expr(self, sql: str, row: str) -> str:
+        return sql.format(row=row)
+
+
+COUNTERS: List[CounterSpec] = [
+    CounterSpec('equipment_status', 'equipment', "{row}.status", "1", ('status',)),
+    CounterSpec('open_issues', 'equipment_issues', "''", "{row}.resolved_date IS NULL", ('resolved_date',)),
+    CounterSpec('pending_bookings', 'lab_bookings', "{row}.labID", "{row}.status = 'pending'",
+                ('status', 'labID')),
+    CounterSpec('inventory_requests', 'inventory_requests', "{row}.status", "1", ('status',)),
+    CounterSpec('purchase_requests', 'purchase_requests', "{row}.status", "1", ('status',)),
+]
+
+SUMMARY_TABLE = """
+    CREATE TABLE IF NOT EXISTS summary_counters (
+        name TEXT NOT NULL,
+        key TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (name, key)
+    ) WITHOUT ROWID
+"""
+
+
+def _increment(spec: CounterSpec, row: str) -> str:
+    return f"""
+        INSERT INTO summary_counters (name, key, count)
+        SELECT '{spec.name}', COALESCE({spec.expr(spec.key, row)}, ''), 1
+        WHERE {spec.expr(spec.where, row)}
+        ON CONFLICT (name, key) DO UPDATE SET count = count + 1;
+    """
+
+
+def _decrement(spec: CounterSpec, row: str) -> str:
+    return f"""
+        UPDATE summary_counters
+        SET count = count - 1
+        WHERE name = '{spec.name}'
+        AND key = COALESCE({spec.expr(spec.key, row)}, '')
+        AND {spec.expr(spec.where, row)};
+    """
+
+
+def trigger_statements(spec: CounterSpec) -> List[str]:
+    """DDL of the insert, update and delete triggers maintaining ``spec``"""
+    prefix = f"trg_summary_{spec.name}"
+    return [
+        f"DROP TRIGGER IF EXISTS {prefix}_insert",
+        f"DROP TRIGGER IF EXISTS {prefix}_update",
+        f"DROP TRIGGER IF EXISTS {prefix}_delete",
+        f"""
+        CREATE TRIGGER {prefix}_insert AFTER INSERT ON {spec.table}
+        BEGIN {_increment(spec, 'NEW')} END
+        """,
+        f"""
+        CREATE TRIGGER {prefix}_update AFTER UPDATE OF {', '.join(spec.columns)} ON {spec.table}
+        BEGIN {_decrement(spec, 'OLD')} {_increment(spec, 'NEW')} END
+        """,
+        f"""
+        CREATE TRIGGER {prefix}_delete AFTER DELETE ON {spec.table}
+        BEGIN {_decrement(spec, 'OLD')} END
+        """,
+    ]
+
+
+def _recount(conn: sqlite3.Connection, spec: CounterSpec) -> Dict[str, int]:
+    key, where = spec.expr(spec.key, spec.table), spec.expr(spec.where, spec.table)
+    return dict(conn.execute(f"""
+        SELECT COALESCE({key}, ''), COUNT(*)
+        FROM {spec.table}
+        WHERE {where}
+        GROUP BY 1
+    """).fetchall())
+
+
+def install(conn: sqlite3.Connection) -> None:
+    """Create summary_counters and its triggers, then fill it"""
+    conn.execute(SUMMARY_TABLE)
+    for spec in COUNTERS:
+        for statement in trigger_statements(spec):
+            conn.execute(statement)
+    _rebuild(conn)
+
+
+def _rebuild(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM summary_counters")
+    for spec in COUNTERS:
+        conn.executemany("""
+            INSERT INTO summary_counters (name, key, count) VALUES (?, ?, ?)
+        """, [(spec.name, key, count) for key, count in _recount(conn, spec).items()])
+
+
+@dataclass
+class Summary:
+    """Headline counts, read from summary_counters"""
+    equipment_by_status: Dict[str, int] = field(default_factory=dict)
+    open_issues: int = 0
+    pending_bookings_by_lab: Dict[str, int] = field(default_factory=dict)
+    inventory_requests_by_status: Dict[str, int] = field(default_factory=dict)
+    purchase_requests_by_status: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_equipment(self) -> int:
+        return sum(count for status, count in self.equipment_by_status.items() if status != 'removed')
+
+    @property
+    def pending_bookings(self) -> int:
+        return sum(self.pending_bookings_by_lab.values())
+
+    @property
+    def pending_inventory_requests(self) -> int:
+        return self.inventory_requests_by_status.get('pending', 0)
+
+    @property
+    def pending_purchase_requests(self) -> int:
+        return self.purchase_requests_by_status.get('pending', 0)
+
+
+_SUMMARY_FIELDS = {
+    'equipment_status': 'equipment_by_status',
+    'pending_bookings': 'pending_bookings_by_lab',
+    'inventory_requests': 'inventory_requests_by_status',
+    'purchase_requests': 'purchase_requests_by_status',
+}
+
+
+def summary_from_rows(rows: Iterable[Sequence]) -> Summary:
+    """Summary of (name, key, count) rows of summary_counters"""
+    summary = Summary()
+    for name, key, count in rows:
+        if name == 'open_issues':
+            summary.open_issues = count
+        elif name in _SUMMARY_FIELDS:
+            getattr(summary, _SUMMARY_FIELDS[name])[key] = count
+    return summary
+
+
+def get_summary() -> Summary:
+    """Current counts; one read of the small summary_counters table"""
+    try:
+        with get_connection() as conn:
+            rows = conn.execute("SELECT name, key, count FROM summary_counters WHERE count <> 0").fetchall()
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+        return Summary()
+    return summary_from_rows(rows)
+
+
+def verify(repair: bool = False) -> Dict[str, Dict[str, Tuple[int, int]]]:
+    """Compare the counters with a recount of the tables.
+
+    Returns {counter: {key: (stored, actual)}} for every key that drifted;
+    with ``repair`` the counters are rebuilt from scratch either way.
+    """
+    drift = {}
+    with transaction() as conn:
+        stored = {}
+        for name, key, count in conn.execute("SELECT name, key, count FROM summary_counters"):
+            stored.setdefault(name, {})[key] = count
+        for spec in COUNTERS:
+            actual = _recount(conn, spec)
+            counts = stored.get(spec.name, {})
+            wrong = {key: (counts.get(key, 0), actual.get(key, 0))
+                     for key in counts.keys() | actual.keys()
+                     if counts.get(key, 0) != actual.get(key, 0)}
+            if wrong:
+                drift[spec.name] = wrong
+        if repair:
+            _rebuild(conn)
+    return drift
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check or rebuild the summary counters")
+    parser.add_argument('--rebuild', action='store_true', help="rebuild the counters from the tables")
+    args = parser.parse_args(argv)
+
+    drift = verify(repair=args.rebuild)
+    for name, keys in drift.items():
+        for key, (stored, actual) in sorted(keys.items()):
+            print(f"{name}[{key}]: stored {stored}, actual {actual}")
+    if args.rebuild:
+        print("Summary counters rebuilt")
+    elif not drift:
+        print("Summary counters are up to date")
+    return 1 if drift and not args.rebuild else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
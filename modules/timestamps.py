@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Tuple, Union
+
+# Booking times are naive local wall-clock times. Their epoch value counts
+# seconds from 1970-01-01 00:00 on that same clock, which is what SQLite's
+# strftime('%s', ...) returns for the stored text, so both sides agree and
+# no time zone or DST rules are involved.
+EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+
+STORAGE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+TimeValue = Union[datetime, str, int]
+
+
+@lru_cache(maxsize=8192)
+def parse_datetime(text: str) -> datetime:
+    """Datetime of stored text ('YYYY-MM-DD HH:MM[:SS[.ffffff]]')"""
+    return datetime.fromisoformat(text)
+
+
+def to_datetime(value: TimeValue) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, int):
+        return from_epoch(value)
+    return parse_datetime(value)
+
+
+def to_epoch(value: TimeValue) -> int:
+    """Epoch seconds of a datetime, stored text or epoch value"""
+    if isinstance(value, int):
+        return value
+    return (to_datetime(value) - EPOCH) // _SECOND
+
+
+@lru_cache(maxsize=8192)
+def from_epoch(timestamp: int) -> datetime:
+    return EPOCH + timedelta(seconds=timestamp)
+
+
+def format_datetime(value: TimeValue) -> str:
+    """Canonical stored text of a time"""
+    return to_datetime(value).strftime(STORAGE_FORMAT)
+
+
+def booking_times(start: TimeValue, end: TimeValue) -> Tuple[str, str, int, int]:
+    """(start_time, end_time, start_ts, end_ts) column values of a booking"""
+    start, end = to_datetime(start), to_datetime(end)
+    return format_datetime(start), format_datetime(end), to_epoch(start), to_epoch(end)
+
+
+def now_epoch() -> int:
+    return to_epoch(datetime.now())
+
+
+@lru_cache(maxsize=4096)
+def display_date(timestamp: int) -> str:
+    return from_epoch(timestamp).strftime('%Y-%m-%d')
+
+
+@lru_cache(maxsize=4096)
+def display_time(timestamp: int) -> str:
+    return from_epoch(timestamp).strftime('%H:%M')
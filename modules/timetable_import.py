@@ -0,0 +1,252 @@
+import csv
+import io
+import sys
+import time
+import argparse
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+from .database import get_connection, transaction
+from .booking_index import booking_index, IntervalSet
+from .timestamps import booking_times
+
+REQUIRED_COLUMNS = ('lab_id', 'user_id', 'date', 'start_time', 'end_time')
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+
+@dataclass
+class TimetableRow:
+    line: int
+    lab_id: str
+    user_id: int
+    start: datetime
+    end: datetime
+
+
+@dataclass
+class ImportSummary:
+    total: int = 0
+    inserted: int = 0
+    invalid: int = 0
+    conflicts: int = 0
+    chunks: int = 0
+    elapsed: float = 0.0
+    dry_run: bool = False
+    errors: List[str] = field(default_factory=list)  # first MAX_REPORTED_ERRORS problems
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def reject(self, line: int, reason: str, conflict: bool = False) -> None:
+        if conflict:
+            self.conflicts += 1
+        else:
+            self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"line {line}: {reason}")
+
+    def __str__(self) -> str:
+        action = 'would insert' if self.dry_run else 'inserted'
+        return (f"{self.total} rows read, {self.inserted} {action}, {self.invalid} invalid, "
+                f"{self.conflicts} conflicts in {self.elapsed:.2f}s "
+                f"({self.rows_per_second:.0f} rows/s)")
+
+
+def read_rows(stream: TextIO) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Yield (line number, raw CSV record) without loading the file"""
+    reader = csv.DictReader(stream)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"Missing CSV columns: {', '.join(missing)}")
+    for record in reader:
+        yield reader.line_num, record
+
+
+def parse_rows(records: Iterable[Tuple[int, Dict[str, str]]],
+               summary: ImportSummary) -> Iterator[TimetableRow]:
+    for line, record in records:
+        summary.total += 1
+        try:
+            booking_date = record['date'].strip()
+            start = datetime.strptime(f"{booking_date} {record['start_time'].strip()}", '%Y-%m-%d %H:%M')
+            end = datetime.strptime(f"{booking_date} {record['end_time'].strip()}", '%Y-%m-%d %H:%M')
+            user_id = int(record['user_id'])
+        except (ValueError, AttributeError):
+            summary.reject(line, "invalid user, date or time")
+            continue
+        if end <= start:
+            summary.reject(line, "end time is not after start time")
+            continue
+        yield TimetableRow(line, record['lab_id'].strip(), user_id, start, end)
+
+
+def validate_labs(rows: Iterable[TimetableRow], lab_ids: Set[str],
+                  summary: ImportSummary) -> Iterator[TimetableRow]:
+    for row in rows:
+        if row.lab_id not in lab_ids:
+            summary.reject(row.line, f"unknown or unavailable lab {row.lab_id}")
+            continue
+        yield row
+
+
+# Approved bookings of a lab overlapping [start_ts, end_ts). None is longer
+# than :max_length, so an overlap starts at or after start_ts - max_length,
+# which bounds the index range each check seeks over.
+CONFLICT_PREDICATE = """
+    labID = :lab_id
+    AND status = 'approved'
+    AND start_ts < :end_ts
+    AND start_ts >= :start_ts - :max_length
+    AND end_ts > :start_ts
+"""
+
+CONFLICT_QUERY = f"""
+    SELECT bookingID
+    FROM lab_bookings
+    WHERE {CONFLICT_PREDICATE}
+    LIMIT 1
+"""
+
+# Inserts the row unless it conflicts, in one statement, so nothing can be
+# approved between the check and the insert
+INSERT_UNLESS_CONFLICT = f"""
+    INSERT INTO lab_bookings (userID, labID, start_time, end_time, start_ts, end_ts, status)
+    SELECT :user_id, :lab_id, :start_time, :end_time, :start_ts, :end_ts, 'approved'
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM lab_bookings
+        WHERE {CONFLICT_PREDICATE}
+    )
+"""
+
+MAX_LENGTH_QUERY = """
+    SELECT COALESCE(MAX(end_ts - start_ts), 0)
+    FROM lab_bookings
+    WHERE status = 'approved'
+"""
+
+
+def detect_overlaps(rows: Iterable[TimetableRow], summary: ImportSummary) -> Iterator[TimetableRow]:
+    """Drop rows overlapping earlier rows of the file (dry runs only; a real
+    import finds them among the bookings it has already inserted)"""
+    accepted: Dict[str, IntervalSet] = {}
+    for row in rows:
+        in_file = accepted.setdefault(row.lab_id, IntervalSet())
+        clash = in_file.overlapping(row.start, row.end)
+        if clash:
+            summary.reject(row.line, f"overlaps line {clash[0]} of the file", conflict=True)
+            continue
+        in_file.add(row.line, row.start, row.end)
+        yield row
+
+
+def chunked(rows: Iterable[TimetableRow], size: int) -> Iterator[List[TimetableRow]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _params(row: TimetableRow, max_length: int) -> Dict:
+    start_time, end_time, start_ts, end_ts = booking_times(row.start, row.end)
+    return {'user_id': row.user_id, 'lab_id': row.lab_id, 'start_time': start_time,
+            'end_time': end_time, 'start_ts': start_ts, 'end_ts': end_ts,
+            'max_length': max(max_length, end_ts - start_ts)}
+
+
+def check_chunks(chunks: Iterable[List[TimetableRow]], summary: ImportSummary) -> None:
+    """Dry run: count what insert_chunks would insert, without writing"""
+    for chunk in chunks:
+        summary.chunks += 1
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            max_length, = cursor.execute(MAX_LENGTH_QUERY).fetchone()
+            for row in chunk:
+                found = cursor.execute(CONFLICT_QUERY, _params(row, max_length)).fetchone()
+                if found:
+                    summary.reject(row.line, f"conflicts with booking {found[0]}", conflict=True)
+                else:
+                    summary.inserted += 1
+
+
+def insert_chunks(chunks: Iterable[List[TimetableRow]], summary: ImportSummary) -> None:
+    """Insert each chunk in one transaction, checking every row against the
+    approved bookings (including earlier rows of the file) as it goes in"""
+    imported: Dict[int, int] = {}  # booking ID -> line of the file
+    for chunk in chunks:
+        summary.chunks += 1
+        inserted = []
+        rejected = []
+        with transaction() as conn:
+            cursor = conn.cursor()
+            max_length, = cursor.execute(MAX_LENGTH_QUERY).fetchone()
+            for row in chunk:
+                params = _params(row, max_length)
+                cursor.execute(INSERT_UNLESS_CONFLICT, params)
+                if cursor.rowcount:
+                    max_length = params['max_length']
+                    imported[cursor.lastrowid] = row.line
+                    inserted.append((cursor.lastrowid, row))
+                    continue
+                found, = cursor.execute(CONFLICT_QUERY, params).fetchone()
+                rejected.append((row, f"overlaps line {imported[found]} of the file" if found in imported
+                                 else f"conflicts with booking {found}"))
+        for booking_id, row in inserted:
+            booking_index.add(booking_id, row.lab_id, row.start, row.end)
+        for row, reason in rejected:
+            summary.reject(row.line, reason, conflict=True)
+        summary.inserted += len(inserted)
+
+
+def import_timetable(stream: TextIO, dry_run: bool = False,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> ImportSummary:
+    """Stream a CSV timetable (lab_id,user_id,date,start_time,end_time) into
+    approved lab bookings, committing every ``chunk_size`` rows"""
+    summary = ImportSummary(dry_run=dry_run)
+    started = time.perf_counter()
+
+    with get_connection() as conn:
+        lab_ids = {str(row[0]) for row in conn.execute(
+            "SELECT labID FROM labs WHERE isAvailable = TRUE")}
+
+    rows = parse_rows(read_rows(stream), summary)
+    rows = validate_labs(rows, lab_ids, summary)
+    if dry_run:
+        check_chunks(chunked(detect_overlaps(rows, summary), chunk_size), summary)
+    else:
+        insert_chunks(chunked(rows, chunk_size), summary)
+
+    summary.elapsed = time.perf_counter() - started
+    return summary
+
+
+def import_uploaded_file(file_storage, dry_run: bool = False) -> ImportSummary:
+    """Import a Werkzeug FileStorage without reading it into memory"""
+    stream = io.TextIOWrapper(file_storage.stream, encoding='utf-8-sig', newline='')
+    return import_timetable(stream, dry_run=dry_run)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import a CSV timetable as approved lab bookings")
+    parser.add_argument('csv_file')
+    parser.add_argument('--dry-run', action='store_true', help="validate without inserting")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    with open(args.csv_file, newline='', encoding='utf-8-sig') as stream:
+        summary = import_timetable(stream, dry_run=args.dry_run, chunk_size=args.chunk_size)
+    for error in summary.errors:
+        print(error)
+    print(summary)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
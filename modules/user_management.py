@@ -4,6 +4,10 @@ import sqlite3
 import hashlib
 from abc import ABC, abstractmethod
 
+from .database import get_connection
+from .booking_index import booking_index
+from .timestamps import booking_times
+
 
 class User(ABC):
     def __init__(self, user_id: int, name: str, role: str, contact_info: str):
@@ -19,7 +23,7 @@ class User(ABC):
     def authenticate(self, password: str) -> bool:
         """Authenticate user with hashed password"""
         hashed = hashlib.sha256(password.encode()).hexdigest()
-        with sqlite3.connect('lab_management.db') as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "SELECT password_hash FROM users WHERE userID = ?",
@@ -40,12 +44,12 @@ class Student(User):
     def book_lab(self, lab_id: str, start_time: datetime, end_time: datetime) -> bool:
         """Book a lab for a specific time slot"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
+            with get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    INSERT INTO lab_bookings (userID, labID, start_time, end_time)
-                    VALUES (?, ?, ?, ?)
-                """, (self.user_id, lab_id, start_time, end_time))
+                    INSERT INTO lab_bookings (userID, labID, start_time, end_time, start_ts, end_ts)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (self.user_id, lab_id) + booking_times(start_time, end_time))
                 return True
         except sqlite3.Error:
             return False
@@ -59,13 +63,15 @@ class Administrator(User):
                    start_time: datetime, end_time: datetime) -> bool:
         """Assign a lab to a user"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
+            with get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    INSERT INTO lab_bookings (userID, labID, start_time, end_time, status)
-                    VALUES (?, ?, ?, ?, 'approved')
-                """, (user_id, lab_id, start_time, end_time))
-                return True
+                    INSERT INTO lab_bookings (userID, labID, start_time, end_time, start_ts, end_ts, status)
+                    VALUES (?, ?, ?, ?, ?, ?, 'approved')
+                """, (user_id, lab_id) + booking_times(start_time, end_time))
+                booking_id = cursor.lastrowid
+            booking_index.add(booking_id, lab_id, start_time, end_time)
+            return True
         except sqlite3.Error:
             return False
 
@@ -76,7 +82,7 @@ class UserManager:
                     password: str, **kwargs) -> Optional[User]:
         """Create a new user in the system"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
+            with get_connection() as conn:
                 cursor = conn.cursor()
                 hashed_password = hashlib.sha256(password.encode()).hexdigest()
                 cursor.execute("""
@@ -98,7 +104,7 @@ class UserManager:
     def get_user(user_id: int) -> Optional[User]:
         """Retrieve a user from the database"""
         try:
-            with sqlite3.connect('lab_management.db') as conn:
+            with get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT name, role, contact_info FROM users WHERE userID = ?",